@@ -0,0 +1,35 @@
+"""add HNSW cosine index on embeddings via halfvec expression
+
+Revision ID: 5b7e2c1d9a40
+Revises: 4e5205083a3d
+Create Date: 2025-11-15 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c1d9a40'
+down_revision: Union[str, None] = '4e5205083a3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # HNSW on the `vector` type is limited to 2000 dimensions, but `halfvec`
+    # (pgvector 0.7.0+) can be indexed up to 4000. Index a half-precision
+    # expression of the stored vector so the table and loaders stay unchanged.
+    # Queries must ORDER BY the same expression for the planner to use it:
+    #   embedding::halfvec(3072) <=> :query::halfvec(3072)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_embeddings_embedding_hnsw
+        ON embeddings
+        USING hnsw ((embedding::halfvec(3072)) halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_embeddings_embedding_hnsw')
@@ -0,0 +1,39 @@
+"""add query_embedding_cache table
+
+Revision ID: 6c3f8a2e4b17
+Revises: 5b7e2c1d9a40
+Create Date: 2025-11-15 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c3f8a2e4b17'
+down_revision: Union[str, None] = '5b7e2c1d9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Shared tier of the query embedding cache (app/services/embedding_cache.py).
+    # cache_key is sha256(model + normalized query); embeddings are raw float32
+    # bytes so reads and writes skip text conversion.
+    op.create_table(
+        'query_embedding_cache',
+        sa.Column('cache_key', sa.String(64), primary_key=True),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('NOW()'))
+    )
+
+    # Supports TTL purges: DELETE FROM query_embedding_cache WHERE created_at < ...
+    op.create_index('ix_query_embedding_cache_created_at', 'query_embedding_cache', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_query_embedding_cache_created_at')
+    op.drop_table('query_embedding_cache')
@@ -0,0 +1,53 @@
+"""add corpus_version tracking for embeddings reloads
+
+Revision ID: 7d4a9b3f5c28
+Revises: 6c3f8a2e4b17
+Create Date: 2025-11-15 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4a9b3f5c28'
+down_revision: Union[str, None] = '6c3f8a2e4b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Single-row table holding a monotonically increasing corpus version.
+    # Caches derived from the corpus (e.g. the semantic answer cache) compare
+    # against it to detect reloads of the embeddings table.
+    op.create_table(
+        'corpus_version',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('NOW()')),
+        sa.CheckConstraint('id = 1', name='check_corpus_version_single_row')
+    )
+    op.execute('INSERT INTO corpus_version (id, version) VALUES (1, 1)')
+
+    # Bump the version on any write to embeddings, whichever loader makes it
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_corpus_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE corpus_version SET version = version + 1, updated_at = NOW() WHERE id = 1;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_embeddings_corpus_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON embeddings
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_corpus_version()
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS trg_embeddings_corpus_version ON embeddings')
+    op.execute('DROP FUNCTION IF EXISTS bump_corpus_version()')
+    op.drop_table('corpus_version')
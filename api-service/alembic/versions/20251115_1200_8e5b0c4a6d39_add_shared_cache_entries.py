@@ -0,0 +1,79 @@
+"""generalize query_embedding_cache into the shared cache_entries table
+
+Revision ID: 8e5b0c4a6d39
+Revises: 7d4a9b3f5c28
+Create Date: 2025-11-15 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e5b0c4a6d39'
+down_revision: Union[str, None] = '7d4a9b3f5c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Shared tier for app/services/cache.py. Each service uses its own
+    # namespace (query_embedding, intent_classification, ...); values are
+    # serialized bytes (JSON or raw float32 for embeddings).
+    #
+    # Generalizes query_embedding_cache in place: its keys are already the
+    # query_embedding namespace's keys (sha256 of model + normalized query)
+    # and its raw float32 embeddings are that namespace's values, so cached
+    # rows carry over.
+    op.drop_index('ix_query_embedding_cache_created_at')
+    op.rename_table('query_embedding_cache', 'cache_entries')
+
+    op.add_column(
+        'cache_entries',
+        sa.Column('namespace', sa.String(), nullable=False, server_default='query_embedding')
+    )
+    op.alter_column('cache_entries', 'namespace', server_default=None)
+    op.alter_column('cache_entries', 'cache_key', type_=sa.String())
+    op.alter_column('cache_entries', 'embedding', new_column_name='value')
+
+    # Carried-over rows keep the default one-day embedding TTL
+    op.add_column('cache_entries', sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=True))
+    op.execute("UPDATE cache_entries SET expires_at = created_at + INTERVAL '1 day'")
+    op.alter_column('cache_entries', 'expires_at', nullable=False)
+    op.drop_column('cache_entries', 'created_at')
+    op.drop_column('cache_entries', 'model')
+
+    op.drop_constraint('query_embedding_cache_pkey', 'cache_entries', type_='primary')
+    op.create_primary_key('pk_cache_entries', 'cache_entries', ['namespace', 'cache_key'])
+
+    # Supports the daily purge of expired rows
+    op.create_index('ix_cache_entries_expires_at', 'cache_entries', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cache_entries_expires_at')
+
+    # Only embeddings fit the old table (cached data, safe to drop)
+    op.execute("DELETE FROM cache_entries WHERE namespace <> 'query_embedding'")
+    op.drop_constraint('pk_cache_entries', 'cache_entries', type_='primary')
+    op.drop_column('cache_entries', 'namespace')
+    op.create_primary_key('query_embedding_cache_pkey', 'cache_entries', ['cache_key'])
+
+    op.add_column(
+        'cache_entries',
+        sa.Column('model', sa.String(), nullable=False, server_default='text-embedding-3-large')
+    )
+    op.alter_column('cache_entries', 'model', server_default=None)
+    op.add_column(
+        'cache_entries',
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text('NOW()'))
+    )
+    op.execute("UPDATE cache_entries SET created_at = expires_at - INTERVAL '1 day'")
+    op.drop_column('cache_entries', 'expires_at')
+    op.alter_column('cache_entries', 'value', new_column_name='embedding')
+    op.alter_column('cache_entries', 'cache_key', type_=sa.String(64))
+
+    op.rename_table('cache_entries', 'query_embedding_cache')
+    op.create_index('ix_query_embedding_cache_created_at', 'query_embedding_cache', ['created_at'])
@@ -0,0 +1,38 @@
+"""add full-text search column on embeddings content for hybrid retrieval
+
+Revision ID: 9f6c1d5e7a42
+Revises: 8e5b0c4a6d39
+Create Date: 2025-11-16 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f6c1d5e7a42'
+down_revision: Union[str, None] = '8e5b0c4a6d39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Generated column so the ingestion loaders don't need to change; the
+    # english configuration stems terms ("assessments" -> "assess") while
+    # acronyms like RTI/MTSS survive as exact lexemes.
+    op.execute("""
+        ALTER TABLE embeddings
+        ADD COLUMN IF NOT EXISTS content_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_embeddings_content_tsv
+        ON embeddings
+        USING gin (content_tsv)
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_embeddings_content_tsv')
+    op.execute('ALTER TABLE embeddings DROP COLUMN IF EXISTS content_tsv')
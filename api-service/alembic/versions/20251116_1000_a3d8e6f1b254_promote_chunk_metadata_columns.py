@@ -0,0 +1,86 @@
+"""promote chunk metadata from JSONB into typed, indexed columns
+
+Revision ID: a3d8e6f1b254
+Revises: 9f6c1d5e7a42
+Create Date: 2025-11-16 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d8e6f1b254'
+down_revision: Union[str, None] = '9f6c1d5e7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('embeddings', sa.Column('book_id', sa.Text(), nullable=True))
+    op.add_column('embeddings', sa.Column('chapter_number', sa.Integer(), nullable=True))
+    op.add_column('embeddings', sa.Column('page_start', sa.Integer(), nullable=True))
+    op.add_column('embeddings', sa.Column('page_end', sa.Integer(), nullable=True))
+    op.add_column('embeddings', sa.Column('primary_domain', sa.Text(), nullable=True))
+    op.add_column('embeddings', sa.Column(
+        'secondary_domains',
+        ARRAY(sa.Text()),
+        nullable=False,
+        server_default=sa.text("'{}'::text[]")
+    ))
+
+    # Backfill from the JSONB blob; non-integer values become NULL
+    op.execute(r"""
+        UPDATE embeddings SET
+            book_id = metadata->>'book_id',
+            chapter_number = CASE WHEN metadata->>'chapter_number' ~ '^-?\d+$'
+                THEN (metadata->>'chapter_number')::integer END,
+            page_start = CASE WHEN metadata->>'page_start' ~ '^-?\d+$'
+                THEN (metadata->>'page_start')::integer END,
+            page_end = CASE WHEN metadata->>'page_end' ~ '^-?\d+$'
+                THEN (metadata->>'page_end')::integer END,
+            primary_domain = metadata->>'primary_domain',
+            secondary_domains = CASE WHEN jsonb_typeof(metadata->'secondary_domains') = 'array'
+                THEN ARRAY(SELECT jsonb_array_elements_text(metadata->'secondary_domains'))
+                ELSE '{}'::text[] END
+    """)
+
+    # Replace the JSONB expression indexes with plain column indexes
+    op.drop_index('ix_embeddings_metadata_book_id', table_name='embeddings')
+    op.drop_index('ix_embeddings_metadata_primary_domain', table_name='embeddings')
+    op.create_index('ix_embeddings_book_id_page_start', 'embeddings', ['book_id', 'page_start'])
+    op.create_index('ix_embeddings_primary_domain', 'embeddings', ['primary_domain'])
+    op.create_index(
+        'ix_embeddings_secondary_domains',
+        'embeddings',
+        ['secondary_domains'],
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_embeddings_secondary_domains', table_name='embeddings')
+    op.drop_index('ix_embeddings_primary_domain', table_name='embeddings')
+    op.drop_index('ix_embeddings_book_id_page_start', table_name='embeddings')
+    op.create_index(
+        'ix_embeddings_metadata_primary_domain',
+        'embeddings',
+        [sa.text("(metadata->>'primary_domain')")],
+        postgresql_using='btree'
+    )
+    op.create_index(
+        'ix_embeddings_metadata_book_id',
+        'embeddings',
+        [sa.text("(metadata->>'book_id')")],
+        postgresql_using='btree'
+    )
+
+    op.drop_column('embeddings', 'secondary_domains')
+    op.drop_column('embeddings', 'primary_domain')
+    op.drop_column('embeddings', 'page_end')
+    op.drop_column('embeddings', 'page_start')
+    op.drop_column('embeddings', 'chapter_number')
+    op.drop_column('embeddings', 'book_id')
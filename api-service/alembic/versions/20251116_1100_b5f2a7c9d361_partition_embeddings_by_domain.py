@@ -0,0 +1,133 @@
+"""list-partition embeddings by primary domain with per-partition vector indexes
+
+Revision ID: b5f2a7c9d361
+Revises: a3d8e6f1b254
+Create Date: 2025-11-16 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5f2a7c9d361'
+down_revision: Union[str, None] = 'a3d8e6f1b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The seven knowledge domains (app.services.intent_router.DOMAINS)
+DOMAINS = [
+    'assessment',
+    'collaboration',
+    'leadership',
+    'curriculum',
+    'data_analysis',
+    'school_culture',
+    'student_learning',
+]
+
+COLUMNS = """
+    id, content, embedding, metadata, created_at,
+    book_id, chapter_number, page_start, page_end, primary_domain, secondary_domains
+"""
+
+TABLE_DEFINITION = """
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    content TEXT NOT NULL,
+    embedding vector(3072) NOT NULL,
+    metadata JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,
+    book_id TEXT,
+    chapter_number INTEGER,
+    page_start INTEGER,
+    page_end INTEGER,
+    primary_domain TEXT,
+    secondary_domains TEXT[] NOT NULL DEFAULT '{}'::text[]
+"""
+
+
+def _create_corpus_version_trigger() -> None:
+    op.execute("""
+        CREATE TRIGGER trg_embeddings_corpus_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON embeddings
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_corpus_version()
+    """)
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE embeddings RENAME TO embeddings_unpartitioned')
+
+    # A primary key on a partitioned table must include the partition key,
+    # which is nullable (untagged chunks). Ids are enforced unique within a
+    # domain by a unique index on (id, primary_domain) instead (see below);
+    # across partitions they rely on gen_random_uuid(), as Postgres cannot
+    # enforce a unique id across partitions.
+    op.execute(f'CREATE TABLE embeddings ({TABLE_DEFINITION}) PARTITION BY LIST (primary_domain)')
+    for domain in DOMAINS:
+        op.execute(f"CREATE TABLE embeddings_{domain} PARTITION OF embeddings FOR VALUES IN ('{domain}')")
+    # Untagged chunks (NULL) and any future domain
+    op.execute('CREATE TABLE embeddings_default PARTITION OF embeddings DEFAULT')
+
+    op.execute(f"""
+        INSERT INTO embeddings ({COLUMNS})
+        SELECT {COLUMNS} FROM embeddings_unpartitioned
+    """)
+    op.execute('DROP TABLE embeddings_unpartitioned')
+
+    # Indexes on the parent are created on every partition, so each domain
+    # gets its own, smaller HNSW graph
+    op.execute("""
+        CREATE INDEX ix_embeddings_embedding_hnsw
+        ON embeddings
+        USING hnsw ((embedding::halfvec(3072)) halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    # Unique per domain only (the same id in two domains is not rejected).
+    # NULLS NOT DISTINCT (requires PostgreSQL 15+) extends this to untagged
+    # chunks; the leading id column also serves the id lookups
+    op.execute("""
+        CREATE UNIQUE INDEX ux_embeddings_id_primary_domain
+        ON embeddings (id, primary_domain) NULLS NOT DISTINCT
+    """)
+    op.create_index('ix_embeddings_content_tsv', 'embeddings', ['content_tsv'], postgresql_using='gin')
+    op.create_index('ix_embeddings_book_id_page_start', 'embeddings', ['book_id', 'page_start'])
+    op.create_index(
+        'ix_embeddings_secondary_domains',
+        'embeddings',
+        ['secondary_domains'],
+        postgresql_using='gin'
+    )
+
+    _create_corpus_version_trigger()
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE embeddings RENAME TO embeddings_partitioned')
+
+    op.execute(f'CREATE TABLE embeddings ({TABLE_DEFINITION}, PRIMARY KEY (id))')
+    op.execute(f"""
+        INSERT INTO embeddings ({COLUMNS})
+        SELECT {COLUMNS} FROM embeddings_partitioned
+    """)
+    op.execute('DROP TABLE embeddings_partitioned CASCADE')
+
+    op.execute("""
+        CREATE INDEX ix_embeddings_embedding_hnsw
+        ON embeddings
+        USING hnsw ((embedding::halfvec(3072)) halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    op.create_index('ix_embeddings_content_tsv', 'embeddings', ['content_tsv'], postgresql_using='gin')
+    op.create_index('ix_embeddings_book_id_page_start', 'embeddings', ['book_id', 'page_start'])
+    op.create_index('ix_embeddings_primary_domain', 'embeddings', ['primary_domain'])
+    op.create_index(
+        'ix_embeddings_secondary_domains',
+        'embeddings',
+        ['secondary_domains'],
+        postgresql_using='gin'
+    )
+
+    _create_corpus_version_trigger()
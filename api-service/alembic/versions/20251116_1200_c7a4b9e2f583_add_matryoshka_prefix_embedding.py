@@ -0,0 +1,39 @@
+"""add normalized 512-dim prefix embedding with its own HNSW index
+
+Revision ID: c7a4b9e2f583
+Revises: b5f2a7c9d361
+Create Date: 2025-11-16 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a4b9e2f583'
+down_revision: Union[str, None] = 'b5f2a7c9d361'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('embeddings', sa.Column('embedding_short', Vector(512), nullable=True))
+
+    # Same as app.services.matryoshka.truncate_normalize (pgvector 0.7.0+)
+    op.execute('UPDATE embeddings SET embedding_short = l2_normalize(subvector(embedding, 1, 512))')
+
+    # Prefixes are unit length, so inner product ranks like cosine and is cheaper
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_embeddings_embedding_short_hnsw
+        ON embeddings
+        USING hnsw (embedding_short vector_ip_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_embeddings_embedding_short_hnsw')
+    op.drop_column('embeddings', 'embedding_short')
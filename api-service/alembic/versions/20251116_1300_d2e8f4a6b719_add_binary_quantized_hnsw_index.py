@@ -0,0 +1,34 @@
+"""add HNSW Hamming index on binary-quantized embeddings
+
+Revision ID: d2e8f4a6b719
+Revises: c7a4b9e2f583
+Create Date: 2025-11-16 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e8f4a6b719'
+down_revision: Union[str, None] = 'c7a4b9e2f583'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One sign bit per dimension: 384 bytes per vector instead of 6 KB of
+    # halfvec. Like the halfvec index this is an expression index, so the
+    # table and loaders stay unchanged; queries must ORDER BY
+    #   binary_quantize(embedding)::bit(3072) <~> binary_quantize(:query)::bit(3072)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_embeddings_embedding_bit_hnsw
+        ON embeddings
+        USING hnsw ((binary_quantize(embedding)::bit(3072)) bit_hamming_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_embeddings_embedding_bit_hnsw')
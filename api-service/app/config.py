@@ -49,6 +49,50 @@ class Settings(BaseSettings):
     session_secret_key: str = ""  # For SessionMiddleware (OAuth state storage)
     cleanup_schedule_hour: int = 2  # Hour (0-23) to run daily session cleanup (UTC)
 
+    # Retrieval (Epic 2)
+    retrieval_top_k: int = 50  # Candidates fetched before deduplication
+    retrieval_ef_search: int = 64  # HNSW ef_search (recall vs. latency); sessions use at least top_k
+    retrieval_mmr_lambda: float = 0.7  # MMR relevance vs. diversity (1.0 = relevance only)
+    retrieval_hybrid: bool = False  # Fuse full-text and vector search (RRF)
+    retrieval_rrf_k: int = 60  # RRF rank constant
+    retrieval_partitioned: bool = False  # Search only the classified domains' partitions
+    retrieval_two_stage: bool = False  # 512-dim prefix ANN, then exact rerank on full vectors
+    retrieval_rerank_candidates: int = 300  # Two-stage/binary: coarse candidates reranked
+    retrieval_binary_quantized: bool = False  # Hamming prefilter on bit(3072), then exact rerank
+    retrieval_vector_backend: str = "pgvector"  # "pgvector" or "numpy" (in-process snapshot)
+    retrieval_vector_store_path: str = "data/vector_store"  # Numpy backend snapshot directory
+    retrieval_adaptive: bool = False  # Adaptive depth with a similarity-elbow cutoff
+    retrieval_min_similarity: float = 0.25  # Adaptive: drop candidates below this score
+    retrieval_similarity_drop: float = 0.1  # Adaptive: cut at the first larger similarity gap
+    retrieval_max_k: int = 200  # Adaptive: deepest candidate fetch
+    retrieval_speculative: bool = False  # Start unfiltered search before classification returns
+    retrieval_db_pool_size: int = 10  # Per-engine pool size for the retrieval service
+    retrieval_db_max_overflow: int = 20
+    embedding_cache_max_entries: int = 1024  # In-process query embeddings (~12 KB each)
+    embedding_cache_ttl_seconds: int = 86400
+    embedding_cache_shared: bool = False  # Also share through the cache_entries table
+    chunk_cache_max_entries: int = 4096  # In-process chunk content, keyed by chunk id
+    chunk_cache_ttl_seconds: int = 86400
+    intent_cache_max_entries: int = 2048  # In-process GPT-4o classifications
+    intent_cache_shared: bool = False  # Also share through the cache_entries table
+    intent_local_classifier: bool = False  # Domain-centroid classifier before GPT-4o
+    intent_local_confidence_threshold: float = 0.6
+    intent_shadow_rate: float = 0.0  # Share of local classifications checked against GPT-4o
+
+    # Semantic answer cache (/api/coach/query)
+    answer_cache_enabled: bool = True
+    answer_cache_threshold: float = 0.97  # Minimum cosine similarity to reuse an answer
+    answer_cache_max_entries: int = 512
+    answer_cache_ttl_seconds: int = 86400
+
+    # Generation context packing
+    generation_context_token_budget: int = 4000  # Max source-context tokens per prompt
+    generation_min_source_tokens: int = 100  # Shorter trimmed sources are dropped
+
+    # Tracing (OpenTelemetry)
+    tracing_exporter: str = "none"  # none, console, json, otlp_file or otlp
+    tracing_file_path: str = "traces/spans.jsonl"  # Output of the json/otlp_file exporters
+
     model_config = SettingsConfigDict(
         # Note: env_file removed to allow docker-compose environment variables
         # to take precedence. For local dev without docker-compose, set vars directly.
@@ -11,11 +11,12 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from app.config import settings
-from app.middleware.request_id import RequestIDMiddleware
-from app.middleware.logging import LoggingMiddleware
-from app.routers import health, auth, admin, coach
-from app.services.database import SessionLocal
+from app.middleware.request_context import RequestContextMiddleware
+from app.routers import health, auth, admin, coach, metrics
+from app.services.database import SessionLocal, engine
 from app.services.cleanup_service import delete_expired_sessions
+from app.services.cache import purge_expired_entries
+from app.services.tracing import instrument_engine, setup_tracing, shutdown_tracing
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +39,18 @@ def run_session_cleanup():
         db.close()
 
 
+def run_cache_cleanup():
+    """
+    Background job to purge expired rows from the shared cache table.
+    Runs daily alongside session cleanup.
+    """
+    try:
+        count = purge_expired_entries(engine)
+        logger.info(f"Background cache cleanup completed: {count} entries deleted")
+    except Exception as e:
+        logger.error(f"Background cache cleanup failed: {str(e)}", exc_info=True)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -53,6 +66,13 @@ async def lifespan(app: FastAPI):
         name="Daily session cleanup",
         replace_existing=True
     )
+    scheduler.add_job(
+        run_cache_cleanup,
+        trigger=CronTrigger(hour=settings.cleanup_schedule_hour, minute=30),
+        id="cache_cleanup",
+        name="Daily shared cache cleanup",
+        replace_existing=True
+    )
     scheduler.start()
     logger.info(f"Session cleanup scheduled daily at {settings.cleanup_schedule_hour}:00 UTC")
 
@@ -61,7 +81,13 @@ async def lifespan(app: FastAPI):
     # Shutdown: Stop scheduler
     logger.info("Stopping background scheduler")
     scheduler.shutdown()
+    shutdown_tracing()
+
 
+# Tracing (no-op unless TRACING_EXPORTER is set); engines created later,
+# like the retrieval service's, instrument themselves
+setup_tracing(settings.tracing_exporter, settings.tracing_file_path, settings.app_name)
+instrument_engine(engine, "sessions")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -74,8 +100,7 @@ app = FastAPI(
 )
 
 # Add middleware (order matters - first added = outermost layer)
-app.add_middleware(LoggingMiddleware)
-app.add_middleware(RequestIDMiddleware)
+app.add_middleware(RequestContextMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -99,6 +124,7 @@ app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
 app.include_router(coach.router, tags=["coach"])  # Epic 2: AI Coach endpoint
+app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.get("/")
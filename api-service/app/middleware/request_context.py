@@ -0,0 +1,135 @@
+"""Request ID, timing and structured access logging as one ASGI middleware."""
+import atexit
+import json
+import logging
+import queue
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import settings
+from app.services.tracing import reset_request_id, set_request_id, span
+
+# Configure JSON logging
+logging.basicConfig(
+    level=getattr(logging, settings.log_level.upper()),
+    format='%(message)s'
+)
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+_state = {'listener': None}
+
+
+class JSONAccessFormatter(logging.Formatter):
+    """Format an access record's fields as one JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(getattr(record, 'access', None) or {"event": record.getMessage()})
+
+
+def start_access_log(handler: Optional[logging.Handler] = None) -> QueueListener:
+    """Route access records through a queue to a listener thread.
+
+    The event loop only enqueues records; JSON encoding and writing happen
+    on the listener thread. Started once; later calls return the running
+    listener.
+
+    Args:
+        handler: Destination of the records (stderr by default)
+
+    Returns:
+        The running queue listener
+    """
+    if _state['listener'] is None:
+        records = queue.SimpleQueue()
+        handler = handler or logging.StreamHandler()
+        handler.setFormatter(JSONAccessFormatter())
+        logger.addHandler(QueueHandler(records))
+        logger.propagate = False
+        listener = QueueListener(records, handler)
+        listener.start()
+        atexit.register(stop_access_log)
+        _state['listener'] = listener
+    return _state['listener']
+
+
+def stop_access_log() -> None:
+    """Flush queued access records and stop the listener thread."""
+    listener = _state['listener']
+    if listener is not None:
+        listener.stop()
+        for handler in list(logger.handlers):
+            if isinstance(handler, QueueHandler):
+                logger.removeHandler(handler)
+        logger.propagate = True
+        _state['listener'] = None
+
+
+class RequestContextMiddleware:
+    """Assign or propagate the request ID, time the request and log it.
+
+    A raw ASGI middleware: the response is passed through untouched apart
+    from the X-Request-ID header, so streaming responses are not buffered or
+    wrapped in extra tasks. Each request runs in a tracing span tagged with
+    its ID and produces one structured access record.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        start_access_log()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        # Generate or extract request ID
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None:
+            request_id = str(uuid.uuid4())
+
+        # Available to routes as request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = set_request_id(request_id)
+        try:
+            with span(f"{scope['method']} {scope['path']}", {
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+            }, server=True) as request_span:
+                await self.app(scope, receive, send_with_request_id)
+                request_span.set_attribute("http.status_code", status_code)
+        finally:
+            reset_request_id(token)
+            if logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                logger.info("request", extra={'access': {
+                    "event": "request",
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query_params": scope.get("query_string", b"").decode("latin-1"),
+                    "client_host": client[0] if client else None,
+                    "status_code": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                }})
@@ -1,25 +0,0 @@
-"""Request ID middleware for request tracking."""
-import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Add unique request ID to each request for tracing."""
-
-    async def dispatch(self, request: Request, call_next) -> Response:
-        """Process request and add request ID."""
-        # Generate or extract request ID
-        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-
-        # Store in request state for access in routes
-        request.state.request_id = request_id
-
-        # Process request
-        response = await call_next(request)
-
-        # Add request ID to response headers
-        response.headers["X-Request-ID"] = request_id
-
-        return response
@@ -4,15 +4,22 @@ Story 2.8: Chat API Endpoints
 REST API endpoints for AI coach interactions.
 """
 
+import json
 import logging
 import time
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, HTTPException, Depends, status
+import numpy as np
+from fastapi import APIRouter, HTTPException, Depends, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from app.config import settings
 from app.services.retrieval_service import RetrievalService
 from app.services.generation_service import GenerationService
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.metrics import record_cache, reset_request_timings, server_timing, start_request_timings
+from app.services.vector_store import open_vector_store
 from db_config import get_database_url
 import os
 
@@ -20,6 +27,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/coach", tags=["coach"])
 
+# Keep proxies (nginx, ALB) from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 
 # Request/Response models
 class QueryRequest(BaseModel):
@@ -45,11 +55,13 @@ class QueryResponse(BaseModel):
     response_time_ms: int
     token_usage: int
     cost_usd: float
+    cached: bool = False
 
 
 # Initialize services (singleton pattern)
 _retrieval_service = None
 _generation_service = None
+_answer_cache = None
 
 
 def get_retrieval_service() -> RetrievalService:
@@ -57,7 +69,40 @@ def get_retrieval_service() -> RetrievalService:
     global _retrieval_service
     if _retrieval_service is None:
         database_url = get_database_url()
-        _retrieval_service = RetrievalService(database_url=database_url)
+        _retrieval_service = RetrievalService(
+            database_url=database_url,
+            top_k=settings.retrieval_top_k,
+            ef_search=settings.retrieval_ef_search,
+            mmr_lambda=settings.retrieval_mmr_lambda,
+            hybrid=settings.retrieval_hybrid,
+            rrf_k=settings.retrieval_rrf_k,
+            partitioned=settings.retrieval_partitioned,
+            two_stage=settings.retrieval_two_stage,
+            rerank_candidates=settings.retrieval_rerank_candidates,
+            binary_quantized=settings.retrieval_binary_quantized,
+            vector_store=open_vector_store(
+                settings.retrieval_vector_backend,
+                settings.retrieval_vector_store_path
+            ),
+            adaptive=settings.retrieval_adaptive,
+            min_similarity=settings.retrieval_min_similarity,
+            similarity_drop=settings.retrieval_similarity_drop,
+            max_k=settings.retrieval_max_k,
+            speculative=settings.retrieval_speculative,
+            embedding_cache_max_entries=settings.embedding_cache_max_entries,
+            embedding_cache_ttl_seconds=settings.embedding_cache_ttl_seconds,
+            shared_embedding_cache=settings.embedding_cache_shared,
+            local_classifier=settings.intent_local_classifier,
+            local_confidence_threshold=settings.intent_local_confidence_threshold,
+            classifier_shadow_rate=settings.intent_shadow_rate,
+            classification_cache_max_entries=settings.intent_cache_max_entries,
+            shared_classification_cache=settings.intent_cache_shared,
+            chunk_cache_max_entries=settings.chunk_cache_max_entries,
+            chunk_cache_ttl_seconds=settings.chunk_cache_ttl_seconds,
+            db_pool_size=settings.retrieval_db_pool_size,
+            db_max_overflow=settings.retrieval_db_max_overflow
+        )
+        _retrieval_service.check_vector_store()
     return _retrieval_service
 
 
@@ -65,26 +110,115 @@ def get_generation_service() -> GenerationService:
     """Get or create generation service instance."""
     global _generation_service
     if _generation_service is None:
-        _generation_service = GenerationService()
+        _generation_service = GenerationService(
+            context_token_budget=settings.generation_context_token_budget,
+            min_source_tokens=settings.generation_min_source_tokens
+        )
     return _generation_service
 
 
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get or create the semantic answer cache (None when disabled)."""
+    global _answer_cache
+    if _answer_cache is None and settings.answer_cache_enabled:
+        _answer_cache = SemanticAnswerCache(
+            threshold=settings.answer_cache_threshold,
+            max_entries=settings.answer_cache_max_entries,
+            ttl_seconds=settings.answer_cache_ttl_seconds
+        )
+    return _answer_cache
+
+
+async def _lookup_cached_answer(
+    query: str,
+    retrieval_service: RetrievalService,
+    answer_cache: Optional[SemanticAnswerCache]
+) -> Tuple[Optional[Dict], Optional[np.ndarray], Optional[int], Optional[tuple]]:
+    """Look up a cached answer for a semantically equivalent query.
+
+    Query embedding and classification start before the lookup, so a miss
+    hands both in-flight tasks to retrieval without adding serial latency;
+    a hit cancels the classification. Cache failures are logged and treated
+    as misses.
+
+    Returns:
+        (cached entry or None, query embedding, corpus version, query tasks
+        for aretrieve); the embedding and version are None when the answer
+        cache cannot be used, the tasks when there is nothing left to hand over
+    """
+    if answer_cache is None:
+        return None, None, None, None
+
+    query_tasks = retrieval_service.start_query_tasks(query)
+    embedding_task, classification_task = query_tasks
+    try:
+        corpus_version = await retrieval_service.aget_corpus_version()
+        if corpus_version is None:
+            return None, None, None, query_tasks
+        query_embedding = await embedding_task
+        cached = answer_cache.lookup(query_embedding, corpus_version)
+        record_cache("answer", cached is not None)
+        if cached is not None:
+            logger.info(f"Answer cache hit (similarity={cached['similarity']:.3f})")
+            classification_task.cancel()
+            return cached, query_embedding, corpus_version, None
+        return None, query_embedding, corpus_version, query_tasks
+    except Exception as e:
+        logger.warning(f"Answer cache lookup failed: {e}")
+        return None, None, None, query_tasks
+
+
+def _domains(classification: Dict) -> List[str]:
+    """Flatten a classification into its primary + secondary domains."""
+    domains = [classification['primary_domain']]
+    if classification.get('secondary_domains'):
+        domains.extend(classification['secondary_domains'])
+    return domains
+
+
+def _source(chunk: Dict) -> Dict:
+    """Summarize a retrieved chunk for the client before generation starts."""
+    metadata = chunk['metadata']
+    return {
+        'book_title': metadata.get('book_title'),
+        'authors': metadata.get('authors', []),
+        'chapter': metadata.get('chapter_number'),
+        'chapter_title': metadata.get('chapter_title'),
+        'pages': f"{metadata.get('page_start', '?')}-{metadata.get('page_end', '?')}",
+        'similarity': round(chunk['similarity'], 4)
+    }
+
+
+def _sse(event: str, data: Dict) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/query", response_model=QueryResponse, status_code=status.HTTP_200_OK)
 async def query_coach(
     request: QueryRequest,
+    response: Response,
     retrieval_service: RetrievalService = Depends(get_retrieval_service),
-    generation_service: GenerationService = Depends(get_generation_service)
+    generation_service: GenerationService = Depends(get_generation_service),
+    answer_cache: Optional[SemanticAnswerCache] = Depends(get_answer_cache)
 ):
     """Query the AI coach with a question.
 
-    This endpoint orchestrates the full RAG pipeline:
-    1. Retrieves relevant content chunks (Story 2.6)
-    2. Generates a response with citations (Story 2.7)
+    This endpoint orchestrates the full RAG pipeline without blocking the
+    event loop (async OpenAI clients and an async database engine):
+    1. Returns a cached answer for a semantically equivalent query, if any
+    2. Retrieves relevant content chunks (Story 2.6)
+    3. Generates a response with citations (Story 2.7)
+
+    The time spent in each pipeline stage is returned in a Server-Timing
+    header (and recorded in the /metrics histograms).
 
     Args:
         request: Query request with user question
+        response: Outgoing response (carries the Server-Timing header)
         retrieval_service: Injected retrieval service
         generation_service: Injected generation service
+        answer_cache: Injected semantic answer cache (None when disabled)
 
     Returns:
         QueryResponse with answer, citations, and metadata
@@ -93,12 +227,28 @@ async def query_coach(
         HTTPException: On various error conditions
     """
     start_time = time.time()
+    timings, timings_token = start_request_timings()
 
     try:
         logger.info(f"Received query: {request.query[:100]}...")
 
+        # Step 0: Semantic answer cache (its embedding and classification tasks feed retrieval)
+        cached, query_embedding, corpus_version, query_tasks = await _lookup_cached_answer(
+            request.query, retrieval_service, answer_cache
+        )
+        if cached is not None:
+            return QueryResponse(**{
+                **cached['response'],
+                'response_time_ms': int((time.time() - start_time) * 1000),
+                'token_usage': 0,
+                'cost_usd': 0.0,
+                'cached': True
+            })
+
         # Step 1: Retrieve relevant chunks
-        retrieval_result = retrieval_service.retrieve(request.query, final_k=7)
+        retrieval_result = await retrieval_service.aretrieve(
+            request.query, final_k=7, query_tasks=query_tasks
+        )
 
         if 'error' in retrieval_result:
             logger.error(f"Retrieval failed: {retrieval_result['error']}")
@@ -111,7 +261,7 @@ async def query_coach(
         classification = retrieval_result['classification']
 
         # Step 2: Generate response
-        generation_result = generation_service.generate(
+        generation_result = await generation_service.agenerate(
             query=request.query,
             retrieved_chunks=chunks
         )
@@ -127,12 +277,10 @@ async def query_coach(
         response_time_ms = int((time.time() - start_time) * 1000)
 
         # Prepare domains list
-        domains = [classification['primary_domain']]
-        if classification.get('secondary_domains'):
-            domains.extend(classification['secondary_domains'])
+        domains = _domains(classification)
 
         # Build response
-        return QueryResponse(
+        query_response = QueryResponse(
             response=generation_result['response'],
             citations=[Citation(**c) for c in generation_result['citations']],
             domains=domains,
@@ -141,6 +289,12 @@ async def query_coach(
             cost_usd=generation_result['cost_usd']
         )
 
+        # Only answers grounded in sources are worth reusing
+        if query_embedding is not None and chunks:
+            answer_cache.store(query_embedding, domains, corpus_version, query_response.model_dump())
+
+        return query_response
+
     except HTTPException:
         raise
     except Exception as e:
@@ -149,16 +303,146 @@ async def query_coach(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred"
         )
+    finally:
+        response.headers["Server-Timing"] = server_timing(timings, time.time() - start_time)
+        reset_request_timings(timings_token)
+
+
+@router.post("/query/stream", status_code=status.HTTP_200_OK)
+async def query_coach_stream(
+    request: QueryRequest,
+    retrieval_service: RetrievalService = Depends(get_retrieval_service),
+    generation_service: GenerationService = Depends(get_generation_service),
+    answer_cache: Optional[SemanticAnswerCache] = Depends(get_answer_cache)
+):
+    """Query the AI coach and stream the answer as server-sent events.
+
+    Retrieval runs before the response starts, so retrieval failures are
+    still reported as HTTP errors. The stream then contains:
+    - `metadata`: domains and the sources the answer is grounded in
+    - `token`: each generated text delta
+    - `citation`: each validated citation as soon as its line is complete
+    - `citations`: the final citation list with token usage and timing,
+      including the time spent in each pipeline stage
+    - `error`: generation failed mid-stream
+
+    The Server-Timing header can only cover the stages finished before the
+    stream starts (answer cache lookup and retrieval).
+
+    Args:
+        request: Query request with user question
+        retrieval_service: Injected retrieval service
+        generation_service: Injected generation service
+        answer_cache: Injected semantic answer cache (None when disabled)
+
+    Returns:
+        text/event-stream response
+
+    Raises:
+        HTTPException: If retrieval fails
+    """
+    start_time = time.time()
+    # Not reset here: the stream runs in this request's context after the
+    # endpoint returns, so generation stages land in the same breakdown
+    timings, _ = start_request_timings()
+    logger.info(f"Received streaming query: {request.query[:100]}...")
+
+    cached, query_embedding, corpus_version, query_tasks = await _lookup_cached_answer(
+        request.query, retrieval_service, answer_cache
+    )
+
+    if cached is not None:
+        async def replay_cached():
+            response = cached['response']
+            yield _sse("metadata", {'domains': response['domains'], 'sources': [], 'cached': True})
+            yield _sse("token", {'text': response['response']})
+            yield _sse("citations", {
+                'citations': response['citations'],
+                'response_time_ms': int((time.time() - start_time) * 1000),
+                'token_usage': 0,
+                'cost_usd': 0.0,
+                'cached': True
+            })
+
+        return StreamingResponse(replay_cached(), media_type="text/event-stream", headers={
+            **SSE_HEADERS, "Server-Timing": server_timing(timings, time.time() - start_time)
+        })
+
+    retrieval_result = await retrieval_service.aretrieve(
+        request.query, final_k=7, query_tasks=query_tasks
+    )
+
+    if 'error' in retrieval_result:
+        logger.error(f"Retrieval failed: {retrieval_result['error']}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve relevant content"
+        )
+
+    chunks = retrieval_result['chunks']
+    domains = _domains(retrieval_result['classification'])
+
+    async def events():
+        yield _sse("metadata", {
+            'domains': domains,
+            'sources': [_source(c) for c in chunks],
+            'cached': False
+        })
+
+        async for event in generation_service.astream(request.query, chunks):
+            if event['type'] == 'token':
+                yield _sse("token", {'text': event['text']})
+            elif event['type'] == 'citation':
+                yield _sse("citation", event['citation'])
+            elif event['type'] == 'error':
+                yield _sse("error", {'detail': "Failed to generate response"})
+                return
+            elif event['type'] == 'done':
+                citations = [Citation(**c).model_dump() for c in event['citations']]
+                response_time_ms = int((time.time() - start_time) * 1000)
+                yield _sse("citations", {
+                    'citations': citations,
+                    'response_time_ms': response_time_ms,
+                    'token_usage': event['token_usage'],
+                    'cost_usd': event['cost_usd'],
+                    'cached': False,
+                    'stages_ms': {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+                })
+
+                if query_embedding is not None and chunks:
+                    answer_cache.store(query_embedding, domains, corpus_version, QueryResponse(
+                        response=event['response'],
+                        citations=citations,
+                        domains=domains,
+                        response_time_ms=response_time_ms,
+                        token_usage=event['token_usage'],
+                        cost_usd=event['cost_usd']
+                    ).model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        **SSE_HEADERS, "Server-Timing": server_timing(timings, time.time() - start_time)
+    })
 
 
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def health_check():
     """Health check endpoint for coach service."""
+    caches = {}
+    classifier = {}
+    if _retrieval_service is not None:
+        caches["embedding"] = _retrieval_service.embedding_cache.stats()
+        caches["classification"] = _retrieval_service.intent_router.cache.stats()
+        classifier = _retrieval_service.intent_router.get_classifier_stats()
+    if _answer_cache is not None:
+        caches["answer"] = _answer_cache.stats()
+
     return {
         "status": "healthy",
         "service": "coach",
         "dependencies": {
             "database": "ok",
             "openai": "ok"
-        }
+        },
+        "caches": caches,
+        "classifier": classifier
     }
@@ -0,0 +1,23 @@
+"""Prometheus metrics endpoint."""
+from fastapi import APIRouter, HTTPException, Response
+
+from app.services.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose pipeline stage, token and cache metrics for Prometheus.
+
+    Returns:
+        Prometheus text exposition format
+
+    Raises:
+        HTTPException: 503 if prometheus_client is not installed
+    """
+    rendered = render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=503, detail="Metrics unavailable: prometheus_client is not installed")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,158 @@
+"""
+Semantic answer cache for the AI coach.
+
+Stores final coach responses keyed by their query embedding. A new query whose
+embedding is within a cosine-similarity threshold of a cached one gets the
+cached answer without retrieval or GPT-4o generation. Entries are tied to the
+corpus version and dropped as soon as the embeddings table is reloaded.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """Fixed-capacity nearest-neighbour cache of coach responses."""
+
+    def __init__(
+        self,
+        threshold: float = 0.97,
+        max_entries: int = 512,
+        ttl_seconds: int = 86400,
+        dimension: int = 3072
+    ):
+        """Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            max_entries: Maximum cached answers (least recently used is evicted)
+            ttl_seconds: Lifetime of a cached answer
+            dimension: Embedding dimension
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Unit-normalized embeddings, one row per slot; cosine = dot product
+        self._vectors = np.zeros((max_entries, dimension), dtype=np.float32)
+        self._entries: List[Optional[Dict]] = [None] * max_entries
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._corpus_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
+
+    def _check_version(self, corpus_version: int) -> None:
+        """Drop every entry when the corpus version changes (lock held)."""
+        if self._corpus_version != corpus_version:
+            if self._corpus_version is not None:
+                self.invalidations += 1
+                logger.info(
+                    f"Corpus version changed {self._corpus_version} -> {corpus_version}, "
+                    "clearing answer cache"
+                )
+            self._entries = [None] * self.max_entries
+            self._last_used[:] = 0
+            self._vectors[:] = 0
+            self._corpus_version = corpus_version
+
+    def lookup(self, query_embedding, corpus_version: int) -> Optional[Dict]:
+        """Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query_embedding: Embedding of the incoming query
+            corpus_version: Current corpus version
+
+        Returns:
+            Cached entry (response, domains, similarity) or None
+        """
+        vector = self._normalize(query_embedding)
+        if vector is None:
+            return None
+
+        with self._lock:
+            self._check_version(corpus_version)
+            now = time.monotonic()
+
+            scores = self._vectors @ vector
+            best = int(np.argmax(scores))
+            entry = self._entries[best]
+
+            if entry is None or scores[best] < self.threshold or now > entry['expires_at']:
+                self.misses += 1
+                return None
+
+            self._last_used[best] = now
+            self.hits += 1
+            return {
+                'response': entry['response'],
+                'domains': entry['domains'],
+                'similarity': float(scores[best])
+            }
+
+    def store(self, query_embedding, domains: List[str], corpus_version: int, response: Dict) -> None:
+        """Cache a final response.
+
+        Args:
+            query_embedding: Embedding of the answered query
+            domains: Classified domains of the query
+            corpus_version: Corpus version the answer was generated against
+            response: Serialized QueryResponse
+        """
+        vector = self._normalize(query_embedding)
+        if vector is None:
+            return
+
+        with self._lock:
+            self._check_version(corpus_version)
+            # Reuse an empty slot, otherwise evict the least recently used
+            slot = int(np.argmin(self._last_used))
+            now = time.monotonic()
+            self._vectors[slot] = vector
+            self._last_used[slot] = now
+            self._entries[slot] = {
+                'response': response,
+                'domains': list(domains),
+                'expires_at': now + self.ttl_seconds
+            }
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._last_used[:] = 0
+            self._vectors[:] = 0
+        logger.info("Answer cache cleared")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and occupancy.
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': sum(1 for e in self._entries if e is not None),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'corpus_version': self._corpus_version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
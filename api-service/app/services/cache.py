@@ -0,0 +1,278 @@
+"""
+Bounded in-process cache with an optional shared tier.
+
+LRUCache is a thread-safe LRU with per-entry TTL, periodic sweeping of expired
+entries and hit/miss/eviction counters. A CacheBackend (e.g. the
+Postgres-backed cache_entries table) can be attached so entries are shared
+across uvicorn workers and survive restarts.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(bytes(data).decode("utf-8"))
+
+
+class CacheBackend:
+    """Shared cache tier interface."""
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for key, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        """Store a value for ttl_seconds."""
+        raise NotImplementedError
+
+
+class PostgresCacheBackend(CacheBackend):
+    """Shared cache tier stored in the cache_entries table.
+
+    Values are serialized to bytes (JSON by default). Failures are logged and
+    treated as misses: the shared tier must never break the caller.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        namespace: str,
+        serializer: Callable[[Any], bytes] = _json_dumps,
+        deserializer: Callable[[bytes], Any] = _json_loads
+    ):
+        """Initialize the backend.
+
+        Args:
+            engine: Database engine
+            namespace: Key namespace, so services can share the table
+            serializer: Converts a value to bytes
+            deserializer: Converts bytes back to a value
+        """
+        self.engine = engine
+        self.namespace = namespace
+        self.serializer = serializer
+        self.deserializer = deserializer
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with self.engine.connect() as conn:
+                row = conn.execute(text("""
+                    SELECT value FROM cache_entries
+                    WHERE namespace = :namespace AND cache_key = :key AND expires_at > NOW()
+                """), {'namespace': self.namespace, 'key': key}).first()
+            return None if row is None else self.deserializer(row[0])
+        except Exception as e:
+            logger.warning(f"Shared cache lookup failed ({self.namespace}): {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl_seconds: int) -> None:
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("""
+                    INSERT INTO cache_entries (namespace, cache_key, value, expires_at)
+                    VALUES (:namespace, :key, :value, NOW() + make_interval(secs => :ttl))
+                    ON CONFLICT (namespace, cache_key) DO UPDATE
+                    SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+                """), {
+                    'namespace': self.namespace,
+                    'key': key,
+                    'value': self.serializer(value),
+                    'ttl': ttl_seconds
+                })
+        except Exception as e:
+            logger.warning(f"Shared cache write failed ({self.namespace}): {e}")
+
+
+def purge_expired_entries(engine: Engine) -> int:
+    """Delete expired rows from the shared cache table.
+
+    Args:
+        engine: Database engine
+
+    Returns:
+        Number of rows deleted
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text("DELETE FROM cache_entries WHERE expires_at <= NOW()"))
+    return result.rowcount
+
+
+class LRUCache:
+    """Thread-safe LRU cache with TTL expiry and an optional shared backend."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: int = 3600,
+        backend: Optional[CacheBackend] = None,
+        sweep_interval_seconds: float = 60.0
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum entries held in process memory
+            ttl_seconds: Lifetime of an entry
+            backend: Shared tier consulted on local misses (None disables it)
+            sweep_interval_seconds: Minimum time between expired-entry sweeps
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Look up a key locally, then in the shared tier.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                self._put_local(key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        self._put_local(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value, self.ttl_seconds)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async variant of get; shared-tier I/O runs in a worker thread.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None on a miss
+        """
+        if self.backend is None or key in self:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Async variant of set; shared-tier I/O runs in a worker thread.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if self.backend is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def _put_local(self, key: str, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            if now - self._last_sweep >= self.sweep_interval_seconds:
+                self._sweep_locked(now)
+
+    def _sweep_locked(self, now: float) -> int:
+        expired = [k for k, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
+
+    def sweep(self) -> int:
+        """Remove all expired entries from process memory.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            return self._sweep_locked(time.monotonic())
+
+    def delete(self, key: str) -> None:
+        """Remove a key from process memory."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Clear process memory (the shared tier expires by TTL)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry[1]
+
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and the current hit rate.
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                'shared_tier': self.backend is not None
+            }
@@ -0,0 +1,176 @@
+"""
+Local embedding-centroid intent classifier.
+
+Scores a query embedding against per-domain centroids built from the labeled
+chunks in the embeddings table. Runs in NumPy in microseconds and lets
+IntentRouter skip the GPT-4o classification call when it is confident.
+Centroids are keyed on the corpus version and rebuilt after a reload.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+CORPUS_VERSION_SQL = text("SELECT version FROM corpus_version WHERE id = 1")
+
+CENTROIDS_SQL = text("""
+    SELECT primary_domain, AVG(embedding)::text AS centroid
+    FROM embeddings
+    WHERE primary_domain IS NOT NULL
+    GROUP BY 1
+""")
+
+
+class CentroidClassifier:
+    """Nearest-centroid domain classifier over query embeddings."""
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        temperature: float = 0.02,
+        secondary_margin: float = 0.02,
+        version_check_seconds: float = 60.0,
+        retry_seconds: float = 60.0
+    ):
+        """Initialize the classifier.
+
+        Args:
+            engine: Database engine used to build centroids from the embeddings table
+            temperature: Softmax temperature applied to cosine scores for confidence
+            secondary_margin: Max cosine gap to the top domain for a secondary domain
+            version_check_seconds: How often the corpus version is compared with
+                the one the centroids were built for
+            retry_seconds: Back-off after a failed or empty refresh
+        """
+        self.engine = engine
+        self.temperature = temperature
+        self.secondary_margin = secondary_margin
+        self.version_check_seconds = version_check_seconds
+        self.retry_seconds = retry_seconds
+        self.domains: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.corpus_version: Optional[int] = None
+        self._next_check = float('-inf')
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether centroids are loaded."""
+        return self.centroids is not None and len(self.domains) > 0
+
+    @property
+    def refresh_due(self) -> bool:
+        """Whether the next prediction checks the database (load or version check)."""
+        return self.engine is not None and time.monotonic() >= self._next_check
+
+    def fit(self, centroids: Dict[str, List[float]]) -> None:
+        """Set per-domain centroids directly.
+
+        Args:
+            centroids: Mapping of domain name to centroid vector
+        """
+        domains = sorted(centroids)
+        matrix = np.asarray([centroids[d] for d in domains], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        with self._lock:
+            self.domains = domains
+            self.centroids = matrix / norms
+        logger.info(f"Centroid classifier loaded {len(domains)} domains")
+
+    def refresh(self) -> None:
+        """Rebuild centroids from the labeled chunks in the embeddings table.
+
+        An empty table leaves the current centroids in place.
+        """
+        if self.engine is None:
+            raise RuntimeError("No database engine configured for centroid classifier")
+
+        with self.engine.connect() as conn:
+            version = conn.execute(CORPUS_VERSION_SQL).scalar()
+            rows = conn.execute(CENTROIDS_SQL).fetchall()
+
+        if not rows:
+            logger.warning("No labeled chunks to build domain centroids from")
+            return
+
+        # pgvector's text format '[1,2,3]' is valid JSON
+        self.fit({row[0]: json.loads(row[1]) for row in rows})
+        self.corpus_version = version
+
+    def _maybe_refresh(self) -> None:
+        """Load centroids if missing or built for an older corpus version.
+
+        The database is consulted at most every version_check_seconds, or
+        retry_seconds after a failed or empty refresh, and by one thread at a
+        time; the others keep using the current centroids.
+        """
+        if not self.refresh_due or not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            if not self.ready:
+                self.refresh()
+            else:
+                with self.engine.connect() as conn:
+                    version = conn.execute(CORPUS_VERSION_SQL).scalar()
+                if version != self.corpus_version:
+                    logger.info(f"Corpus version changed to {version}, rebuilding domain centroids")
+                    self.refresh()
+            retry = not self.ready
+        except Exception as e:
+            logger.warning(f"Could not load domain centroids: {e}")
+            retry = True
+        finally:
+            self._refresh_lock.release()
+        self._next_check = time.monotonic() + (self.retry_seconds if retry else self.version_check_seconds)
+
+    def predict(self, query_embedding) -> Optional[Dict]:
+        """Classify a query embedding.
+
+        Args:
+            query_embedding: Query vector
+
+        Returns:
+            Classification dictionary in the IntentRouter format, or None if
+            no centroids are available
+        """
+        self._maybe_refresh()
+        with self._lock:
+            domains, centroids = self.domains, self.centroids
+        if centroids is None or not domains:
+            return None
+
+        vector = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+
+        scores = centroids @ (vector / norm)
+        order = np.argsort(scores)[::-1]
+
+        # Softmax over sharpened cosine scores as a calibrated-ish confidence
+        weights = np.exp((scores - scores[order[0]]) / self.temperature)
+        confidence = float(weights[order[0]] / weights.sum())
+
+        primary = domains[order[0]]
+        secondary = [
+            domains[i] for i in order[1:3]
+            if scores[order[0]] - scores[i] <= self.secondary_margin
+        ]
+
+        return {
+            'primary_domain': primary,
+            'secondary_domains': secondary,
+            'needs_clarification': False,
+            'confidence': confidence,
+            'source': 'centroid'
+        }
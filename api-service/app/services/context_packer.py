@@ -0,0 +1,203 @@
+"""
+Token-budgeted context assembly for response generation.
+
+Packs retrieved chunks into the GPT-4o prompt within a fixed token budget:
+sources are ordered by similarity, the tail is trimmed or dropped once the
+budget runs out, and book/author headers are only spelled out the first time
+a book appears.
+"""
+
+import logging
+from typing import Dict, List
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+
+NO_SOURCES_CONTEXT = "No relevant source material was found for this query."
+
+# GPT-4o family tokenizer, used when tiktoken does not know the model name
+FALLBACK_ENCODING = "o200k_base"
+
+
+class ContextPacker:
+    """Packs retrieved chunks into a token budget."""
+
+    def __init__(
+        self,
+        model: str = "gpt-4o",
+        token_budget: int = 4000,
+        min_source_tokens: int = 100,
+        encoding=None
+    ):
+        """Initialize the packer.
+
+        Args:
+            model: Model whose tokenizer is used for counting
+            token_budget: Maximum tokens of source context per prompt
+            min_source_tokens: Smallest useful trimmed source; anything
+                shorter is dropped instead
+            encoding: Tokenizer with encode/decode (defaults to tiktoken's
+                encoding for the model, loaded on first use)
+        """
+        self.model = model
+        self.token_budget = token_budget
+        self.min_source_tokens = min_source_tokens
+        self._encoding = encoding
+
+    def _get_encoding(self):
+        """Load the model tokenizer once; False if it is unavailable."""
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                logger.warning(f"No tokenizer registered for {self.model}, using {FALLBACK_ENCODING}")
+                self._encoding = self._load_fallback_encoding()
+            except Exception as e:
+                logger.warning(f"Could not load tokenizer for {self.model}: {e}")
+                self._encoding = False
+        return self._encoding
+
+    @staticmethod
+    def _load_fallback_encoding():
+        """Load the GPT-4o family encoding by name; False if it is unavailable."""
+        try:
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
+        except Exception as e:
+            logger.warning(f"Could not load tokenizer {FALLBACK_ENCODING}: {e}")
+            return False
+
+    def encode(self, text: str) -> List[int]:
+        """Tokenize text (approximated as 4 characters per token without a tokenizer)."""
+        encoding = self._get_encoding()
+        if not encoding:
+            return list(range((len(text) + 3) // 4))
+        return encoding.encode(text)
+
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text."""
+        return len(self.encode(text))
+
+    def _truncate(self, text: str, tokens: List[int], max_tokens: int) -> str:
+        """Cut text to max_tokens, preferring to end on a sentence boundary."""
+        encoding = self._get_encoding()
+        if encoding:
+            truncated = encoding.decode(tokens[:max_tokens])
+        else:
+            truncated = text[:max_tokens * 4]
+
+        sentence_end = truncated.rfind(". ")
+        if sentence_end > len(truncated) // 2:
+            truncated = truncated[:sentence_end + 1]
+        return truncated.rstrip() + " [...]"
+
+    @staticmethod
+    def _full_header(index: int, metadata: Dict) -> str:
+        """Original verbose per-source header (the baseline for savings)."""
+        return f"""
+Source {index}:
+Book: {metadata.get('book_title', 'Unknown')}
+Authors: {', '.join(metadata.get('authors', ['Unknown']))}
+Chapter {metadata.get('chapter_number', '?')}: {metadata.get('chapter_title', 'Unknown')}
+Pages: {metadata.get('page_start', '?')}-{metadata.get('page_end', '?')}
+
+Content:
+"""
+
+    @staticmethod
+    def _compact_header(index: int, metadata: Dict, seen_books: set) -> str:
+        """Per-source header that only names the authors on a book's first use."""
+        book = metadata.get('book_title', 'Unknown')
+        if book in seen_books:
+            byline = f"{book} (authors as above)"
+        else:
+            byline = f"{book} by {', '.join(metadata.get('authors', ['Unknown']))}"
+        return (
+            f"Source {index}: {byline}\n"
+            f"Chapter {metadata.get('chapter_number', '?')}: {metadata.get('chapter_title', 'Unknown')}, "
+            f"pp. {metadata.get('page_start', '?')}-{metadata.get('page_end', '?')}\n"
+        )
+
+    def pack(self, chunks: List[Dict]) -> Dict:
+        """Assemble the source context for a prompt.
+
+        Args:
+            chunks: Retrieved chunks with content, metadata and similarity
+
+        Returns:
+            Dictionary with the context string, its token count, the tokens
+            saved versus the unbudgeted format, the indices of the chunks that
+            made it into the context (in prompt order) and included/trimmed/
+            dropped source counts
+        """
+        if not chunks:
+            return {
+                'context': NO_SOURCES_CONTEXT,
+                'tokens': self.count_tokens(NO_SOURCES_CONTEXT),
+                'tokens_saved': 0,
+                'included': [],
+                'sources_included': 0,
+                'sources_trimmed': 0,
+                'sources_dropped': 0
+            }
+
+        ordered = sorted(range(len(chunks)), key=lambda i: chunks[i].get('similarity', 0.0), reverse=True)
+        separator_tokens = self.count_tokens("\n---\n")
+
+        parts = []
+        included = []
+        seen_books = set()
+        remaining = self.token_budget
+        baseline_tokens = 0
+        trimmed = 0
+        dropped = 0
+
+        for position, chunk_index in enumerate(ordered):
+            chunk = chunks[chunk_index]
+            metadata = chunk['metadata']
+            content = chunk['content']
+            content_tokens = self.encode(content)
+            baseline_tokens += (
+                self.count_tokens(self._full_header(position + 1, metadata))
+                + len(content_tokens) + separator_tokens
+            )
+
+            if dropped:
+                # Once a source is dropped, the rest of the tail goes too
+                dropped += 1
+                continue
+
+            index = len(parts) + 1
+            header = self._compact_header(index, metadata, seen_books)
+            available = remaining - self.count_tokens(header) - separator_tokens
+
+            if len(content_tokens) <= available:
+                body = content
+                used = len(content_tokens)
+            elif available >= self.min_source_tokens or not parts:
+                # Always keep something from the best source
+                body = self._truncate(content, content_tokens, max(available, self.min_source_tokens))
+                used = self.count_tokens(body)
+                trimmed += 1
+            else:
+                dropped += 1
+                continue
+
+            parts.append(f"{header}{body}\n---\n")
+            included.append(chunk_index)
+            seen_books.add(metadata.get('book_title', 'Unknown'))
+            remaining = available - used
+
+        context = "\n".join(parts)
+        tokens = self.count_tokens(context)
+
+        return {
+            'context': context,
+            'tokens': tokens,
+            'tokens_saved': max(baseline_tokens - tokens, 0),
+            'included': included,
+            'sources_included': len(parts),
+            'sources_trimmed': trimmed,
+            'sources_dropped': dropped
+        }
@@ -0,0 +1,105 @@
+"""
+Deduplication and diversity reranking for retrieved chunks.
+
+PageIntervalIndex answers "does this page range overlap one already
+selected from the same book?" in O(log n) per lookup, and mmr_select
+picks chunks by maximal marginal relevance over their embeddings.
+"""
+
+import bisect
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class PageIntervalIndex:
+    """Per-book index of selected, mutually non-overlapping page ranges."""
+
+    def __init__(self):
+        # book_id -> (sorted starts, ends aligned with starts)
+        self._books: Dict[Optional[str], Tuple[List[int], List[int]]] = {}
+
+    def overlaps(self, book_id: Optional[str], page_start: Optional[int], page_end: Optional[int]) -> bool:
+        """Whether a page range overlaps any range already added for the book.
+
+        Ranges without page numbers never overlap.
+        """
+        if page_start is None or page_end is None or book_id not in self._books:
+            return False
+
+        starts, ends = self._books[book_id]
+        # Stored ranges are disjoint, so only the last one starting at or
+        # before page_end can overlap
+        i = bisect.bisect_right(starts, page_end) - 1
+        return i >= 0 and ends[i] >= page_start
+
+    def add(self, book_id: Optional[str], page_start: Optional[int], page_end: Optional[int]) -> None:
+        """Record a selected page range."""
+        if page_start is None or page_end is None:
+            return
+        starts, ends = self._books.setdefault(book_id, ([], []))
+        i = bisect.bisect_right(starts, page_start)
+        starts.insert(i, page_start)
+        ends.insert(i, page_end)
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    embeddings: Optional[np.ndarray],
+    k: int,
+    lambda_: float = 0.7,
+    allowed: Optional[Callable[[int], bool]] = None,
+    selected: Optional[List[int]] = None
+) -> List[int]:
+    """Select candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    lambda * relevance - (1 - lambda) * max cosine similarity to the
+    already selected candidates.
+
+    Args:
+        relevance: Query similarity per candidate
+        embeddings: Candidate embeddings (n x d); None disables the diversity term
+        k: Total number of candidates to have selected
+        lambda_: Relevance/diversity trade-off (1.0 = pure relevance)
+        allowed: Predicate called on the best remaining candidate; rejected
+            candidates are skipped for the rest of the selection
+        selected: Indices already selected (kept, and counted towards k)
+
+    Returns:
+        Selected indices in selection order
+    """
+    n = len(relevance)
+    selected = list(selected or [])
+    if n == 0:
+        return selected
+
+    redundancy = np.zeros(n, dtype=np.float32)
+    gram = None
+    if embeddings is not None:
+        unit = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(unit, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        unit = unit / norms
+        gram = unit @ unit.T
+        if selected:
+            redundancy = gram[selected].max(axis=0)
+
+    available = np.ones(n, dtype=bool)
+    available[selected] = False
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    while len(selected) < k and available.any():
+        scores = lambda_ * relevance - (1 - lambda_) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        available[best] = False
+
+        if allowed is not None and not allowed(best):
+            continue
+
+        selected.append(best)
+        if gram is not None:
+            redundancy = np.maximum(redundancy, gram[best])
+
+    return selected
@@ -0,0 +1,120 @@
+"""
+Query embedding cache for the retrieval service.
+
+Two tiers sit in front of the OpenAI embeddings API:
+- an in-process LRU with size and TTL eviction (per uvicorn worker)
+- an optional shared Postgres tier (cache_entries, namespace
+  'query_embedding') so all workers and restarts benefit from embeddings
+  computed elsewhere
+"""
+
+import hashlib
+import logging
+import re
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy.engine import Engine
+
+from app.services.cache import LRUCache, PostgresCacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text so trivially different phrasings share an entry.
+
+    Lowercases, collapses whitespace and strips trailing punctuation:
+    "What are the  four critical questions?" -> "what are the four critical questions"
+
+    Args:
+        query: Raw user query
+
+    Returns:
+        Normalized query text
+    """
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+
+
+def _to_bytes(embedding: np.ndarray) -> bytes:
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(bytes(data), dtype=np.float32)
+
+
+class EmbeddingCache:
+    """Bounded two-tier cache of query embeddings keyed by normalized text and model."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: int = 86400,
+        engine: Optional[Engine] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum embeddings held in process memory
+            ttl_seconds: Lifetime of an entry in both tiers
+            engine: Engine for the shared Postgres tier (None disables it)
+        """
+        backend = None
+        if engine is not None:
+            # Raw float32 bytes so reads and writes skip text conversion
+            backend = PostgresCacheBackend(
+                engine,
+                namespace="query_embedding",
+                serializer=_to_bytes,
+                deserializer=_from_bytes
+            )
+        self.cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds, backend=backend)
+
+    @staticmethod
+    def make_key(query: str, model: str) -> str:
+        """Build the cache key for a query/model pair."""
+        return hashlib.sha256(f"{model}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, model: str) -> Optional[np.ndarray]:
+        """Look up an embedding, checking memory first, then the shared tier.
+
+        Args:
+            query: User query text
+            model: Embedding model name
+
+        Returns:
+            Cached embedding (float32) or None on a miss
+        """
+        return self.cache.get(self.make_key(query, model))
+
+    def set(self, query: str, model: str, embedding) -> None:
+        """Store an embedding in both tiers.
+
+        Args:
+            query: User query text
+            model: Embedding model name
+            embedding: Embedding vector
+        """
+        self.cache.set(self.make_key(query, model), np.asarray(embedding, dtype=np.float32))
+
+    async def aget(self, query: str, model: str) -> Optional[np.ndarray]:
+        """Async variant of get (shared-tier lookups don't block the event loop)."""
+        return await self.cache.aget(self.make_key(query, model))
+
+    async def aset(self, query: str, model: str, embedding) -> None:
+        """Async variant of set (shared-tier writes don't block the event loop)."""
+        await self.cache.aset(self.make_key(query, model), np.asarray(embedding, dtype=np.float32))
+
+    def clear(self) -> None:
+        """Clear the in-process tier (the shared tier expires by TTL)."""
+        self.cache.clear()
+        logger.info("Embedding cache cleared")
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and the current hit rate.
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        return self.cache.stats()
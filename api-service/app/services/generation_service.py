@@ -5,28 +5,46 @@ Generates AI responses with transparent citations using GPT-4o.
 """
 
 import logging
-from typing import Dict, List, Optional
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import re
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import os
 
+from app.services.context_packer import ContextPacker
+from app.services.metrics import observe_stage, record_tokens, stage, timed
+from app.services.tracing import set_attributes, traced, usage_attributes
+
 logger = logging.getLogger(__name__)
 
 
 class GenerationService:
     """Generates AI coach responses with citations."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        context_token_budget: int = 4000,
+        min_source_tokens: int = 100
+    ):
         """Initialize the generation service.
 
         Args:
             api_key: OpenAI API key
+            context_token_budget: Maximum tokens of source context per prompt
+            min_source_tokens: Smallest trimmed source worth including
         """
         self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.async_client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
         self.model = "gpt-4o"
         self.temperature = 0.3
         self.max_tokens = 1000
+        self.context_packer = ContextPacker(
+            model=self.model,
+            token_budget=context_token_budget,
+            min_source_tokens=min_source_tokens
+        )
 
     def _get_system_prompt(self) -> str:
         """Get the system prompt for response generation.
@@ -60,36 +78,15 @@ Tone: Professional, supportive, evidence-based"""
     def _format_context(self, chunks: List[Dict]) -> str:
         """Format retrieved chunks into context for the LLM.
 
+        Sources are packed into the configured token budget (see ContextPacker).
+
         Args:
             chunks: Retrieved chunks from Story 2.6
 
         Returns:
             Formatted context string
         """
-        if not chunks:
-            return "No relevant source material was found for this query."
-
-        context_parts = []
-        for i, chunk in enumerate(chunks, 1):
-            metadata = chunk['metadata']
-            content = chunk['content']
-
-            # Format chunk with metadata
-            chunk_text = f"""
-Source {i}:
-Book: {metadata.get('book_title', 'Unknown')}
-Authors: {', '.join(metadata.get('authors', ['Unknown']))}
-Chapter {metadata.get('chapter_number', '?')}: {metadata.get('chapter_title', 'Unknown')}
-Pages: {metadata.get('page_start', '?')}-{metadata.get('page_end', '?')}
-
-Content:
-{content}
-
----
-"""
-            context_parts.append(chunk_text)
-
-        return "\n".join(context_parts)
+        return self.context_packer.pack(chunks)['context']
 
     def _extract_citations(self, response_text: str, chunks: List[Dict]) -> List[Dict]:
         """Extract and validate citations from the response.
@@ -143,6 +140,7 @@ Content:
 
         return citations
 
+    @traced("rag.generate")
     def generate(self, query: str, retrieved_chunks: List[Dict]) -> Dict:
         """Generate a response with citations.
 
@@ -155,22 +153,169 @@ Content:
         """
         logger.info(f"Generating response for query: {query[:100]}...")
 
+        # Check if we have any sources
+        if not retrieved_chunks:
+            return self._no_sources_result(query)
+
         try:
-            # Format context from retrieved chunks
-            context = self._format_context(retrieved_chunks)
-
-            # Check if we have any sources
-            if not retrieved_chunks:
-                return {
-                    'query': query,
-                    'response': "I don't have specific information on this in the Solution Tree books I have access to. Could you rephrase your question or ask about a different aspect of Professional Learning Communities?",
-                    'citations': [],
-                    'token_usage': 0,
-                    'cost_usd': 0.0
-                }
-
-            # Build prompt
-            user_prompt = f"""Based on the provided sources, answer this question from a PLC educator:
+            # Call GPT-4o
+            kwargs, packing = self._build_request(query, retrieved_chunks)
+            with stage("generation"):
+                response = self.client.chat.completions.create(**kwargs)
+            return self._build_result(query, response, packing)
+
+        except Exception as e:
+            logger.error(f"Response generation failed: {e}")
+            return self._error_result(query, e)
+
+    @traced("rag.generate")
+    async def agenerate(self, query: str, retrieved_chunks: List[Dict]) -> Dict:
+        """Async variant of generate using AsyncOpenAI.
+
+        Args:
+            query: User query
+            retrieved_chunks: Retrieved chunks from Story 2.6
+
+        Returns:
+            Dictionary with response, citations, and metadata
+        """
+        logger.info(f"Generating response for query: {query[:100]}...")
+
+        if not retrieved_chunks:
+            return self._no_sources_result(query)
+
+        try:
+            kwargs, packing = self._build_request(query, retrieved_chunks)
+            with stage("generation"):
+                response = await self.async_client.chat.completions.create(**kwargs)
+            return self._build_result(query, response, packing)
+
+        except Exception as e:
+            logger.error(f"Response generation failed: {e}")
+            return self._error_result(query, e)
+
+    async def astream(self, query: str, retrieved_chunks: List[Dict]) -> AsyncIterator[Dict]:
+        """Stream a response with citations as it is generated.
+
+        Yields events in order:
+        - {'type': 'token', 'text': ...} for each content delta
+        - {'type': 'citation', 'citation': {...}} as soon as a validated
+          citation line is complete
+        - {'type': 'done', 'response', 'citations', 'token_usage', 'cost_usd'}
+          once generation finishes, or {'type': 'error', 'error'} on failure
+
+        Args:
+            query: User query
+            retrieved_chunks: Retrieved chunks from Story 2.6
+
+        Yields:
+            Event dictionaries
+        """
+        logger.info(f"Streaming response for query: {query[:100]}...")
+
+        if not retrieved_chunks:
+            result = self._no_sources_result(query)
+            yield {'type': 'token', 'text': result['response']}
+            yield {'type': 'done', **result}
+            return
+
+        try:
+            kwargs, packing = self._build_request(query, retrieved_chunks)
+            sources = packing['sources']
+            start = time.perf_counter()
+            stream = await self.async_client.chat.completions.create(**kwargs, stream=True)
+
+            parts: List[str] = []
+            pending_line = ""
+            seen = set()
+            # The final list is exactly what was streamed, in order
+            citations: List[Dict] = []
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                yield {'type': 'token', 'text': delta}
+
+                # Citations are one per line; validate each line once complete
+                pending_line += delta
+                *complete, pending_line = pending_line.split("\n")
+                for line in complete:
+                    for citation in self._new_citations(line, sources, seen):
+                        citations.append(citation)
+                        yield {'type': 'citation', 'citation': citation}
+
+            # The last line (usually a citation) rarely ends in a newline
+            for citation in self._new_citations(pending_line, sources, seen):
+                citations.append(citation)
+                yield {'type': 'citation', 'citation': citation}
+
+            observe_stage("generation", time.perf_counter() - start)
+            response_text = "".join(parts)
+
+            # Streamed completions carry no usage block; count tokens locally
+            input_tokens = sum(self.context_packer.count_tokens(m['content']) for m in kwargs['messages'])
+            output_tokens = self.context_packer.count_tokens(response_text)
+            record_tokens(input_tokens, output_tokens)
+            total_cost = self._estimate_cost(input_tokens, output_tokens)
+
+            logger.info(f"Streamed response with {len(citations)} citations, "
+                        f"~{input_tokens + output_tokens} tokens, ${total_cost:.4f}")
+
+            yield {
+                'type': 'done',
+                'query': query,
+                'response': response_text,
+                'citations': citations,
+                'token_usage': input_tokens + output_tokens,
+                'cost_usd': total_cost,
+                'num_sources_used': packing['sources_included'],
+                'context_tokens': packing['tokens'],
+                'context_tokens_saved': packing['tokens_saved']
+            }
+
+        except Exception as e:
+            logger.error(f"Response streaming failed: {e}")
+            yield {'type': 'error', 'error': str(e)}
+
+    def _new_citations(self, line: str, chunks: List[Dict], seen: set) -> List[Dict]:
+        """Validated citations on a line that were not yet seen (marks them seen)."""
+        citations = []
+        for citation in self._extract_citations(line, chunks):
+            key = (citation['book_title'], citation['chapter'], citation['pages'])
+            if key not in seen:
+                seen.add(key)
+                citations.append(citation)
+        return citations
+
+    @timed("prompt_build")
+    def _build_request(self, query: str, retrieved_chunks: List[Dict]) -> Tuple[Dict, Dict]:
+        """Build the GPT-4o chat completion request.
+
+        Args:
+            query: User query
+            retrieved_chunks: Retrieved chunks from Story 2.6
+
+        Returns:
+            Keyword arguments for chat.completions.create, and the context
+            packing report (tokens used and saved, sources trimmed/dropped)
+            with the packed chunks under 'sources'
+        """
+        # Pack retrieved chunks into the context token budget; citations are
+        # only valid for the sources the model actually sees
+        packing = self.context_packer.pack(retrieved_chunks)
+        packing['sources'] = [retrieved_chunks[i] for i in packing['included']]
+        context = packing['context']
+        logger.info(
+            f"Packed {packing['sources_included']}/{len(retrieved_chunks)} sources into "
+            f"{packing['tokens']} context tokens (saved {packing['tokens_saved']}, "
+            f"trimmed {packing['sources_trimmed']}, dropped {packing['sources_dropped']})"
+        )
+
+        # Build prompt
+        user_prompt = f"""Based on the provided sources, answer this question from a PLC educator:
 
 Question: {query}
 
@@ -183,48 +328,77 @@ Remember to:
 3. Add a "📚 Sources:" section with properly formatted citations
 4. Only cite sources that were actually provided above"""
 
-            # Call GPT-4o
-            response = self.client.chat.completions.create(
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-
-            response_text = response.choices[0].message.content
-            token_usage = response.usage.total_tokens
-
-            # Estimate cost (GPT-4o pricing)
-            input_tokens = response.usage.prompt_tokens
-            output_tokens = response.usage.completion_tokens
-            input_cost = (input_tokens / 1_000_000) * 5.00  # $5/1M input tokens
-            output_cost = (output_tokens / 1_000_000) * 15.00  # $15/1M output tokens
-            total_cost = input_cost + output_cost
-
-            # Extract and validate citations
-            citations = self._extract_citations(response_text, retrieved_chunks)
-
-            logger.info(f"Generated response with {len(citations)} citations, {token_usage} tokens, ${total_cost:.4f}")
-
-            return {
-                'query': query,
-                'response': response_text,
-                'citations': citations,
-                'token_usage': token_usage,
-                'cost_usd': total_cost,
-                'num_sources_used': len(retrieved_chunks)
-            }
-
-        except Exception as e:
-            logger.error(f"Response generation failed: {e}")
-            return {
-                'query': query,
-                'response': "I encountered an error generating a response. Please try again.",
-                'citations': [],
-                'token_usage': 0,
-                'cost_usd': 0.0,
-                'error': str(e)
-            }
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "messages": [
+                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "user", "content": user_prompt}
+            ]
+        }, packing
+
+    @staticmethod
+    def _estimate_cost(input_tokens: int, output_tokens: int) -> float:
+        """Estimate cost in USD (GPT-4o pricing)."""
+        input_cost = (input_tokens / 1_000_000) * 5.00  # $5/1M input tokens
+        output_cost = (output_tokens / 1_000_000) * 15.00  # $15/1M output tokens
+        return input_cost + output_cost
+
+    def _build_result(self, query: str, response, packing: Dict) -> Dict:
+        """Extract text, usage, cost and citations from a completion."""
+        response_text = response.choices[0].message.content
+        token_usage = response.usage.total_tokens
+        total_cost = self._estimate_cost(
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens
+        )
+
+        record_tokens(response.usage.prompt_tokens, response.usage.completion_tokens)
+        set_attributes(**usage_attributes(response.usage))
+
+        # Extract and validate citations
+        with stage("citation_parse"):
+            citations = self._extract_citations(response_text, packing['sources'])
+
+        logger.info(f"Generated response with {len(citations)} citations, {token_usage} tokens, ${total_cost:.4f}")
+        set_attributes(**{
+            "gen_ai.request.model": self.model,
+            "rag.sources_used": packing['sources_included'],
+            "rag.context_tokens": packing['tokens'],
+            "rag.citations": len(citations)
+        })
+
+        return {
+            'query': query,
+            'response': response_text,
+            'citations': citations,
+            'token_usage': token_usage,
+            'cost_usd': total_cost,
+            'num_sources_used': packing['sources_included'],
+            'context_tokens': packing['tokens'],
+            'context_tokens_saved': packing['tokens_saved']
+        }
+
+    @staticmethod
+    def _no_sources_result(query: str) -> Dict:
+        """Result returned when retrieval found no sources."""
+        return {
+            'query': query,
+            'response': "I don't have specific information on this in the Solution Tree books I have access to. Could you rephrase your question or ask about a different aspect of Professional Learning Communities?",
+            'citations': [],
+            'token_usage': 0,
+            'cost_usd': 0.0
+        }
+
+    @staticmethod
+    def _error_result(query: str, error: Exception) -> Dict:
+        """Result returned when generation fails."""
+        return {
+            'query': query,
+            'response': "I encountered an error generating a response. Please try again.",
+            'citations': [],
+            'token_usage': 0,
+            'cost_usd': 0.0,
+            'error': str(error)
+        }
@@ -4,14 +4,22 @@ Story 2.5: Intent Classification & Domain Routing
 Classifies user queries into knowledge domains using GPT-4o function calling.
 """
 
+import asyncio
 import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
 import json
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 import os
 
+from app.services.cache import CacheBackend, LRUCache
+from app.services.centroid_classifier import CentroidClassifier
+from app.services.metrics import record_cache, timed
+from app.services.tracing import set_attributes, span, usage_attributes
+
 logger = logging.getLogger(__name__)
 
 
@@ -68,16 +76,41 @@ CLASSIFICATION_FUNCTION = {
 class IntentRouter:
     """Routes queries to appropriate knowledge domains using GPT-4o."""
 
-    def __init__(self, api_key: Optional[str] = None, cache_ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache_ttl_seconds: int = 3600,
+        cache_max_entries: int = 2048,
+        cache_backend: Optional[CacheBackend] = None,
+        centroid_classifier: Optional[CentroidClassifier] = None,
+        local_confidence_threshold: float = 0.6,
+        shadow_rate: float = 0.0
+    ):
         """Initialize the intent router.
 
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             cache_ttl_seconds: Time to live for cached classifications
+            cache_max_entries: Maximum classifications held in process memory
+            cache_backend: Shared cache tier (e.g. PostgresCacheBackend) for cross-worker hits
+            centroid_classifier: Local embedding classifier tried before GPT-4o
+            local_confidence_threshold: Minimum local confidence to skip GPT-4o
+            shadow_rate: Fraction of confident local classifications also sent to
+                GPT-4o in the background to measure agreement
         """
         self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
-        self.cache: Dict[str, Dict] = {}
-        self.cache_ttl = timedelta(seconds=cache_ttl_seconds)
+        self.async_client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.cache = LRUCache(
+            max_entries=cache_max_entries,
+            ttl_seconds=cache_ttl_seconds,
+            backend=cache_backend
+        )
+        self.centroid_classifier = centroid_classifier
+        self.local_confidence_threshold = local_confidence_threshold
+        self.shadow_rate = shadow_rate
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="intent-shadow")
+        self._stats_lock = threading.Lock()
+        self.stats = {'local': 0, 'llm_fallback': 0, 'compared': 0, 'agreed': 0}
 
     def _get_system_prompt(self) -> str:
         """Get the system prompt for intent classification.
@@ -115,9 +148,105 @@ Guidelines:
 
 Be decisive - most questions should NOT need clarification unless truly vague."""
 
-    def classify(self, query: str) -> Dict:
+    @timed("classification")
+    def classify(self, query: str, query_embedding: Optional[List[float]] = None) -> Dict:
         """Classify a user query into knowledge domains.
 
+        When a centroid classifier is configured and the query embedding is
+        available, the local prediction is used if it is confident enough;
+        otherwise the query falls back to GPT-4o.
+
+        Args:
+            query: User's question or query
+            query_embedding: Embedding of the query, enabling local classification
+
+        Returns:
+            Classification dictionary with domains and metadata
+        """
+        local = None
+        if self.centroid_classifier is not None and query_embedding is not None:
+            local = self.centroid_classifier.predict(query_embedding)
+
+        if self._accept_local(query, local):
+            return local
+
+        result = self._classify_with_llm(query)
+        self._record_fallback(local, result)
+        return result
+
+    @timed("classification")
+    async def aclassify(self, query: str, query_embedding: Optional[List[float]] = None) -> Dict:
+        """Async variant of classify using AsyncOpenAI for the GPT-4o fallback.
+
+        Args:
+            query: User's question or query
+            query_embedding: Embedding of the query, enabling local classification
+
+        Returns:
+            Classification dictionary with domains and metadata
+        """
+        local = None
+        if self.centroid_classifier is not None and query_embedding is not None:
+            if self.centroid_classifier.refresh_due:
+                # Loading centroids or checking the corpus version hits the database
+                local = await asyncio.to_thread(self.centroid_classifier.predict, query_embedding)
+            else:
+                local = self.centroid_classifier.predict(query_embedding)
+
+        if self._accept_local(query, local):
+            return local
+
+        result = await self._aclassify_with_llm(query)
+        self._record_fallback(local, result)
+        return result
+
+    def _accept_local(self, query: str, local: Optional[Dict]) -> bool:
+        """Whether a local prediction is confident enough to skip GPT-4o."""
+        if local is None or local['confidence'] < self.local_confidence_threshold:
+            return False
+
+        with self._stats_lock:
+            self.stats['local'] += 1
+        if self.shadow_rate and random.random() < self.shadow_rate:
+            self._shadow_executor.submit(self._shadow_compare, query, local)
+        logger.info(f"Classified query locally into domain: {local['primary_domain']}")
+        set_attributes(**{"rag.classifier": "local", "rag.primary_domain": local['primary_domain']})
+        return True
+
+    def _record_fallback(self, local: Optional[Dict], result: Dict) -> None:
+        """Count a GPT-4o fallback after an unconfident local prediction."""
+        if local is not None:
+            with self._stats_lock:
+                self.stats['llm_fallback'] += 1
+            self._record_agreement(local, result)
+
+    def _shadow_compare(self, query: str, local: Dict) -> None:
+        """Classify with GPT-4o in the background and record agreement."""
+        self._record_agreement(local, self._classify_with_llm(query))
+
+    def _record_agreement(self, local: Dict, llm: Dict) -> None:
+        """Track whether the local and GPT-4o primary domains agree."""
+        if 'error' in llm:
+            return
+        with self._stats_lock:
+            self.stats['compared'] += 1
+            if local['primary_domain'] == llm['primary_domain']:
+                self.stats['agreed'] += 1
+
+    def get_classifier_stats(self) -> Dict:
+        """Get local vs. GPT-4o classification counts and agreement rate.
+
+        Returns:
+            Dictionary of classifier statistics
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['agreement_rate'] = stats['agreed'] / stats['compared'] if stats['compared'] else None
+        return stats
+
+    def _classify_with_llm(self, query: str) -> Dict:
+        """Classify a query with GPT-4o function calling (cached).
+
         Args:
             query: User's question or query
 
@@ -126,58 +255,101 @@ Be decisive - most questions should NOT need clarification unless truly vague.""
         """
         # Check cache
         cache_key = query.lower().strip()
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if datetime.utcnow() < cached['expires_at']:
-                logger.info(f"Cache hit for query: {query[:50]}...")
-                return cached['result']
-            else:
-                # Expired, remove from cache
-                del self.cache[cache_key]
+        cached = self.cache.get(cache_key)
+        record_cache("classification", cached is not None)
+        set_attributes(**{"rag.classifier": "gpt-4o", "rag.cache_hit": cached is not None})
+        if cached is not None:
+            logger.info(f"Cache hit for query: {query[:50]}...")
+            return cached
 
         try:
             # Call GPT-4o with function calling
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                temperature=0.1,  # Low temperature for consistency
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": f"Classify this PLC query: {query}"}
-                ],
-                functions=[CLASSIFICATION_FUNCTION],
-                function_call={"name": "classify_query_domain"}
-            )
-
-            # Extract function call result
-            function_call = response.choices[0].message.function_call
-            result = json.loads(function_call.arguments)
-
-            # Ensure secondary_domains doesn't include primary
-            if result['primary_domain'] in result.get('secondary_domains', []):
-                result['secondary_domains'].remove(result['primary_domain'])
-
-            # Limit secondary domains to 2
-            result['secondary_domains'] = result.get('secondary_domains', [])[:2]
+            with span("openai.chat.completions", {"gen_ai.request.model": "gpt-4o"}):
+                response = self.client.chat.completions.create(**self._completion_kwargs(query))
+                set_attributes(**usage_attributes(response.usage))
+            result = self._parse_classification(response)
+            set_attributes(**{"rag.primary_domain": result['primary_domain']})
 
             # Cache the result
-            self.cache[cache_key] = {
-                'result': result,
-                'expires_at': datetime.utcnow() + self.cache_ttl
-            }
+            self.cache.set(cache_key, result)
 
             logger.info(f"Classified query into domain: {result['primary_domain']}")
             return result
 
         except Exception as e:
             logger.error(f"Intent classification failed: {e}")
-            # Return a default classification
-            return {
-                "primary_domain": "school_culture",  # Safe default
-                "secondary_domains": [],
-                "needs_clarification": False,
-                "confidence": 0.3,
-                "error": str(e)
-            }
+            return self._default_classification(e)
+
+    async def _aclassify_with_llm(self, query: str) -> Dict:
+        """Async variant of _classify_with_llm.
+
+        Args:
+            query: User's question or query
+
+        Returns:
+            Classification dictionary with domains and metadata
+        """
+        cache_key = query.lower().strip()
+        cached = await self.cache.aget(cache_key)
+        record_cache("classification", cached is not None)
+        set_attributes(**{"rag.classifier": "gpt-4o", "rag.cache_hit": cached is not None})
+        if cached is not None:
+            logger.info(f"Cache hit for query: {query[:50]}...")
+            return cached
+
+        try:
+            with span("openai.chat.completions", {"gen_ai.request.model": "gpt-4o"}):
+                response = await self.async_client.chat.completions.create(**self._completion_kwargs(query))
+                set_attributes(**usage_attributes(response.usage))
+            result = self._parse_classification(response)
+            set_attributes(**{"rag.primary_domain": result['primary_domain']})
+
+            await self.cache.aset(cache_key, result)
+
+            logger.info(f"Classified query into domain: {result['primary_domain']}")
+            return result
+
+        except Exception as e:
+            logger.error(f"Intent classification failed: {e}")
+            return self._default_classification(e)
+
+    def _completion_kwargs(self, query: str) -> Dict:
+        """Build the GPT-4o function-calling request for a query."""
+        return {
+            "model": "gpt-4o",
+            "temperature": 0.1,  # Low temperature for consistency
+            "messages": [
+                {"role": "system", "content": self._get_system_prompt()},
+                {"role": "user", "content": f"Classify this PLC query: {query}"}
+            ],
+            "functions": [CLASSIFICATION_FUNCTION],
+            "function_call": {"name": "classify_query_domain"}
+        }
+
+    @staticmethod
+    def _parse_classification(response) -> Dict:
+        """Extract and normalize the classification from a function-call response."""
+        function_call = response.choices[0].message.function_call
+        result = json.loads(function_call.arguments)
+
+        # Ensure secondary_domains doesn't include primary
+        if result['primary_domain'] in result.get('secondary_domains', []):
+            result['secondary_domains'].remove(result['primary_domain'])
+
+        # Limit secondary domains to 2
+        result['secondary_domains'] = result.get('secondary_domains', [])[:2]
+        return result
+
+    @staticmethod
+    def _default_classification(error: Exception) -> Dict:
+        """Safe default classification returned when GPT-4o fails."""
+        return {
+            "primary_domain": "school_culture",  # Safe default
+            "secondary_domains": [],
+            "needs_clarification": False,
+            "confidence": 0.3,
+            "error": str(error)
+        }
 
     def get_domain_description(self, domain: str) -> Optional[str]:
         """Get the description for a domain.
@@ -0,0 +1,28 @@
+"""
+Shortened (Matryoshka) embeddings.
+
+text-embedding-3 models are trained so that a prefix of the full vector is
+itself a usable embedding once re-normalized. Ingestion stores a 512-dim
+prefix next to the full 3072-dim vector; retrieval can search the small
+vectors first and rerank the best candidates on the full ones.
+"""
+
+import numpy as np
+
+# Must match the embeddings.embedding_short column (vector(512))
+PREFIX_DIMENSION = 512
+
+
+def truncate_normalize(embedding, dimension: int = PREFIX_DIMENSION) -> np.ndarray:
+    """Take the first `dimension` components and L2-normalize them.
+
+    Args:
+        embedding: Full embedding vector
+        dimension: Prefix length
+
+    Returns:
+        Unit-length float32 prefix vector
+    """
+    prefix = np.asarray(embedding, dtype=np.float32)[:dimension]
+    norm = np.linalg.norm(prefix)
+    return prefix / norm if norm > 0 else prefix
@@ -0,0 +1,178 @@
+"""
+Per-stage latency, token and cache metrics for the RAG pipeline.
+
+Stages (classification, embedding, vector_query, content_fetch, dedup,
+prompt_build, generation, citation_parse) are timed with the `timed`
+decorator or the `stage` context manager. Each stage:
+- is observed in a Prometheus histogram (exposed on /metrics),
+- is added to the current request's breakdown, which the coach endpoints
+  return as a Server-Timing header, and
+- runs in a "rag.<stage>" tracing span (see app.services.tracing)
+
+prometheus_client is optional: without it the per-request breakdown still
+works and /metrics reports that metrics are unavailable.
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.services.tracing import span
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+# Generation can take tens of seconds; lookups take milliseconds
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_DURATION = Histogram(
+        "plccoach_stage_duration_seconds",
+        "Duration of RAG pipeline stages",
+        ["stage"],
+        buckets=STAGE_BUCKETS
+    )
+    STAGE_ERRORS = Counter(
+        "plccoach_stage_errors",
+        "RAG pipeline stages that raised",
+        ["stage"]
+    )
+    TOKENS = Counter(
+        "plccoach_tokens",
+        "OpenAI tokens used by generation",
+        ["kind"]
+    )
+    CACHE_LOOKUPS = Counter(
+        "plccoach_cache_lookups",
+        "Cache lookups by cache and result",
+        ["cache", "result"]
+    )
+
+# stage -> seconds spent in it during the current request
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """Record a stage duration in the histogram and the request breakdown.
+
+    Args:
+        name: Stage name
+        seconds: Time spent in the stage
+    """
+    if PROMETHEUS_AVAILABLE:
+        STAGE_DURATION.labels(name).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time (and trace) the enclosed block as a pipeline stage.
+
+    Args:
+        name: Stage name
+    """
+    start = time.perf_counter()
+    try:
+        with span(f"rag.{name}"):
+            yield
+    except Exception:
+        if PROMETHEUS_AVAILABLE:
+            STAGE_ERRORS.labels(name).inc()
+        raise
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function (sync or async) as a stage.
+
+    Args:
+        name: Stage name
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int) -> None:
+    """Count generation tokens by kind."""
+    if PROMETHEUS_AVAILABLE:
+        TOKENS.labels("prompt").inc(prompt_tokens)
+        TOKENS.labels("completion").inc(completion_tokens)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    """Count cache lookups.
+
+    Args:
+        cache: Cache name (answer, embedding, classification, chunk)
+        hit: Whether the lookups hit
+        count: Number of lookups (e.g. chunks looked up at once)
+    """
+    if PROMETHEUS_AVAILABLE and count:
+        CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc(count)
+
+
+def start_request_timings():
+    """Start collecting a stage breakdown for the current request.
+
+    Tasks created while handling the request copy the context, so their
+    stages land in the same breakdown.
+
+    Returns:
+        (timings dict, token for reset_request_timings)
+    """
+    timings: Dict[str, float] = {}
+    return timings, _request_timings.set(timings)
+
+
+def reset_request_timings(token) -> None:
+    """Stop collecting the breakdown started by start_request_timings."""
+    _request_timings.reset(token)
+
+
+def server_timing(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    """Format a stage breakdown as a Server-Timing header value.
+
+    Args:
+        timings: stage -> seconds
+        total: Total request time in seconds (appended as "total")
+
+    Returns:
+        Header value, e.g. "embedding;dur=41.2, generation;dur=1830.4"
+    """
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def render_metrics() -> Optional[Tuple[bytes, str]]:
+    """Prometheus text exposition of all metrics.
+
+    Returns:
+        (body, content type), or None without prometheus_client
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -4,123 +4,942 @@ Story 2.6: Semantic Retrieval Service
 Retrieves relevant content chunks based on user queries using pgvector similarity search.
 """
 
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 import json
 
-from openai import OpenAI
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+from pgvector.psycopg import register_vector, register_vector_async
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 import os
 
+from app.services.cache import LRUCache, PostgresCacheBackend
+from app.services.centroid_classifier import CentroidClassifier
+from app.services.diversity import PageIntervalIndex, mmr_select
+from app.services.embedding_cache import EmbeddingCache
 from app.services.intent_router import IntentRouter
+from app.services.matryoshka import PREFIX_DIMENSION, truncate_normalize
+from app.services.metrics import record_cache, timed
+from app.services.tracing import db_span, instrument_engine, set_attributes, span, traced, usage_attributes
+from app.services.vector_store import VectorStore
 
 logger = logging.getLogger(__name__)
 
 
+# Retrieval statements use fixed SQL text so psycopg can prepare them once per
+# connection. The query vector is bound once (binary, via pgvector's adapter)
+# and referenced twice: ORDER BY matches the HNSW halfvec expression index,
+# while similarity is computed at full precision.
+#
+# Retrieval is two-phase. The similarity statements return only what
+# filtering and deduplication need: the typed id/book/page/domain columns,
+# the score and the 512-dim prefix embedding (binary results) for MMR
+# diversity reranking. Content and the display fields (title, authors,
+# chapter title, read from the metadata JSONB) are fetched afterwards for
+# the selected chunks only (CHUNK_CONTENT_SQL), so the candidates that
+# deduplication discards are never detoasted or sent over the network.
+CANDIDATE_COLUMNS = """
+        id,
+        book_id,
+        page_start,
+        page_end,
+        primary_domain,
+        secondary_domains"""
+
+CHUNK_COLUMNS = """
+        id,
+        content,
+        book_id,
+        metadata->>'book_title' AS book_title,
+        metadata->'authors' AS authors,
+        chapter_number,
+        metadata->>'chapter_title' AS chapter_title,
+        page_start,
+        page_end,
+        primary_domain,
+        secondary_domains"""
+
+# Matches chunks whose primary or secondary domains intersect the query's
+# domains (btree on primary_domain, GIN on secondary_domains); NULL = no filter
+DOMAIN_FILTER = """(
+        %(domains)b::text[] IS NULL
+        OR primary_domain = ANY(%(domains)b::text[])
+        OR secondary_domains && %(domains)b::text[]
+    )"""
+
+def _ann_sql(domain_filter: str) -> str:
+    """Approximate (HNSW) similarity statement with the given domain filter."""
+    return f"""
+    SELECT {CANDIDATE_COLUMNS},
+        1 - (embedding <=> %(embedding)b) AS similarity,
+        embedding_short
+    FROM embeddings
+    WHERE {domain_filter}
+    ORDER BY embedding::halfvec(3072) <=> %(embedding)b::halfvec(3072)
+    LIMIT %(limit)b
+"""
+
+
+# Hybrid search: the HNSW vector search and a full-text search over
+# content_tsv (GIN) run as CTEs of one statement, and their rankings are
+# fused with reciprocal rank fusion: score = sum(1 / (rrf_k + rank)).
+# Query terms are OR-ed so long natural-language questions still match
+# documents containing only the jargon ("RTI", "SMART goals").
+def _hybrid_sql(domain_filter: str) -> str:
+    """Hybrid (vector + full-text, RRF) statement with the given domain filter."""
+    return f"""
+    WITH vector_hits AS (
+        SELECT id, row_number() OVER (ORDER BY distance) AS rank
+        FROM (
+            SELECT id, embedding::halfvec(3072) <=> %(embedding)b::halfvec(3072) AS distance
+            FROM embeddings
+            WHERE {domain_filter}
+            ORDER BY distance
+            LIMIT %(limit)b
+        ) v
+    ),
+    lexical_hits AS (
+        SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+        FROM (
+            SELECT id, ts_rank_cd(content_tsv, q.query) AS score
+            FROM embeddings,
+                (SELECT replace(plainto_tsquery('english', %(query_text)b)::text, ' & ', ' | ')::tsquery AS query) q
+            WHERE content_tsv @@ q.query
+              AND {domain_filter}
+            ORDER BY score DESC
+            LIMIT %(limit)b
+        ) l
+    ),
+    fused AS (
+        SELECT id, SUM(1.0 / (%(rrf_k)b + rank)) AS rrf_score
+        FROM (SELECT id, rank FROM vector_hits UNION ALL SELECT id, rank FROM lexical_hits) hits
+        GROUP BY id
+    )
+    SELECT {CANDIDATE_COLUMNS},
+        1 - (embedding <=> %(embedding)b) AS similarity,
+        embedding_short,
+        rrf_score
+    FROM fused
+    JOIN embeddings USING (id)
+    WHERE {domain_filter}
+    ORDER BY rrf_score DESC
+    LIMIT %(limit)b
+"""
+
+
+# Two-stage search: a compact HNSW index picks a few hundred coarse
+# candidates, which are then reranked by exact cosine on the full vectors.
+# The compact indexes are a fraction of the size of the full halfvec index,
+# so they stay in memory and the walk touches far fewer pages:
+# - Matryoshka: the normalized 512-dim prefix (embedding_short, inner product)
+# - binary quantization: one sign bit per dimension (bit(3072), Hamming)
+MATRYOSHKA_ORDER = "embedding_short <#> %(embedding_short)b"
+BINARY_ORDER = "binary_quantize(embedding)::bit(3072) <~> binary_quantize(%(embedding)b)::bit(3072)"
+
+
+def _two_stage_sql(domain_filter: str, coarse_order: str = MATRYOSHKA_ORDER) -> str:
+    """Two-stage (compact ANN + full-vector rerank) statement.
+
+    Args:
+        domain_filter: Domain filter for both stages
+        coarse_order: ORDER BY expression matching a compact HNSW index
+    """
+    return f"""
+    WITH coarse AS (
+        SELECT id
+        FROM embeddings
+        WHERE {domain_filter}
+        ORDER BY {coarse_order}
+        LIMIT %(candidates)b
+    )
+    SELECT {CANDIDATE_COLUMNS},
+        1 - (embedding <=> %(embedding)b) AS similarity,
+        embedding_short
+    FROM embeddings
+    WHERE id IN (SELECT id FROM coarse)
+      AND {domain_filter}
+    ORDER BY embedding <=> %(embedding)b
+    LIMIT %(limit)b
+"""
+
+
+# With a LIST-partitioned embeddings table, filtering on the partition key
+# alone lets Postgres prune to the classified domains' partitions (also for
+# generic prepared plans) and merge their per-partition HNSW index scans.
+# Chunks tagged with a query domain only as a secondary domain are not
+# matched in this mode.
+PARTITION_FILTER = "primary_domain = ANY(%(domains)b::text[])"
+
+SIMILARITY_SQL = _ann_sql(DOMAIN_FILTER)
+PARTITIONED_SIMILARITY_SQL = _ann_sql(PARTITION_FILTER)
+HYBRID_SIMILARITY_SQL = _hybrid_sql(DOMAIN_FILTER)
+PARTITIONED_HYBRID_SIMILARITY_SQL = _hybrid_sql(PARTITION_FILTER)
+TWO_STAGE_SIMILARITY_SQL = _two_stage_sql(DOMAIN_FILTER)
+PARTITIONED_TWO_STAGE_SIMILARITY_SQL = _two_stage_sql(PARTITION_FILTER)
+BINARY_SIMILARITY_SQL = _two_stage_sql(DOMAIN_FILTER, BINARY_ORDER)
+PARTITIONED_BINARY_SIMILARITY_SQL = _two_stage_sql(PARTITION_FILTER, BINARY_ORDER)
+
+# Same as SIMILARITY_SQL but ordered by the full-precision vector, which skips
+# the ANN index (sequential scan). Used as ground truth for recall checks.
+EXACT_SIMILARITY_SQL = f"""
+    SELECT {CANDIDATE_COLUMNS},
+        1 - (embedding <=> %(embedding)b) AS similarity,
+        embedding_short
+    FROM embeddings
+    WHERE {DOMAIN_FILTER}
+    ORDER BY embedding <=> %(embedding)b
+    LIMIT %(limit)b
+"""
+
+# Second phase: content and display fields of the selected chunks
+CHUNK_CONTENT_SQL = f"""
+    SELECT {CHUNK_COLUMNS}
+    FROM embeddings
+    WHERE id = ANY(%(ids)b::uuid[])
+"""
+
+
+def batch_similarity_sql(count: int, partitioned: bool = False) -> str:
+    """Similarity statement running the HNSW search for `count` queries at once.
+
+    The query vectors and domain lists form a VALUES list; a LATERAL
+    subquery runs the same index-ordered search as SIMILARITY_SQL for each
+    row, so a batch of queries costs one round trip.
+
+    Args:
+        count: Number of queries in the batch
+        partitioned: Match only the primary (partition key) domain
+
+    Returns:
+        SQL with %(embedding_<i>)b, %(domains_<i>)b and %(limit)b placeholders;
+        rows are (query_index, CANDIDATE_COLUMNS, similarity, embedding_short)
+    """
+    values = ",\n        ".join(
+        f"({i}, %(embedding_{i})b::vector, %(domains_{i})b::text[])" for i in range(count)
+    )
+    secondary = "" if partitioned else "\n                OR secondary_domains && q.query_domains"
+    return f"""
+    SELECT q.query_index, c.*
+    FROM (VALUES
+        {values}
+    ) AS q(query_index, query_embedding, query_domains)
+    CROSS JOIN LATERAL (
+        SELECT {CANDIDATE_COLUMNS},
+            1 - (embedding <=> q.query_embedding) AS similarity,
+            embedding_short
+        FROM embeddings
+        WHERE (
+                q.query_domains IS NULL
+                OR primary_domain = ANY(q.query_domains){secondary}
+            )
+        ORDER BY embedding::halfvec(3072) <=> q.query_embedding::halfvec(3072)
+        LIMIT %(limit)b
+    ) c
+    ORDER BY q.query_index, c.similarity DESC
+"""
+
+
+SET_EF_SEARCH_SQL = "SELECT set_config('hnsw.ef_search', %(ef_search)s, true)"
+
+CORPUS_VERSION_SQL = "SELECT version FROM corpus_version WHERE id = 1"
+
+# Candidates this close (cosine of their embeddings) hold the same content
+DUPLICATE_SIMILARITY = 0.999
+
+
+def psycopg_url(database_url: str) -> str:
+    """Rewrite a PostgreSQL URL to use the psycopg 3 driver.
+
+    Retrieval needs binary parameters and server-side prepared statements,
+    which psycopg2 does not support.
+
+    Args:
+        database_url: SQLAlchemy URL (e.g. postgresql+psycopg2://...)
+
+    Returns:
+        Equivalent URL using postgresql+psycopg
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        return database_url
+    return url.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+
+
+def recall_at_k(retrieved_ids: List[str], relevant_ids: List[str], k: int) -> float:
+    """Fraction of the true top-k neighbours present in the retrieved top-k.
+
+    Args:
+        retrieved_ids: Ids returned by the approximate search
+        relevant_ids: Ids returned by the exact search (ground truth)
+        k: Cutoff
+
+    Returns:
+        Recall between 0.0 and 1.0 (1.0 when there is no ground truth)
+    """
+    truth = set(relevant_ids[:k])
+    if not truth:
+        return 1.0
+    return len(truth & set(retrieved_ids[:k])) / len(truth)
+
+
 class RetrievalService:
     """Semantic retrieval using pgvector similarity search."""
 
-    def __init__(self, database_url: str, api_key: Optional[str] = None, top_k: int = 10):
+    def __init__(
+        self,
+        database_url: str,
+        api_key: Optional[str] = None,
+        top_k: int = 50,
+        ef_search: int = 64,
+        mmr_lambda: float = 0.7,
+        hybrid: bool = False,
+        rrf_k: int = 60,
+        partitioned: bool = False,
+        two_stage: bool = False,
+        rerank_candidates: int = 300,
+        binary_quantized: bool = False,
+        vector_store: Optional[VectorStore] = None,
+        adaptive: bool = False,
+        min_similarity: float = 0.25,
+        similarity_drop: float = 0.1,
+        max_k: int = 200,
+        speculative: bool = False,
+        speculative_factor: int = 3,
+        max_workers: int = 8,
+        embedding_cache_max_entries: int = 1024,
+        embedding_cache_ttl_seconds: int = 86400,
+        shared_embedding_cache: bool = False,
+        corpus_version_ttl_seconds: float = 5.0,
+        local_classifier: bool = False,
+        local_confidence_threshold: float = 0.6,
+        classifier_shadow_rate: float = 0.0,
+        classification_cache_max_entries: int = 2048,
+        shared_classification_cache: bool = False,
+        chunk_cache_max_entries: int = 4096,
+        chunk_cache_ttl_seconds: int = 86400,
+        db_pool_size: int = 10,
+        db_max_overflow: int = 20
+    ):
         """Initialize the retrieval service.
 
         Args:
             database_url: PostgreSQL connection string
             api_key: OpenAI API key for embeddings
             top_k: Number of chunks to retrieve initially (before deduplication)
+            ef_search: HNSW candidate list size per query (higher = better recall, slower);
+                the session default is raised to top_k, so default-depth
+                searches need no per-query override
+            mmr_lambda: Relevance/diversity trade-off when selecting final chunks (1.0 = relevance only)
+            hybrid: Fuse full-text and vector search results (reciprocal rank fusion)
+            rrf_k: RRF rank constant (higher flattens the rank contribution)
+            partitioned: Filter on the partition key only, so filtered searches
+                touch just the classified domains' partitions and HNSW indexes
+            two_stage: Search the 512-dim prefix index first, then rerank the
+                candidates exactly on the full 3072-dim vectors
+            rerank_candidates: Coarse candidates reranked in two-stage and
+                binary-quantized mode
+            binary_quantized: Prefilter on the Hamming distance of binary-quantized
+                vectors, then rerank the candidates exactly (takes precedence
+                over two_stage)
+            vector_store: In-process vector search backend used instead of
+                pgvector for vector-only searches (None = pgvector); bypassed
+                while its snapshot's corpus version differs from the live one
+            adaptive: Adapt retrieval depth: fetch deeper when deduplication leaves too
+                few chunks, and cut candidates at a similarity elbow or minimum score
+            min_similarity: Adaptive mode drops candidates below this similarity
+            similarity_drop: Adaptive mode cuts the candidates at the first gap
+                between consecutive similarities larger than this
+            max_k: Adaptive mode never fetches more candidates than this
+            speculative: Start the unfiltered vector search before classification returns
+            speculative_factor: Over-fetch multiplier for the unfiltered speculative search
+            max_workers: Size of the shared executor for concurrent remote calls
+            embedding_cache_max_entries: In-process query embedding cache size
+            embedding_cache_ttl_seconds: Lifetime of cached query embeddings
+            shared_embedding_cache: Also share embeddings through the cache_entries table
+            corpus_version_ttl_seconds: How long a read of the corpus version is reused
+            local_classifier: Classify with domain centroids before falling back to GPT-4o
+            local_confidence_threshold: Minimum centroid confidence to skip GPT-4o
+            classifier_shadow_rate: Fraction of local classifications checked against GPT-4o
+            classification_cache_max_entries: In-process GPT-4o classification cache size
+            shared_classification_cache: Share classifications through the cache_entries table
+            chunk_cache_max_entries: In-process chunk content cache size (keyed by chunk id)
+            chunk_cache_ttl_seconds: Lifetime of cached chunk content
+            db_pool_size: Connection pool size of each engine (sync and async)
+            db_max_overflow: Connections allowed beyond the pool size
         """
-        self.engine = create_engine(database_url)
+        # Sync engine for scripts and the sync API; async engine for the
+        # coach endpoint so queries don't block the event loop
+        self.engine = create_engine(
+            psycopg_url(database_url),
+            pool_size=db_pool_size,
+            max_overflow=db_max_overflow
+        )
+        event.listen(self.engine, "connect", self._on_connect)
+        self.async_engine = create_async_engine(
+            psycopg_url(database_url),
+            pool_size=db_pool_size,
+            max_overflow=db_max_overflow
+        )
+        event.listen(self.async_engine.sync_engine, "connect", self._on_async_connect)
+        instrument_engine(self.engine, "retrieval")
+        instrument_engine(self.async_engine.sync_engine, "retrieval_async")
         self.openai_client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
-        self.intent_router = IntentRouter(api_key=api_key)
+        self.async_openai_client = AsyncOpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.intent_router = IntentRouter(
+            api_key=api_key,
+            cache_max_entries=classification_cache_max_entries,
+            cache_backend=(
+                PostgresCacheBackend(self.engine, namespace="intent_classification")
+                if shared_classification_cache else None
+            ),
+            centroid_classifier=CentroidClassifier(self.engine) if local_classifier else None,
+            local_confidence_threshold=local_confidence_threshold,
+            shadow_rate=classifier_shadow_rate
+        )
         self.top_k = top_k
+        self.ef_search = ef_search
+        self.session_ef_search = max(ef_search, top_k)
+        self.mmr_lambda = mmr_lambda
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+        self.partitioned = partitioned
+        self.two_stage = two_stage
+        self.rerank_candidates = rerank_candidates
+        self.binary_quantized = binary_quantized
+        self.vector_store = vector_store
+        self._stale_corpus_version: Optional[int] = None
+        self.adaptive = adaptive
+        self.min_similarity = min_similarity
+        self.similarity_drop = similarity_drop
+        self.max_k = max_k
+        self.speculative = speculative
+        self.speculative_factor = speculative_factor
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrieval")
         self.embedding_model = "text-embedding-3-large"
+        self.embedding_cache = EmbeddingCache(
+            max_entries=embedding_cache_max_entries,
+            ttl_seconds=embedding_cache_ttl_seconds,
+            engine=self.engine if shared_embedding_cache else None
+        )
+        # Chunk rows are never updated in place (reloads insert new ids), so
+        # content can be cached by id without corpus-version checks
+        self.chunk_cache = LRUCache(max_entries=chunk_cache_max_entries, ttl_seconds=chunk_cache_ttl_seconds)
+        self.corpus_version_ttl_seconds = corpus_version_ttl_seconds
+        self._corpus_version: Optional[int] = None
+        self._corpus_version_checked_at = float('-inf')
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        """Register the pgvector binary adapter and session defaults."""
+        register_vector(dbapi_connection)
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"SET hnsw.ef_search = {int(self.session_ef_search)}")
+        dbapi_connection.commit()
+
+    def _on_async_connect(self, dbapi_connection, connection_record):
+        """Async-engine counterpart of _on_connect (runs on the driver connection)."""
+        async def setup(connection):
+            await register_vector_async(connection)
+            await connection.execute(f"SET hnsw.ef_search = {int(self.session_ef_search)}")
+            await connection.commit()
 
-    def _embed_query(self, query: str) -> List[float]:
-        """Generate embedding for a query.
+        dbapi_connection.run_async(setup)
+
+    @timed("embedding")
+    def embed_query(self, query: str) -> np.ndarray:
+        """Generate embedding for a query, served from the cache when possible.
 
         Args:
             query: User query text
 
         Returns:
-            Query embedding vector
+            Query embedding vector (float32)
         """
+        cached = self.embedding_cache.get(query, self.embedding_model)
+        record_cache("embedding", cached is not None)
+        set_attributes(**{"rag.cache_hit": cached is not None})
+        if cached is not None:
+            return cached
+
         try:
-            response = self.openai_client.embeddings.create(
-                input=query,
-                model=self.embedding_model
-            )
-            return response.data[0].embedding
+            with span("openai.embeddings", {"gen_ai.request.model": self.embedding_model}):
+                response = self.openai_client.embeddings.create(
+                    input=query,
+                    model=self.embedding_model
+                )
+                set_attributes(**usage_attributes(response.usage))
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+            self.embedding_cache.set(query, self.embedding_model, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"Failed to embed query: {e}")
             raise
 
+    @timed("embedding")
+    async def aembed_query(self, query: str) -> np.ndarray:
+        """Async variant of embed_query using AsyncOpenAI.
+
+        Args:
+            query: User query text
+
+        Returns:
+            Query embedding vector (float32)
+        """
+        cached = await self.embedding_cache.aget(query, self.embedding_model)
+        record_cache("embedding", cached is not None)
+        set_attributes(**{"rag.cache_hit": cached is not None})
+        if cached is not None:
+            return cached
+
+        try:
+            with span("openai.embeddings", {"gen_ai.request.model": self.embedding_model}):
+                response = await self.async_openai_client.embeddings.create(
+                    input=query,
+                    model=self.embedding_model
+                )
+                set_attributes(**usage_attributes(response.usage))
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+            await self.embedding_cache.aset(query, self.embedding_model, embedding)
+            return embedding
+        except Exception as e:
+            logger.error(f"Failed to embed query: {e}")
+            raise
+
+    def get_corpus_version(self) -> Optional[int]:
+        """Return the current corpus version, re-read at most every few seconds.
+
+        The version is bumped by a trigger on every write to the embeddings
+        table, so caches derived from the corpus can detect reloads.
+
+        Returns:
+            Corpus version number, or None if it cannot be read
+        """
+        now = time.monotonic()
+        if now - self._corpus_version_checked_at < self.corpus_version_ttl_seconds:
+            return self._corpus_version
+
+        try:
+            with self.engine.connect() as conn:
+                rows = self._execute(conn, CORPUS_VERSION_SQL, {})
+            self._corpus_version = int(rows[0][0]) if rows else None
+        except Exception as e:
+            logger.warning(f"Failed to read corpus version: {e}")
+            self._corpus_version = None
+        self._corpus_version_checked_at = now
+        return self._corpus_version
+
+    async def aget_corpus_version(self) -> Optional[int]:
+        """Async variant of get_corpus_version.
+
+        Returns:
+            Corpus version number, or None if it cannot be read
+        """
+        now = time.monotonic()
+        if now - self._corpus_version_checked_at < self.corpus_version_ttl_seconds:
+            return self._corpus_version
+
+        try:
+            async with self.async_engine.connect() as conn:
+                rows = await self._aexecute(conn, CORPUS_VERSION_SQL, {})
+            self._corpus_version = int(rows[0][0]) if rows else None
+        except Exception as e:
+            logger.warning(f"Failed to read corpus version: {e}")
+            self._corpus_version = None
+        self._corpus_version_checked_at = now
+        return self._corpus_version
+
+    @timed("vector_query")
     def _retrieve_similar_chunks(
         self,
         query_embedding: List[float],
         primary_domain: Optional[str] = None,
         secondary_domains: Optional[List[str]] = None,
-        limit: int = 10
+        limit: int = 10,
+        ef_search: Optional[int] = None,
+        exact: bool = False,
+        query_text: Optional[str] = None
     ) -> List[Dict]:
         """Retrieve similar chunks from the database.
 
+        By default the search walks the HNSW index on the halfvec expression
+        (approximate). With exact=True it orders by the full-precision vector
+        instead, which forces a sequential scan and is used as ground truth
+        when measuring recall. With query_text the vector search is fused with
+        a full-text search (hybrid, see HYBRID_SIMILARITY_SQL); otherwise, in
+        binary-quantized or two-stage mode, a compact index supplies
+        candidates for an exact rerank (see BINARY_SIMILARITY_SQL and
+        TWO_STAGE_SIMILARITY_SQL). With an in-process vector store,
+        vector-only searches are answered from memory instead.
+
         Args:
             query_embedding: Query vector
             primary_domain: Primary domain to filter by
             secondary_domains: Secondary domains to include
             limit: Number of results to return
+            ef_search: Override the HNSW ef_search for this query
+            exact: Bypass the ANN index and compute exact distances
+            query_text: Query text for hybrid lexical + vector search
 
         Returns:
-            List of similar chunks with metadata and scores
+            List of candidate chunks with ids, filter/dedup metadata and scores
+            (content is loaded by _fetch_content)
         """
+        params = self._similarity_params(
+            query_embedding, primary_domain, secondary_domains, limit, query_text
+        )
+        if self._use_vector_store(exact, query_text) and self._vector_store_current(self.get_corpus_version()):
+            return self._search_vector_store(params)
+
         try:
             with self.engine.connect() as conn:
-                # Build domain filter
-                domain_filter = ""
-                if primary_domain:
-                    domains_to_search = [primary_domain]
-                    if secondary_domains:
-                        domains_to_search.extend(secondary_domains)
-
-                    domain_list = ", ".join([f"'{d}'" for d in domains_to_search])
-                    domain_filter = f"AND (metadata->>'primary_domain') IN ({domain_list})"
-
-                # Convert embedding to pgvector string format: '[1.0,2.0,3.0]'
-                # Direct SQL embedding (safe - floats from OpenAI, not user input)
-                embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
-
-                query = text(f"""
-                    SELECT
-                        content,
-                        metadata,
-                        1 - (embedding <=> '{embedding_str}'::vector) as similarity
-                    FROM embeddings
-                    WHERE 1=1 {domain_filter}
-                    ORDER BY embedding <=> '{embedding_str}'::vector
-                    LIMIT :limit
-                """)
-
-                result = conn.execute(query, {'limit': limit})
-
-                chunks = []
-                for row in result:
-                    chunks.append({
-                        'content': row[0],
-                        'metadata': row[1],
-                        'similarity': float(row[2])
-                    })
-
-                return chunks
+                # The session default is set on connect; only override when asked
+                effective_ef_search = self._effective_ef_search(ef_search, limit, exact, query_text)
+                if effective_ef_search is not None:
+                    self._execute(conn, SET_EF_SEARCH_SQL, {'ef_search': str(effective_ef_search)})
+
+                rows = self._execute(conn, self._similarity_sql(exact, query_text, params['domains']), params, binary=True)
+
+                return self._rows_to_candidates(rows)
 
         except Exception as e:
             logger.error(f"Retrieval query failed: {e}")
             raise
 
-    def _deduplicate_chunks(self, chunks: List[Dict], final_k: int = 7) -> List[Dict]:
-        """Deduplicate overlapping chunks based on page ranges.
+    @timed("vector_query")
+    async def _aretrieve_similar_chunks(
+        self,
+        query_embedding: List[float],
+        primary_domain: Optional[str] = None,
+        secondary_domains: Optional[List[str]] = None,
+        limit: int = 10,
+        ef_search: Optional[int] = None,
+        exact: bool = False,
+        query_text: Optional[str] = None
+    ) -> List[Dict]:
+        """Async variant of _retrieve_similar_chunks on the async engine.
+
+        Args:
+            query_embedding: Query vector
+            primary_domain: Primary domain to filter by
+            secondary_domains: Secondary domains to include
+            limit: Number of results to return
+            ef_search: Override the HNSW ef_search for this query
+            exact: Bypass the ANN index and compute exact distances
+            query_text: Query text for hybrid lexical + vector search
+
+        Returns:
+            List of candidate chunks with ids, filter/dedup metadata and scores
+            (content is loaded by _fetch_content)
+        """
+        params = self._similarity_params(
+            query_embedding, primary_domain, secondary_domains, limit, query_text
+        )
+        if self._use_vector_store(exact, query_text) and self._vector_store_current(await self.aget_corpus_version()):
+            # Matrix products release the GIL; keep them off the event loop
+            return await asyncio.to_thread(self._search_vector_store, params)
+
+        try:
+            async with self.async_engine.connect() as conn:
+                effective_ef_search = self._effective_ef_search(ef_search, limit, exact, query_text)
+                if effective_ef_search is not None:
+                    await self._aexecute(conn, SET_EF_SEARCH_SQL, {'ef_search': str(effective_ef_search)})
+
+                rows = await self._aexecute(conn, self._similarity_sql(exact, query_text, params['domains']), params, binary=True)
+
+                return self._rows_to_candidates(rows)
+
+        except Exception as e:
+            logger.error(f"Retrieval query failed: {e}")
+            raise
+
+    def _use_vector_store(self, exact: bool, query_text: Optional[str]) -> bool:
+        """Whether a search is answered by the in-process vector store.
+
+        Exact searches stay in Postgres as the ground truth, and hybrid
+        searches need its full-text index.
+        """
+        return self.vector_store is not None and not exact and not query_text
+
+    def check_vector_store(self) -> bool:
+        """Compare the vector store snapshot with the live corpus (e.g. at startup).
+
+        Returns:
+            False if a configured vector store is stale and pgvector will answer
+        """
+        return self.vector_store is None or self._vector_store_current(self.get_corpus_version())
+
+    def _vector_store_current(self, corpus_version: Optional[int]) -> bool:
+        """Whether the vector store snapshot matches the live corpus version.
+
+        The live version is re-read at most every corpus_version_ttl_seconds,
+        so a reload is noticed on the first search after it. A stale snapshot
+        is bypassed (pgvector answers) until it is re-exported; an unreadable
+        live version keeps the snapshot in use.
+        """
+        if corpus_version is None or corpus_version == self.vector_store.corpus_version:
+            return True
+        if corpus_version != self._stale_corpus_version:
+            self._stale_corpus_version = corpus_version
+            logger.warning(
+                f"Vector store snapshot is at corpus version {self.vector_store.corpus_version}, "
+                f"live corpus is at {corpus_version}; searching pgvector until it is re-exported"
+            )
+        return False
+
+    def _search_vector_store(self, params: Dict) -> List[Dict]:
+        """Run a similarity search on the in-process vector store."""
+        return self.vector_store.search(
+            params['embedding'],
+            domains=params['domains'],
+            limit=params['limit'],
+            primary_only=self.partitioned
+        )
+
+    def _effective_ef_search(
+        self,
+        ef_search: Optional[int],
+        limit: int,
+        exact: bool,
+        query_text: Optional[str] = None
+    ) -> Optional[int]:
+        """ef_search to set for a query, or None to keep the session default.
+
+        HNSW returns at most ef_search rows, so it is raised to the limit for
+        large candidate pools (the coarse candidate count in two-stage mode).
+        """
+        if exact:
+            return None
+        if (self.binary_quantized or self.two_stage) and not query_text:
+            limit = max(limit, self.rerank_candidates)
+        effective = max(ef_search or self.session_ef_search, limit)
+        return effective if effective != self.session_ef_search else None
+
+    def _similarity_sql(self, exact: bool, query_text: Optional[str], domains: Optional[List[str]]) -> str:
+        """Pick the similarity statement for a search mode."""
+        if exact:
+            return EXACT_SIMILARITY_SQL
+        partitioned = self.partitioned and domains
+        if query_text:
+            return PARTITIONED_HYBRID_SIMILARITY_SQL if partitioned else HYBRID_SIMILARITY_SQL
+        if self.binary_quantized:
+            return PARTITIONED_BINARY_SIMILARITY_SQL if partitioned else BINARY_SIMILARITY_SQL
+        if self.two_stage:
+            return PARTITIONED_TWO_STAGE_SIMILARITY_SQL if partitioned else TWO_STAGE_SIMILARITY_SQL
+        return PARTITIONED_SIMILARITY_SQL if partitioned else SIMILARITY_SQL
+
+    def _similarity_params(
+        self,
+        query_embedding: List[float],
+        primary_domain: Optional[str],
+        secondary_domains: Optional[List[str]],
+        limit: int,
+        query_text: Optional[str] = None
+    ) -> Dict:
+        """Build bound parameters for the similarity statements."""
+        domains = None
+        if primary_domain:
+            domains = [primary_domain] + list(secondary_domains or [])
+
+        params = {
+            'embedding': np.asarray(query_embedding, dtype=np.float32),
+            'domains': domains,
+            'limit': limit
+        }
+        if query_text:
+            params['query_text'] = query_text
+            params['rrf_k'] = self.rrf_k
+        elif self.binary_quantized or self.two_stage:
+            if not self.binary_quantized:
+                params['embedding_short'] = truncate_normalize(query_embedding, PREFIX_DIMENSION)
+            params['candidates'] = max(self.rerank_candidates, limit)
+        return params
+
+    @staticmethod
+    def _rows_to_candidates(rows: List[tuple]) -> List[Dict]:
+        """Convert similarity statement rows into candidate chunk dictionaries.
+
+        Rows hold CANDIDATE_COLUMNS, then similarity, the prefix embedding
+        and (hybrid search only) rrf_score.
+        """
+        chunks = []
+        for row in rows:
+            chunk = {
+                'id': str(row[0]),
+                'metadata': {
+                    'book_id': row[1],
+                    'page_start': row[2],
+                    'page_end': row[3],
+                    'primary_domain': row[4],
+                    'secondary_domains': list(row[5] or [])
+                },
+                'similarity': float(row[6]),
+                'embedding': row[7]
+            }
+            if len(row) > 8:
+                chunk['rrf_score'] = float(row[8])
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _rows_to_content(rows: List[tuple]) -> Dict[str, Dict]:
+        """Convert CHUNK_CONTENT_SQL rows into content and full metadata by id."""
+        return {
+            str(row[0]): {
+                'content': row[1],
+                'metadata': {
+                    'book_id': row[2],
+                    'book_title': row[3],
+                    'authors': row[4] or [],
+                    'chapter_number': row[5],
+                    'chapter_title': row[6],
+                    'page_start': row[7],
+                    'page_end': row[8],
+                    'primary_domain': row[9],
+                    'secondary_domains': list(row[10] or [])
+                }
+            }
+            for row in rows
+        }
+
+    def _cached_content(self, chunks: List[Dict]) -> tuple:
+        """Split chunks lacking content into cache hits and ids to fetch.
+
+        Returns:
+            (content by id for cache hits, ids missing from the cache)
+        """
+        contents = {}
+        missing = []
+        for chunk in chunks:
+            if 'content' in chunk:
+                continue
+            cached = self.chunk_cache.get(chunk['id'])
+            if cached is None:
+                missing.append(chunk['id'])
+            else:
+                contents[chunk['id']] = cached
+        record_cache("chunk", True, len(contents))
+        record_cache("chunk", False, len(missing))
+        return contents, missing
+
+    def _attach_content(self, chunks: List[Dict], contents: Dict[str, Dict]) -> List[Dict]:
+        """Merge fetched content into chunks, caching it by id.
+
+        Chunks whose rows disappeared between the phases (corpus reload)
+        are dropped.
+        """
+        attached = []
+        for chunk in chunks:
+            if 'content' in chunk:
+                attached.append(chunk)
+                continue
+            content = contents.get(chunk['id'])
+            if content is None:
+                logger.warning(f"Chunk {chunk['id']} vanished before its content was fetched")
+                continue
+            self.chunk_cache.set(chunk['id'], content)
+            attached.append({**chunk, **content})
+        return attached
+
+    @timed("content_fetch")
+    def _fetch_content(self, chunks: List[Dict]) -> List[Dict]:
+        """Second retrieval phase: load content for the selected chunks.
+
+        Chunks already carrying content (e.g. from an in-process vector
+        store) are kept as is; the rest come from the chunk cache or one
+        batched query.
+
+        Args:
+            chunks: Selected candidate chunks
+
+        Returns:
+            Chunks with content and full metadata
+        """
+        contents, missing = self._cached_content(chunks)
+        if missing:
+            with self.engine.connect() as conn:
+                rows = self._execute(conn, CHUNK_CONTENT_SQL, {'ids': missing}, binary=True)
+            contents.update(self._rows_to_content(rows))
+        return self._attach_content(chunks, contents)
+
+    @timed("content_fetch")
+    async def _afetch_content(self, chunks: List[Dict]) -> List[Dict]:
+        """Async variant of _fetch_content on the async engine.
+
+        Args:
+            chunks: Selected candidate chunks
+
+        Returns:
+            Chunks with content and full metadata
+        """
+        contents, missing = self._cached_content(chunks)
+        if missing:
+            async with self.async_engine.connect() as conn:
+                rows = await self._aexecute(conn, CHUNK_CONTENT_SQL, {'ids': missing}, binary=True)
+            contents.update(self._rows_to_content(rows))
+        return self._attach_content(chunks, contents)
+
+    def _execute(self, conn, sql: str, params: Dict, binary: bool = False) -> List[tuple]:
+        """Execute a statement as a server-side prepared statement.
+
+        psycopg prepares the statement on first use per connection and reuses
+        the cached plan afterwards; %(name)b placeholders are sent in binary.
+
+        Args:
+            conn: SQLAlchemy connection from self.engine
+            sql: Driver-level SQL with psycopg placeholders
+            params: Statement parameters
+            binary: Request results in binary format (vectors skip text parsing)
+
+        Returns:
+            All result rows
+        """
+        with db_span(sql, "retrieval") as span, conn.connection.dbapi_connection.cursor() as cursor:
+            cursor.execute(sql, params, prepare=True, binary=binary)
+            rows = cursor.fetchall() if cursor.description else []
+            span.set_attribute("db.rows", len(rows))
+            return rows
+
+    async def _aexecute(self, conn, sql: str, params: Dict, binary: bool = False) -> List[tuple]:
+        """Async variant of _execute on a connection from self.async_engine.
+
+        Args:
+            conn: SQLAlchemy AsyncConnection
+            sql: Driver-level SQL with psycopg placeholders
+            params: Statement parameters
+            binary: Request results in binary format (vectors skip text parsing)
+
+        Returns:
+            All result rows
+        """
+        raw = await conn.get_raw_connection()
+        with db_span(sql, "retrieval_async") as span:
+            async with raw.driver_connection.cursor() as cursor:
+                await cursor.execute(sql, params, prepare=True, binary=binary)
+                rows = await cursor.fetchall() if cursor.description else []
+            span.set_attribute("db.rows", len(rows))
+            return rows
+
+    @timed("dedup")
+    def _deduplicate_chunks(self, chunks: List[Dict], final_k: int = 7, fill: bool = True) -> List[Dict]:
+        """Select diverse, non-overlapping chunks.
+
+        Chunks are picked by maximal marginal relevance over their embeddings
+        (similarity order when embeddings are missing), skipping any whose page
+        range overlaps one already selected from the same book. Page ranges are
+        often chapter-level, so if that leaves fewer than final_k, the
+        remaining slots are filled from the skipped chunks with distinct
+        content, still in MMR order. Content is not loaded yet, so duplicates
+        are recognized by their (near-)identical embeddings.
 
         Args:
             chunks: List of retrieved chunks
             final_k: Final number of chunks to return
+            fill: Fill missing slots with overlapping chunks
 
         Returns:
             Deduplicated list of chunks
@@ -128,106 +947,717 @@ class RetrievalService:
         if not chunks:
             return []
 
-        deduplicated = []
-        seen_ranges = set()
+        if all('rrf_score' in c for c in chunks):
+            # Hybrid results: rank by fused score, scaled to [0, 1] for MMR
+            relevance = np.array([c['rrf_score'] for c in chunks], dtype=np.float32)
+            relevance /= relevance.max() or 1.0
+        else:
+            relevance = np.array([c['similarity'] for c in chunks], dtype=np.float32)
+        embeddings = None
+        if all(c.get('embedding') is not None for c in chunks):
+            embeddings = np.vstack([np.asarray(c['embedding'], dtype=np.float32) for c in chunks])
 
-        for chunk in chunks:
-            metadata = chunk['metadata']
+        index = PageIntervalIndex()
+
+        def non_overlapping(i: int) -> bool:
+            metadata = chunks[i]['metadata']
+            book_id = metadata.get('book_id')
             page_start = metadata.get('page_start')
             page_end = metadata.get('page_end')
-            book_id = metadata.get('book_id')
+            if index.overlaps(book_id, page_start, page_end):
+                return False
+            index.add(book_id, page_start, page_end)
+            return True
 
-            # Create a unique key for this page range
-            range_key = (book_id, page_start, page_end)
+        selected = mmr_select(relevance, embeddings, final_k, self.mmr_lambda, allowed=non_overlapping)
 
-            # Skip if we've already seen this exact range
-            if range_key in seen_ranges:
-                continue
+        if fill and len(selected) < final_k:
+            if embeddings is not None:
+                norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                unit = embeddings / norms
+                kept = list(selected)
 
-            # Check for overlapping ranges
-            has_overlap = False
-            for seen_book, seen_start, seen_end in seen_ranges:
-                if seen_book == book_id:
-                    # Check if ranges overlap
-                    if (page_start <= seen_end and page_end >= seen_start):
-                        has_overlap = True
-                        break
-
-            if not has_overlap:
-                deduplicated.append(chunk)
-                seen_ranges.add(range_key)
-
-            # Stop when we have enough
-            if len(deduplicated) >= final_k:
-                break
+                def distinct(i: int) -> bool:
+                    if kept and float((unit[kept] @ unit[i]).max()) >= DUPLICATE_SIMILARITY:
+                        return False
+                    kept.append(i)
+                    return True
+            else:
+                seen_content = {self._content_key(chunks[i]) for i in selected}
 
-        return deduplicated
+                def distinct(i: int) -> bool:
+                    key = self._content_key(chunks[i])
+                    if key in seen_content:
+                        return False
+                    seen_content.add(key)
+                    return True
+
+            selected = mmr_select(
+                relevance, embeddings, final_k, self.mmr_lambda,
+                allowed=distinct, selected=selected
+            )
 
-    def retrieve(self, query: str, final_k: int = 7) -> Dict:
+        return [chunks[i] for i in selected]
+
+    @staticmethod
+    def _content_key(chunk: Dict) -> str:
+        """Identity of a chunk's content when candidates carry no embeddings."""
+        return chunk.get('content', chunk['id'])
+
+    @traced("rag.retrieve")
+    def retrieve(
+        self,
+        query: str,
+        final_k: int = 7,
+        speculative: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
+        hybrid: Optional[bool] = None
+    ) -> Dict:
         """Retrieve relevant content chunks for a user query.
 
         This is the main entry point for retrieval:
-        1. Classify query into domains (Story 2.5)
-        2. Embed the query
-        3. Perform vector similarity search with domain filtering
-        4. Deduplicate overlapping chunks
-        5. Return top-k most relevant chunks
+        1. Classify query into domains (Story 2.5) and embed the query, concurrently
+        2. Perform vector similarity search with domain filtering
+        3. Deduplicate overlapping chunks
+        4. Fetch content for the selected chunks and return them
+
+        In speculative mode the unfiltered vector search starts as soon as the
+        embedding is ready, while classification may still be in flight; the
+        domain filter is then applied to the wider candidate set in memory.
+
+        In adaptive mode the candidates are cut at a similarity elbow or
+        minimum score, and the search is repeated with a doubled limit (up to
+        max_k) while deduplication leaves fewer than final_k chunks, so the
+        result may hold fewer but more relevant chunks.
+
+        In hybrid mode each search also runs a full-text search over the
+        chunk content and fuses both rankings with reciprocal rank fusion.
 
         Args:
             query: User query text
             final_k: Number of final chunks to return (after deduplication)
+            speculative: Override the service's speculative search setting
+            adaptive: Override the service's adaptive depth setting
+            hybrid: Override the service's hybrid lexical + vector search setting
 
         Returns:
             Dictionary with retrieved chunks and metadata
         """
         logger.info(f"Retrieving chunks for query: {query[:100]}...")
 
+        if speculative is None:
+            speculative = self.speculative
+        if adaptive is None:
+            adaptive = self.adaptive
+        if hybrid is None:
+            hybrid = self.hybrid
+        query_text = query if hybrid else None
+
         try:
-            # Step 1: Classify query into domains
-            classification = self.intent_router.classify(query)
+            # Step 1: Classify on the shared executor while embedding here. The
+            # local centroid classifier needs the embedding first and only falls
+            # back to GPT-4o when it is unsure.
+            if self.intent_router.centroid_classifier is not None:
+                query_embedding = self.embed_query(query)
+                classification_future = self.executor.submit(
+                    self.intent_router.classify, query, query_embedding
+                )
+            else:
+                classification_future = self.executor.submit(self.intent_router.classify, query)
+                query_embedding = self.embed_query(query)
+
+            # Get more than final_k for deduplication
+            initial_k = self.top_k
+            search_future = None
+            if speculative:
+                search_future = self.executor.submit(
+                    self._retrieve_similar_chunks,
+                    query_embedding=query_embedding,
+                    limit=initial_k * self.speculative_factor,
+                    query_text=query_text
+                )
+
+            classification = classification_future.result()
             primary_domain = classification.get('primary_domain')
             secondary_domains = classification.get('secondary_domains', [])
 
             logger.info(f"Classified as primary={primary_domain}, secondary={secondary_domains}")
 
-            # Step 2: Embed the query
-            query_embedding = self._embed_query(query)
+            # Step 2: Retrieve similar chunks
+            chunks = None
+            if search_future is not None:
+                chunks = self._filter_speculative(
+                    search_future.result(), primary_domain, secondary_domains, initial_k
+                )
 
-            # Step 3: Retrieve similar chunks (get more than final_k for deduplication)
-            initial_k = self.top_k
-            chunks = self._retrieve_similar_chunks(
-                query_embedding=query_embedding,
-                primary_domain=primary_domain,
-                secondary_domains=secondary_domains,
-                limit=initial_k
+            if chunks is None:
+                chunks = self._retrieve_similar_chunks(
+                    query_embedding=query_embedding,
+                    primary_domain=primary_domain,
+                    secondary_domains=secondary_domains,
+                    limit=initial_k,
+                    query_text=query_text
+                )
+
+            # Step 3: Deduplicate (deeper fetches in adaptive mode)
+            chunks, selected = self._select_chunks(
+                chunks, query_embedding, primary_domain, secondary_domains,
+                final_k, adaptive, query_text
             )
 
-            logger.info(f"Retrieved {len(chunks)} initial chunks")
+            # Step 4: Fetch content for the survivors only
+            selected = self._fetch_content(selected)
 
-            # Step 4: Deduplicate
-            deduplicated_chunks = self._deduplicate_chunks(chunks, final_k=final_k)
+            return self._build_result(query, classification, chunks, final_k, selected)
 
-            logger.info(f"After deduplication: {len(deduplicated_chunks)} chunks")
+        except Exception as e:
+            logger.error(f"Retrieval failed: {e}")
+            return self._error_result(query, e)
 
-            # Step 5: Prepare result
-            return {
-                'query': query,
-                'classification': classification,
-                'chunks': deduplicated_chunks,
-                'total_retrieved': len(chunks),
-                'total_after_dedup': len(deduplicated_chunks)
-            }
+    def start_query_tasks(self, query: str) -> tuple:
+        """Start embedding and classifying a query as tasks on the event loop.
+
+        The local centroid classifier needs the embedding first and only
+        falls back to GPT-4o when it is unsure; otherwise both run
+        concurrently. Callers that need the embedding before retrieval (the
+        answer cache) start the tasks early and hand them to aretrieve.
+
+        Args:
+            query: User query text
+
+        Returns:
+            (embedding task, classification task)
+        """
+        embedding_task = asyncio.create_task(self.aembed_query(query))
+        if self.intent_router.centroid_classifier is not None:
+            async def classify() -> Dict:
+                return await self.intent_router.aclassify(query, await embedding_task)
+
+            classification_task = asyncio.create_task(classify())
+        else:
+            classification_task = asyncio.create_task(self.intent_router.aclassify(query))
+        return embedding_task, classification_task
+
+    @traced("rag.retrieve")
+    async def aretrieve(
+        self,
+        query: str,
+        final_k: int = 7,
+        speculative: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
+        hybrid: Optional[bool] = None,
+        query_tasks: Optional[tuple] = None
+    ) -> Dict:
+        """Async variant of retrieve for use on the event loop.
+
+        Classification, embedding and (in speculative mode) the unfiltered
+        search run as tasks on the loop instead of executor threads, and the
+        similarity query uses the async engine.
+
+        Args:
+            query: User query text
+            final_k: Number of final chunks to return (after deduplication)
+            speculative: Override the service's speculative search setting
+            adaptive: Override the service's adaptive depth setting
+            hybrid: Override the service's hybrid lexical + vector search setting
+            query_tasks: In-flight (embedding, classification) tasks from
+                start_query_tasks (started here when None)
+
+        Returns:
+            Dictionary with retrieved chunks and metadata
+        """
+        logger.info(f"Retrieving chunks for query: {query[:100]}...")
+
+        if speculative is None:
+            speculative = self.speculative
+        if adaptive is None:
+            adaptive = self.adaptive
+        if hybrid is None:
+            hybrid = self.hybrid
+        query_text = query if hybrid else None
+
+        search_task = None
+        embedding_task, classification_task = query_tasks or self.start_query_tasks(query)
+        try:
+            # Step 1: Classify and embed concurrently
+            query_embedding = await embedding_task
+
+            initial_k = self.top_k
+            if speculative:
+                search_task = asyncio.create_task(self._aretrieve_similar_chunks(
+                    query_embedding=query_embedding,
+                    limit=initial_k * self.speculative_factor,
+                    query_text=query_text
+                ))
+
+            classification = await classification_task
+            primary_domain = classification.get('primary_domain')
+            secondary_domains = classification.get('secondary_domains', [])
+
+            logger.info(f"Classified as primary={primary_domain}, secondary={secondary_domains}")
+
+            # Step 2: Retrieve similar chunks
+            chunks = None
+            if search_task is not None:
+                chunks = self._filter_speculative(
+                    await search_task, primary_domain, secondary_domains, initial_k
+                )
+
+            if chunks is None:
+                chunks = await self._aretrieve_similar_chunks(
+                    query_embedding=query_embedding,
+                    primary_domain=primary_domain,
+                    secondary_domains=secondary_domains,
+                    limit=initial_k,
+                    query_text=query_text
+                )
+
+            # Step 3: Deduplicate (deeper fetches in adaptive mode)
+            chunks, selected = await self._aselect_chunks(
+                chunks, query_embedding, primary_domain, secondary_domains,
+                final_k, adaptive, query_text
+            )
+
+            # Step 4: Fetch content for the survivors only
+            selected = await self._afetch_content(selected)
+
+            return self._build_result(query, classification, chunks, final_k, selected)
 
         except Exception as e:
             logger.error(f"Retrieval failed: {e}")
-            return {
-                'query': query,
-                'classification': {'primary_domain': 'school_culture', 'secondary_domains': []},
-                'chunks': [],
-                'total_retrieved': 0,
-                'total_after_dedup': 0,
-                'error': str(e)
-            }
+            for task in (classification_task, search_task):
+                if task is not None and not task.done():
+                    task.cancel()
+            return self._error_result(query, e)
+
+    def _select_chunks(
+        self,
+        chunks: List[Dict],
+        query_embedding,
+        primary_domain: Optional[str],
+        secondary_domains: List[str],
+        final_k: int,
+        adaptive: bool,
+        query_text: Optional[str] = None
+    ) -> tuple:
+        """Deduplicate candidates, searching deeper in adaptive mode.
+
+        Returns:
+            (final candidate list, selected chunks)
+        """
+        if not adaptive:
+            return chunks, self._deduplicate_chunks(chunks, final_k=final_k)
+
+        steps = self._adaptive_selection(chunks, final_k)
+        try:
+            limit = next(steps)
+            while True:
+                limit = steps.send(self._retrieve_similar_chunks(
+                    query_embedding=query_embedding,
+                    primary_domain=primary_domain,
+                    secondary_domains=secondary_domains,
+                    limit=limit,
+                    query_text=query_text
+                ))
+        except StopIteration as done:
+            return done.value
+
+    async def _aselect_chunks(
+        self,
+        chunks: List[Dict],
+        query_embedding,
+        primary_domain: Optional[str],
+        secondary_domains: List[str],
+        final_k: int,
+        adaptive: bool,
+        query_text: Optional[str] = None
+    ) -> tuple:
+        """Async variant of _select_chunks (deeper searches on the async engine).
+
+        Returns:
+            (final candidate list, selected chunks)
+        """
+        if not adaptive:
+            return chunks, self._deduplicate_chunks(chunks, final_k=final_k)
+
+        steps = self._adaptive_selection(chunks, final_k)
+        try:
+            limit = next(steps)
+            while True:
+                limit = steps.send(await self._aretrieve_similar_chunks(
+                    query_embedding=query_embedding,
+                    primary_domain=primary_domain,
+                    secondary_domains=secondary_domains,
+                    limit=limit,
+                    query_text=query_text
+                ))
+        except StopIteration as done:
+            return done.value
+
+    def _adaptive_selection(self, chunks: List[Dict], final_k: int):
+        """Adaptive depth loop shared by the sync and async selection.
+
+        A generator that cuts and deduplicates the candidates, yields each
+        deeper limit to search while too few distinct chunks remain and
+        expects the new candidates to be sent back; it returns (final
+        candidate list, selected chunks) through StopIteration.
+        """
+        limit = self.top_k
+        while True:
+            candidates = self._cut_tail(chunks)
+            selected = self._deduplicate_chunks(candidates, final_k=final_k, fill=False)
+            next_limit = self._next_depth(limit, chunks, candidates, selected, final_k)
+            if next_limit is None:
+                break
+            logger.info(f"Only {len(selected)} distinct chunks, fetching {next_limit} candidates")
+            limit = next_limit
+            chunks = yield limit
+        return chunks, self._deduplicate_chunks(candidates, final_k=final_k)
+
+    @timed("embedding")
+    def embed_queries(self, queries: List[str]) -> List[np.ndarray]:
+        """Embed several queries with one embeddings request.
+
+        Cached embeddings are reused; only the misses are sent to the API.
+
+        Args:
+            queries: User query texts
+
+        Returns:
+            Query embedding vectors (float32), in query order
+        """
+        embeddings: List[Optional[np.ndarray]] = [
+            self.embedding_cache.get(query, self.embedding_model) for query in queries
+        ]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        record_cache("embedding", True, len(queries) - len(misses))
+        record_cache("embedding", False, len(misses))
+        if not misses:
+            return embeddings
+
+        try:
+            with span("openai.embeddings", {"gen_ai.request.model": self.embedding_model}):
+                response = self.openai_client.embeddings.create(
+                    input=[queries[i] for i in misses],
+                    model=self.embedding_model
+                )
+                set_attributes(**usage_attributes(response.usage))
+        except Exception as e:
+            logger.error(f"Failed to embed queries: {e}")
+            raise
+
+        for item in response.data:
+            i = misses[item.index]
+            embeddings[i] = np.asarray(item.embedding, dtype=np.float32)
+            self.embedding_cache.set(queries[i], self.embedding_model, embeddings[i])
+        return embeddings
+
+    def _batched_search(self, hybrid: bool) -> bool:
+        """Whether retrieve_many can run all searches as one batched statement.
+
+        Only the default HNSW search is batched; the other modes run one
+        search per query.
+        """
+        return not (
+            hybrid or self.two_stage or self.binary_quantized or self.vector_store is not None
+        )
+
+    @timed("vector_query")
+    def _retrieve_similar_chunks_many(
+        self,
+        query_embeddings: List[np.ndarray],
+        domain_lists: List[Optional[List[str]]],
+        limit: int
+    ) -> List[List[Dict]]:
+        """Run the vector searches of several queries as one statement.
+
+        Args:
+            query_embeddings: Query vectors
+            domain_lists: Domains to filter by per query (None = no filter)
+            limit: Number of results per query
+
+        Returns:
+            Candidate chunks per query, in query order
+        """
+        params = {'limit': limit}
+        for i, (embedding, domains) in enumerate(zip(query_embeddings, domain_lists)):
+            params[f'embedding_{i}'] = np.asarray(embedding, dtype=np.float32)
+            params[f'domains_{i}'] = domains
+
+        try:
+            with self.engine.connect() as conn:
+                effective_ef_search = self._effective_ef_search(None, limit, exact=False)
+                if effective_ef_search is not None:
+                    self._execute(conn, SET_EF_SEARCH_SQL, {'ef_search': str(effective_ef_search)})
+
+                rows = self._execute(
+                    conn, batch_similarity_sql(len(query_embeddings), self.partitioned), params, binary=True
+                )
+        except Exception as e:
+            logger.error(f"Batched retrieval query failed: {e}")
+            raise
+
+        results: List[List[Dict]] = [[] for _ in query_embeddings]
+        for row in rows:
+            results[row[0]].extend(self._rows_to_candidates([row[1:]]))
+        return results
+
+    @traced("rag.retrieve")
+    def retrieve_many(
+        self,
+        queries: List[str],
+        final_k: int = 7,
+        adaptive: Optional[bool] = None,
+        hybrid: Optional[bool] = None
+    ) -> List[Dict]:
+        """Retrieve chunks for several queries at once.
+
+        Batches the per-query round trips of retrieve: all queries are
+        embedded in one request and classified concurrently on the shared
+        executor, the vector searches run as a single statement (a LATERAL
+        join over the query vectors, see batch_similarity_sql), and content
+        for all selected chunks is fetched with one query.
+
+        Args:
+            queries: User query texts
+            final_k: Number of final chunks per query (after deduplication)
+            adaptive: Override the service's adaptive depth setting
+            hybrid: Override the service's hybrid lexical + vector search setting
+
+        Returns:
+            One retrieval result per query, as returned by retrieve
+        """
+        if not queries:
+            return []
+        logger.info(f"Retrieving chunks for {len(queries)} queries")
+
+        if adaptive is None:
+            adaptive = self.adaptive
+        if hybrid is None:
+            hybrid = self.hybrid
+
+        try:
+            # Step 1: Classify concurrently while embedding in one request (the
+            # local centroid classifier needs the embeddings first)
+            if self.intent_router.centroid_classifier is not None:
+                query_embeddings = self.embed_queries(queries)
+                classification_futures = [
+                    self.executor.submit(self.intent_router.classify, query, embedding)
+                    for query, embedding in zip(queries, query_embeddings)
+                ]
+            else:
+                classification_futures = [
+                    self.executor.submit(self.intent_router.classify, query) for query in queries
+                ]
+                query_embeddings = self.embed_queries(queries)
+            classifications = [future.result() for future in classification_futures]
+
+            # Step 2: Retrieve similar chunks for all queries
+            domain_lists = []
+            for classification in classifications:
+                primary_domain = classification.get('primary_domain')
+                secondary_domains = classification.get('secondary_domains', [])
+                domain_lists.append(
+                    [primary_domain] + list(secondary_domains or []) if primary_domain else None
+                )
+
+            if self._batched_search(hybrid):
+                candidate_lists = self._retrieve_similar_chunks_many(query_embeddings, domain_lists, self.top_k)
+            else:
+                candidate_lists = list(self.executor.map(
+                    lambda args: self._retrieve_similar_chunks(
+                        query_embedding=args[1],
+                        primary_domain=args[2].get('primary_domain'),
+                        secondary_domains=args[2].get('secondary_domains', []),
+                        limit=self.top_k,
+                        query_text=args[0] if hybrid else None
+                    ),
+                    zip(queries, query_embeddings, classifications)
+                ))
+
+            # Step 3: Deduplicate each query's candidates
+            selections = [
+                self._select_chunks(
+                    chunks, embedding, classification.get('primary_domain'),
+                    classification.get('secondary_domains', []), final_k, adaptive,
+                    query if hybrid else None
+                )
+                for query, embedding, classification, chunks
+                in zip(queries, query_embeddings, classifications, candidate_lists)
+            ]
+
+            # Step 4: Fetch content for all survivors at once
+            contents, missing = self._cached_content([c for _, selected in selections for c in selected])
+            if missing:
+                with self.engine.connect() as conn:
+                    rows = self._execute(conn, CHUNK_CONTENT_SQL, {'ids': missing}, binary=True)
+                contents.update(self._rows_to_content(rows))
+
+            return [
+                self._build_result(
+                    query, classification, chunks, final_k, self._attach_content(selected, contents)
+                )
+                for query, classification, (chunks, selected)
+                in zip(queries, classifications, selections)
+            ]
+
+        except Exception as e:
+            logger.error(f"Batch retrieval failed: {e}")
+            return [self._error_result(query, e) for query in queries]
+
+    @staticmethod
+    def _filter_speculative(
+        candidates: List[Dict],
+        primary_domain: Optional[str],
+        secondary_domains: List[str],
+        limit: int
+    ) -> Optional[List[Dict]]:
+        """Apply the domain filter to speculative candidates.
+
+        Returns:
+            The first `limit` in-domain chunks, or None if there are too few
+            and the filtered search has to run instead
+        """
+        # Same predicate as DOMAIN_FILTER
+        domains = {primary_domain, *secondary_domains}
+        chunks = [
+            c for c in candidates
+            if c['metadata'].get('primary_domain') in domains
+            or domains.intersection(c['metadata'].get('secondary_domains') or [])
+        ][:limit]
+
+        if len(chunks) < limit:
+            # Too few in-domain candidates: run the filtered search
+            logger.info("Speculative search under-filled, running filtered search")
+            return None
+        return chunks
+
+    def _cut_tail(self, chunks: List[Dict]) -> List[Dict]:
+        """Cut candidates at the minimum score or the first similarity elbow.
+
+        Args:
+            chunks: Retrieved candidates
+
+        Returns:
+            Candidates above the cutoff, most similar first
+        """
+        kept = []
+        for chunk in sorted(chunks, key=lambda c: c['similarity'], reverse=True):
+            if chunk['similarity'] < self.min_similarity:
+                break
+            if kept and kept[-1]['similarity'] - chunk['similarity'] > self.similarity_drop:
+                break
+            kept.append(chunk)
+        return kept
+
+    def _next_depth(
+        self,
+        limit: int,
+        chunks: List[Dict],
+        candidates: List[Dict],
+        selected: List[Dict],
+        final_k: int
+    ) -> Optional[int]:
+        """Next candidate limit for adaptive retrieval, or None to stop.
+
+        Deeper results can only help if the current ones are all above the
+        cutoff and the search was not already exhausted.
+        """
+        if len(selected) >= final_k or len(chunks) < limit:
+            return None
+        if len(candidates) < len(chunks) or limit >= self.max_k:
+            return None
+        return min(limit * 2, self.max_k)
+
+    def _build_result(
+        self,
+        query: str,
+        classification: Dict,
+        chunks: List[Dict],
+        final_k: int,
+        selected: List[Dict]
+    ) -> Dict:
+        """Build the retrieval result from the candidates and the selected chunks."""
+        logger.info(f"Retrieved {len(chunks)} initial chunks")
+
+        # Candidate embeddings are only needed for MMR
+        deduplicated_chunks = [
+            {key: value for key, value in chunk.items() if key != 'embedding'}
+            for chunk in selected
+        ]
+
+        logger.info(f"After deduplication: {len(deduplicated_chunks)} chunks")
+        set_attributes(**{
+            "rag.primary_domain": classification.get('primary_domain'),
+            "rag.chunks_retrieved": len(chunks),
+            "rag.chunks_selected": len(deduplicated_chunks)
+        })
+
+        return {
+            'query': query,
+            'classification': classification,
+            'chunks': deduplicated_chunks,
+            'total_retrieved': len(chunks),
+            'total_after_dedup': len(deduplicated_chunks)
+        }
+
+    @staticmethod
+    def _error_result(query: str, error: Exception) -> Dict:
+        """Fallback retrieval result when the pipeline fails."""
+        return {
+            'query': query,
+            'classification': {'primary_domain': 'school_culture', 'secondary_domains': []},
+            'chunks': [],
+            'total_retrieved': 0,
+            'total_after_dedup': 0,
+            'error': str(error)
+        }
+
+    def evaluate_recall(
+        self,
+        query_embeddings: List[List[float]],
+        k: int = 10,
+        ef_search: Optional[int] = None
+    ) -> Dict:
+        """Measure HNSW recall@k against an exact (sequential scan) search.
+
+        Args:
+            query_embeddings: Query vectors to evaluate
+            k: Number of neighbours to compare
+            ef_search: ef_search value to evaluate (defaults to the service setting)
+
+        Returns:
+            Dictionary with mean recall and average latency of both searches
+        """
+        recalls = []
+        ann_ms = []
+        exact_ms = []
+
+        for embedding in query_embeddings:
+            start = time.perf_counter()
+            approximate = self._retrieve_similar_chunks(embedding, limit=k, ef_search=ef_search)
+            ann_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            exact = self._retrieve_similar_chunks(embedding, limit=k, exact=True)
+            exact_ms.append((time.perf_counter() - start) * 1000)
+
+            recalls.append(recall_at_k(
+                [c['id'] for c in approximate],
+                [c['id'] for c in exact],
+                k
+            ))
+
+        count = len(recalls) or 1
+        return {
+            'k': k,
+            'ef_search': ef_search or self.session_ef_search,
+            'num_queries': len(recalls),
+            'recall': sum(recalls) / count,
+            'avg_ann_ms': sum(ann_ms) / count,
+            'avg_exact_ms': sum(exact_ms) / count
+        }
 
     def test_retrieval(self, test_queries: List[str]) -> List[Dict]:
         """Test retrieval with a list of queries.
@@ -239,8 +1669,7 @@ class RetrievalService:
             List of retrieval results
         """
         results = []
-        for query in test_queries:
-            result = self.retrieve(query)
+        for query, result in zip(test_queries, self.retrieve_many(test_queries)):
             results.append({
                 'query': query,
                 'primary_domain': result['classification']['primary_domain'],
@@ -0,0 +1,346 @@
+"""
+OpenTelemetry tracing for the RAG pipeline.
+
+One coach request becomes one trace: the request span opened by
+RequestContextMiddleware, the pipeline stages (see app.services.metrics.stage),
+the OpenAI calls and every SQL statement, whether executed through
+SQLAlchemy (instrument_engine) or as raw psycopg retrieval statements
+(db_span). Every span carries the request's X-Request-ID as `http.request_id`.
+
+Exporters are pluggable (EXPORTERS maps a name to a factory taking the
+configured file path):
+- none: tracing disabled (default)
+- console: spans printed to stdout
+- json: one span JSON object per line, for offline analysis
+- otlp_file: OTLP/JSON lines (the collector file exporter's format)
+- otlp: OTLP over HTTP (OTEL_EXPORTER_OTLP_ENDPOINT)
+
+opentelemetry-sdk is optional; without it (or with the "none" exporter)
+spans are no-ops.
+"""
+
+import functools
+import inspect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Longest SQL text recorded as db.statement
+MAX_STATEMENT_LENGTH = 2000
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_state = {'provider': None, 'tracer': None}
+
+
+class _NoopSpan:
+    """Stand-in yielded by span() while tracing is disabled."""
+
+    def set_attribute(self, key, value) -> None:
+        pass
+
+    def set_attributes(self, attributes) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+if OTEL_AVAILABLE:
+    class RequestIDSpanProcessor(SpanProcessor):
+        """Tag every span with the X-Request-ID of the request it belongs to."""
+
+        def on_start(self, span, parent_context=None) -> None:
+            request_id = _request_id.get()
+            if request_id is not None:
+                span.set_attribute("http.request_id", request_id)
+
+    class JSONLinesSpanExporter(SpanExporter):
+        """Append each finished span as one JSON object per line."""
+
+        def __init__(self, path: str):
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock = threading.Lock()
+
+        def export(self, spans) -> 'SpanExportResult':
+            lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+    class OTLPFileSpanExporter(JSONLinesSpanExporter):
+        """Append each batch as one OTLP/JSON ExportTraceServiceRequest line.
+
+        The format matches the OpenTelemetry Collector's file exporter, so the
+        files can be replayed into any OTLP backend.
+        """
+
+        def __init__(self, path: str):
+            try:
+                from google.protobuf.json_format import MessageToJson
+                from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+            except ImportError as e:
+                raise RuntimeError(
+                    "The otlp_file exporter needs opentelemetry-exporter-otlp-proto-common. "
+                    "Install it with: pip install opentelemetry-exporter-otlp-proto-http"
+                ) from e
+            super().__init__(path)
+            self._encode = lambda spans: MessageToJson(encode_spans(spans), indent=None)
+
+        def export(self, spans) -> 'SpanExportResult':
+            line = self._encode(spans) + "\n"
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            return SpanExportResult.SUCCESS
+
+
+def _otlp_exporter(path: str):
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    except ImportError as e:
+        raise RuntimeError(
+            "The otlp exporter needs opentelemetry-exporter-otlp-proto-http. "
+            "Install it with: pip install opentelemetry-exporter-otlp-proto-http"
+        ) from e
+    return OTLPSpanExporter()
+
+
+# exporter name -> factory(file path); add entries to plug in other exporters
+EXPORTERS: Dict[str, Callable] = {
+    'console': lambda path: ConsoleSpanExporter(),
+    'json': lambda path: JSONLinesSpanExporter(path),
+    'otlp_file': lambda path: OTLPFileSpanExporter(path),
+    'otlp': _otlp_exporter,
+}
+
+
+def setup_tracing(exporter: str, path: str, service_name: str) -> bool:
+    """Install a tracer provider exporting to the configured exporter.
+
+    Args:
+        exporter: Exporter name ("none" or a key of EXPORTERS)
+        path: Output file of the file exporters
+        service_name: service.name resource attribute
+
+    Returns:
+        Whether tracing is enabled
+
+    Raises:
+        ValueError: If the exporter is unknown
+    """
+    if exporter == "none":
+        return False
+    if exporter not in EXPORTERS:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+    if not OTEL_AVAILABLE:
+        logger.warning("Tracing disabled: opentelemetry-sdk is not installed")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(RequestIDSpanProcessor())
+    provider.add_span_processor(BatchSpanProcessor(EXPORTERS[exporter](path)))
+    _state['provider'] = provider
+    _state['tracer'] = provider.get_tracer("plccoach")
+    logger.info(f"Tracing enabled ({exporter} exporter)")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop exporting."""
+    provider = _state['provider']
+    if provider is not None:
+        provider.shutdown()
+    _state['provider'] = None
+    _state['tracer'] = None
+
+
+def tracing_enabled() -> bool:
+    """Whether setup_tracing installed an exporter."""
+    return _state['tracer'] is not None
+
+
+def set_request_id(request_id: Optional[str]):
+    """Set the request ID spans are tagged with.
+
+    Returns:
+        Token for reset_request_id
+    """
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    """Restore the request ID replaced by set_request_id."""
+    _request_id.reset(token)
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict] = None, server: bool = False) -> Iterator:
+    """Run the enclosed block in a child span of the current span.
+
+    Exceptions are recorded on the span and re-raised.
+
+    Args:
+        name: Span name
+        attributes: Initial span attributes
+        server: Mark the span as the server side of a request
+
+    Yields:
+        The span (a no-op stand-in while tracing is disabled)
+    """
+    tracer = _state['tracer']
+    if tracer is None:
+        yield NOOP_SPAN
+        return
+    kind = SpanKind.SERVER if server else SpanKind.INTERNAL
+    with tracer.start_as_current_span(name, kind=kind, attributes=attributes) as current:
+        yield current
+
+
+def traced(name: str):
+    """Decorator running every call of a function (sync or async) in a span.
+
+    Args:
+        name: Span name
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def set_attributes(**attributes) -> None:
+    """Set attributes on the current span (None values are skipped)."""
+    if _state['tracer'] is None:
+        return
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def usage_attributes(usage) -> Dict:
+    """gen_ai.usage.* span attributes of an OpenAI usage block.
+
+    Args:
+        usage: response.usage (None for responses without one)
+
+    Returns:
+        Attributes for set_attributes
+    """
+    if usage is None:
+        return {}
+    return {
+        "gen_ai.usage.input_tokens": usage.prompt_tokens,
+        "gen_ai.usage.output_tokens": getattr(usage, 'completion_tokens', None),
+    }
+
+
+def _statement_attributes(statement: str, engine_name: str) -> Dict:
+    return {
+        "db.system": "postgresql",
+        "db.statement": " ".join(statement.split())[:MAX_STATEMENT_LENGTH],
+        "db.engine": engine_name,
+    }
+
+
+def _statement_name(statement: str) -> str:
+    """Span name of a statement: its leading keyword (SELECT, WITH, ...)."""
+    keyword = statement.lstrip().split(None, 1)[:1]
+    return keyword[0].upper() if keyword else "SQL"
+
+
+@contextmanager
+def db_span(statement: str, engine_name: str) -> Iterator:
+    """Span for a statement executed on a raw driver cursor.
+
+    Statements run through SQLAlchemy are traced by instrument_engine;
+    this covers the retrieval statements executed directly on psycopg.
+
+    Args:
+        statement: SQL text
+        engine_name: Engine the connection came from
+    """
+    if _state['tracer'] is None:
+        yield NOOP_SPAN
+        return
+    with span(_statement_name(statement), _statement_attributes(statement, engine_name)) as current:
+        yield current
+
+
+def instrument_engine(engine: Engine, engine_name: str) -> None:
+    """Trace every statement a SQLAlchemy engine executes.
+
+    No-op while tracing is disabled, so engines created before
+    setup_tracing are not instrumented.
+
+    Args:
+        engine: Sync engine (pass async_engine.sync_engine for async engines)
+        engine_name: Name recorded as db.engine
+    """
+    if _state['tracer'] is None:
+        return
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        tracer = _state['tracer']
+        if tracer is None or context is None:
+            return
+        context._otel_span = tracer.start_span(
+            _statement_name(statement),
+            kind=SpanKind.CLIENT,
+            attributes=_statement_attributes(statement, engine_name)
+        )
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        current = getattr(context, '_otel_span', None)
+        if current is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                current.set_attribute("db.rows", cursor.rowcount)
+            current.end()
+
+    def handle_error(exception_context):
+        current = getattr(exception_context.execution_context, '_otel_span', None)
+        if current is not None:
+            current.record_exception(exception_context.original_exception)
+            current.set_status(Status(StatusCode.ERROR))
+            current.end()
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
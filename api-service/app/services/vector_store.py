@@ -0,0 +1,328 @@
+"""
+In-process vector store backends for the retrieval service.
+
+The corpus is a fixed set of books (tens of thousands of chunks), small
+enough to search by brute force in memory. NumpyVectorStore answers top-k
+queries from a snapshot exported out of Postgres:
+- embeddings.npy: unit-normalized float16 matrix (n x 3072), memory-mapped
+  read-only so forked uvicorn workers share the same page-cache pages
+- metadata.npy: compact structured array (book, chapter, pages, domain bitmasks)
+- chunks.json: ids, content and display fields, plus the domain/book tables
+
+pgvector (no vector store) remains the default backend. Snapshots record
+the corpus version they were exported at; the retrieval service falls back to
+pgvector while the live corpus has moved on.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from pgvector.psycopg import register_vector
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+EMBEDDINGS_FILE = "embeddings.npy"
+METADATA_FILE = "metadata.npy"
+CHUNKS_FILE = "chunks.json"
+
+METADATA_DTYPE = np.dtype([
+    ('book', np.int32),             # index into the books table
+    ('chapter_number', np.int32),   # -1 = unknown
+    ('page_start', np.int32),       # -1 = unknown
+    ('page_end', np.int32),         # -1 = unknown
+    ('primary_mask', np.uint64),    # bit of the primary domain
+    ('domain_mask', np.uint64),     # bits of the primary and secondary domains
+])
+
+# Rows are scored in blocks so float16 rows are upcast a block at a time
+BLOCK_ROWS = 4096
+
+EXPORT_SQL = """
+    SELECT id, content, embedding, book_id,
+        metadata->>'book_title', metadata->'authors', chapter_number,
+        metadata->>'chapter_title', page_start, page_end,
+        primary_domain, secondary_domains
+    FROM embeddings
+    ORDER BY id
+"""
+
+CORPUS_VERSION_SQL = "SELECT version FROM corpus_version WHERE id = 1"
+
+
+class VectorStore:
+    """In-process vector search backend interface."""
+
+    # Corpus version the data was taken at (None = unknown)
+    corpus_version: Optional[int] = None
+
+    def search(
+        self,
+        query_embedding,
+        domains: Optional[List[str]] = None,
+        limit: int = 10,
+        primary_only: bool = False
+    ) -> List[Dict]:
+        """Return the chunks most similar to the query, best first.
+
+        Chunks have the same shape as the pgvector backend's (id, content,
+        metadata, similarity, embedding).
+        """
+        raise NotImplementedError
+
+
+class NumpyVectorStore(VectorStore):
+    """Brute-force cosine search over a memory-mapped embedding snapshot."""
+
+    def __init__(self, path: str):
+        """Open a snapshot written by export_vector_store.
+
+        Args:
+            path: Snapshot directory
+        """
+        directory = Path(path)
+        self.embeddings = np.load(directory / EMBEDDINGS_FILE, mmap_mode='r')
+        self.metadata = np.load(directory / METADATA_FILE, mmap_mode='r')
+        with open(directory / CHUNKS_FILE, encoding='utf-8') as f:
+            chunks = json.load(f)
+        self.domains: List[str] = chunks['domains']
+        self.books: List[Dict] = chunks['books']
+        self.ids: List[str] = chunks['ids']
+        self.contents: List[str] = chunks['contents']
+        self.chapter_titles: List[Optional[str]] = chunks['chapter_titles']
+        self.corpus_version: Optional[int] = chunks.get('corpus_version')
+        self._domain_bits = {domain: np.uint64(1 << i) for i, domain in enumerate(self.domains)}
+        logger.info(f"Opened vector store {path}: {len(self.ids)} chunks, corpus version {self.corpus_version}")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _domain_rows(self, domains: Optional[List[str]], primary_only: bool) -> Optional[np.ndarray]:
+        """Rows matching the domain filter, or None for all rows."""
+        if not domains:
+            return None
+        query_mask = np.uint64(0)
+        for domain in domains:
+            query_mask |= self._domain_bits.get(domain, np.uint64(0))
+        masks = self.metadata['primary_mask' if primary_only else 'domain_mask']
+        return np.flatnonzero(masks & query_mask)
+
+    def _scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Dot products of the query with the selected rows."""
+        count = len(self.ids) if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, count)
+            block = self.embeddings[start:stop] if rows is None else self.embeddings[rows[start:stop]]
+            scores[start:stop] = block.astype(np.float32) @ query
+        return scores
+
+    def search(
+        self,
+        query_embedding,
+        domains: Optional[List[str]] = None,
+        limit: int = 10,
+        primary_only: bool = False
+    ) -> List[Dict]:
+        """Exact top-k cosine search with an optional domain filter.
+
+        Args:
+            query_embedding: Query vector
+            domains: Domains to match (None = no filter)
+            limit: Number of results to return
+            primary_only: Match the primary domain only (as in partitioned mode)
+
+        Returns:
+            List of similar chunks with ids, metadata and scores
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        rows = self._domain_rows(domains, primary_only)
+        scores = self._scores(query, rows)
+        if len(scores) == 0:
+            return []
+
+        top = np.argpartition(-scores, limit - 1)[:limit] if limit < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            self._chunk(int(i if rows is None else rows[i]), float(scores[i]))
+            for i in top
+        ]
+
+    def _chunk(self, row: int, similarity: float) -> Dict:
+        """Build a chunk dictionary for a snapshot row."""
+        meta = self.metadata[row]
+        book = self.books[meta['book']]
+        primary = [d for d, bit in self._domain_bits.items() if meta['primary_mask'] & bit]
+        return {
+            'id': self.ids[row],
+            'content': self.contents[row],
+            'metadata': {
+                'book_id': book['book_id'],
+                'book_title': book['book_title'],
+                'authors': book['authors'],
+                'chapter_number': _optional(meta['chapter_number']),
+                'chapter_title': self.chapter_titles[row],
+                'page_start': _optional(meta['page_start']),
+                'page_end': _optional(meta['page_end']),
+                'primary_domain': primary[0] if primary else None,
+                'secondary_domains': [
+                    d for d, bit in self._domain_bits.items()
+                    if meta['domain_mask'] & bit and d not in primary
+                ]
+            },
+            'similarity': similarity,
+            'embedding': self.embeddings[row].astype(np.float32)
+        }
+
+
+def _optional(value) -> Optional[int]:
+    value = int(value)
+    return None if value < 0 else value
+
+
+def read_corpus_version(engine: Engine) -> Optional[int]:
+    """Read the live corpus version.
+
+    Args:
+        engine: psycopg 3 engine (see retrieval_service.psycopg_url)
+
+    Returns:
+        Corpus version number, or None if the version row is missing
+    """
+    with engine.connect() as conn:
+        with conn.connection.dbapi_connection.cursor() as cursor:
+            cursor.execute(CORPUS_VERSION_SQL)
+            row = cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+def export_vector_store(
+    engine: Engine,
+    path: str,
+    corpus_version: Optional[int] = None,
+    dtype=np.float16
+) -> int:
+    """Export the embeddings table into a NumpyVectorStore snapshot.
+
+    Args:
+        engine: psycopg 3 engine (see retrieval_service.psycopg_url)
+        path: Snapshot directory (created if missing)
+        corpus_version: Corpus version the snapshot was taken at
+        dtype: Storage type of the embedding matrix
+
+    Returns:
+        Number of exported chunks
+    """
+    with engine.connect() as conn:
+        dbapi_connection = conn.connection.dbapi_connection
+        register_vector(dbapi_connection)
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(EXPORT_SQL, binary=True)
+            rows = cursor.fetchall()
+
+    return write_vector_store(rows, path, corpus_version, dtype)
+
+
+def write_vector_store(
+    rows: List[tuple],
+    path: str,
+    corpus_version: Optional[int] = None,
+    dtype=np.float16
+) -> int:
+    """Write a NumpyVectorStore snapshot from embeddings rows.
+
+    Files are written next to the targets and renamed into place, so workers
+    opening the snapshot never see a partial file.
+
+    Args:
+        rows: Rows in EXPORT_SQL column order
+        path: Snapshot directory (created if missing)
+        corpus_version: Corpus version the rows were read at
+        dtype: Storage type of the embedding matrix
+
+    Returns:
+        Number of written chunks
+    """
+    domains = sorted({d for row in rows for d in [row[10], *(row[11] or [])] if d})
+    if len(domains) > 64:
+        raise ValueError(f"Too many domains for a 64-bit mask: {len(domains)}")
+    domain_bits = {domain: 1 << i for i, domain in enumerate(domains)}
+
+    books: List[Dict] = []
+    book_index: Dict[Optional[str], int] = {}
+    embeddings = np.empty((len(rows), len(rows[0][2]) if rows else 0), dtype=dtype)
+    metadata = np.empty(len(rows), dtype=METADATA_DTYPE)
+
+    for i, row in enumerate(rows):
+        book_id = row[3]
+        if book_id not in book_index:
+            book_index[book_id] = len(books)
+            books.append({'book_id': book_id, 'book_title': row[4], 'authors': row[5] or []})
+
+        vector = np.asarray(row[2], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        embeddings[i] = vector / norm if norm > 0 else vector
+
+        primary_mask = domain_bits.get(row[10], 0)
+        domain_mask = primary_mask
+        for domain in row[11] or []:
+            domain_mask |= domain_bits[domain]
+        metadata[i] = (
+            book_index[book_id],
+            -1 if row[6] is None else row[6],
+            -1 if row[8] is None else row[8],
+            -1 if row[9] is None else row[9],
+            primary_mask,
+            domain_mask
+        )
+
+    chunks = {
+        'corpus_version': corpus_version,
+        'domains': domains,
+        'books': books,
+        'ids': [str(row[0]) for row in rows],
+        'contents': [row[1] for row in rows],
+        'chapter_titles': [row[7] for row in rows]
+    }
+
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, write in (
+        (EMBEDDINGS_FILE, lambda f: np.save(f, embeddings)),
+        (METADATA_FILE, lambda f: np.save(f, metadata)),
+        (CHUNKS_FILE, lambda f: f.write(json.dumps(chunks, ensure_ascii=False).encode('utf-8'))),
+    ):
+        tmp = directory / f".{name}.tmp"
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, directory / name)
+
+    logger.info(f"Exported {len(rows)} chunks ({len(domains)} domains, {len(books)} books) to {path}")
+    return len(rows)
+
+
+def open_vector_store(backend: str, path: str) -> Optional[VectorStore]:
+    """Open the configured vector store backend.
+
+    Args:
+        backend: "pgvector" (search in Postgres) or "numpy"
+        path: Snapshot directory for the numpy backend
+
+    Returns:
+        Vector store, or None for the pgvector backend
+    """
+    if backend == "pgvector":
+        return None
+    if backend == "numpy":
+        return NumpyVectorStore(path)
+    raise ValueError(f"Unknown vector backend: {backend}")
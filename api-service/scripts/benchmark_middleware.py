@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Request Middleware Benchmark
+
+Measures the per-request overhead of the request ID / access log middleware
+by calling ASGI apps directly (no server or HTTP client in the loop):
+- bare: the endpoints without middleware
+- before: the BaseHTTPMiddleware pair RequestContextMiddleware replaced
+  (RequestIDMiddleware + LoggingMiddleware, reproduced below)
+- after: RequestContextMiddleware
+
+Overhead is the difference to the bare app, for a JSON endpoint and a
+streaming endpoint. Access records are written to os.devnull.
+
+Usage:
+    python scripts/benchmark_middleware.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.middleware import request_context
+from app.middleware.request_context import RequestContextMiddleware
+
+legacy_logger = logging.getLogger("benchmark.legacy")
+
+STREAM_CHUNKS = 20
+
+
+class LegacyRequestIDMiddleware(BaseHTTPMiddleware):
+    """The former app/middleware/request_id.py."""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The former app/middleware/logging.py."""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        request_id = getattr(request.state, "request_id", "unknown")
+        legacy_logger.info(json.dumps({
+            "event": "request",
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "query_params": str(request.query_params),
+            "client_host": request.client.host if request.client else None,
+        }))
+        response = await call_next(request)
+        duration_ms = (time.time() - start_time) * 1000
+        legacy_logger.info(json.dumps({
+            "event": "response",
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration_ms": round(duration_ms, 2),
+        }))
+        return response
+
+
+def build_app(stack: str) -> FastAPI:
+    """Build the benchmark app with the given middleware stack."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(STREAM_CHUNKS):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    if stack == "before":
+        app.add_middleware(LegacyLoggingMiddleware)
+        app.add_middleware(LegacyRequestIDMiddleware)
+    elif stack == "after":
+        app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def call(app, path: str) -> None:
+    """Send one GET request through the ASGI app and drain the response."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Like a server: nothing more arrives until the client disconnects
+            await asyncio.Future()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, path: str, requests: int, warmup: int) -> np.ndarray:
+    """Per-request latencies (microseconds) of sequential requests."""
+    for _ in range(warmup):
+        await call(app, path)
+    latencies = np.empty(requests)
+    for i in range(requests):
+        start = time.perf_counter()
+        await call(app, path)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark request middleware overhead")
+    parser.add_argument('--requests', type=int, default=5000, help='Measured requests per stack and endpoint')
+    parser.add_argument('--warmup', type=int, default=500, help='Unmeasured requests first')
+
+    args = parser.parse_args()
+
+    # Both stacks log every request, to the same sink
+    devnull = open(os.devnull, 'w')
+    legacy_handler = logging.StreamHandler(devnull)
+    legacy_handler.setFormatter(logging.Formatter('%(message)s'))
+    legacy_logger.addHandler(legacy_handler)
+    legacy_logger.propagate = False
+    legacy_logger.setLevel(logging.INFO)
+    request_context.stop_access_log()
+    request_context.start_access_log(logging.StreamHandler(devnull))
+    request_context.logger.setLevel(logging.INFO)
+
+    async def run():
+        results = {}
+        for path in ("/ping", "/stream"):
+            for stack in ("bare", "before", "after"):
+                results[(path, stack)] = await measure(build_app(stack), path, args.requests, args.warmup)
+        return results
+
+    results = asyncio.run(run())
+    request_context.stop_access_log()
+
+    print(f"{'endpoint':<10} {'stack':<8} {'mean_us':>9} {'p50_us':>9} {'p99_us':>9} {'overhead_us':>12}")
+    for path in ("/ping", "/stream"):
+        bare = results[(path, "bare")].mean()
+        for stack in ("bare", "before", "after"):
+            latencies = results[(path, stack)]
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(
+                f"{path:<10} {stack:<8} {latencies.mean():>9.1f} {p50:>9.1f} {p99:>9.1f} "
+                f"{latencies.mean() - bare:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compact Index Benchmark
+
+Samples stored chunk embeddings as queries and compares each search mode
+(HNSW on halfvec, two-stage Matryoshka prefix, binary quantization) against
+the exact sequential scan: mean latency, recall@k and the on-disk size of the
+index each mode walks (a proxy for the memory it needs to stay fast).
+
+Usage:
+    python scripts/benchmark_quantization.py --queries 50 --k 7 --rerank-candidates 300
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+from db_config import get_database_url
+from app.services.retrieval_service import RetrievalService
+from evaluate_recall import sample_query_embeddings
+
+# Load environment
+load_dotenv()
+
+# mode -> (service flags, relation whose size is reported)
+MODES = {
+    'hnsw': ({}, 'ix_embeddings_embedding_hnsw'),
+    'two_stage': ({'two_stage': True}, 'ix_embeddings_embedding_short_hnsw'),
+    'binary': ({'binary_quantized': True}, 'ix_embeddings_embedding_bit_hnsw'),
+}
+
+
+def relation_size(service: RetrievalService, relation: str) -> int:
+    """Total size in bytes of a relation, summed over its partitions.
+
+    Args:
+        service: Retrieval service (its engine is reused)
+        relation: Table or index name
+
+    Returns:
+        Size in bytes (0 if the relation does not exist)
+    """
+    with service.engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass(:name)"), {'name': relation}).scalar() is None:
+            return 0
+        return conn.execute(
+            text("SELECT COALESCE(SUM(pg_table_size(relid)), 0) FROM pg_partition_tree(:name)"),
+            {'name': relation}
+        ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare compact vector indexes against exact search")
+    parser.add_argument('--queries', type=int, default=50, help='Number of sampled query vectors')
+    parser.add_argument('--k', type=int, default=7, help='Neighbours to compare')
+    parser.add_argument('--rerank-candidates', type=int, default=300,
+                        help='Coarse candidates reranked in the two-stage modes')
+    parser.add_argument('--ef-search', type=int, default=None, help='HNSW ef_search override')
+
+    args = parser.parse_args()
+
+    service = RetrievalService(database_url=get_database_url(), rerank_candidates=args.rerank_candidates)
+    query_embeddings = sample_query_embeddings(service, args.queries)
+
+    if not query_embeddings:
+        print("No embeddings found. Load content first.")
+        sys.exit(1)
+
+    table_mb = relation_size(service, 'embeddings') / 2**20
+    print(f"Benchmarking recall@{args.k} over {len(query_embeddings)} queries")
+    print(f"{'mode':>10} {'recall':>8} {'ann_ms':>8} {'exact_ms':>9} {'size_mb':>9}")
+
+    exact_ms = []
+    for mode, (flags, relation) in MODES.items():
+        service.two_stage = flags.get('two_stage', False)
+        service.binary_quantized = flags.get('binary_quantized', False)
+        result = service.evaluate_recall(query_embeddings, k=args.k, ef_search=args.ef_search)
+        exact_ms.append(result['avg_exact_ms'])
+        print(
+            f"{mode:>10} {result['recall']:>8.3f} {result['avg_ann_ms']:>8.1f} "
+            f"{result['avg_exact_ms']:>9.1f} {relation_size(service, relation) / 2**20:>9.1f}"
+        )
+
+    print(f"{'exact':>10} {1.0:>8.3f} {sum(exact_ms) / len(exact_ms):>8.1f} {'':>9} {table_mb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,10 @@ from tenacity import (
     retry_if_exception_type
 )
 
+# Add api-service to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from app.services.matryoshka import PREFIX_DIMENSION, truncate_normalize
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -48,6 +52,7 @@ class EmbeddingGenerator:
     # OpenAI pricing (as of 2024)
     COST_PER_MILLION_TOKENS = 0.13  # text-embedding-3-large
     EMBEDDING_DIMENSION = 3072
+    SHORT_EMBEDDING_DIMENSION = PREFIX_DIMENSION  # Normalized Matryoshka prefix
     MODEL = "text-embedding-3-large"
 
     def __init__(self, api_key: Optional[str] = None, batch_size: int = 100):
@@ -131,6 +136,9 @@ class EmbeddingGenerator:
                 for chunk, embedding in zip(batch, embeddings):
                     chunk_with_embedding = chunk.copy()
                     chunk_with_embedding["embedding"] = embedding
+                    chunk_with_embedding["embedding_short"] = truncate_normalize(
+                        embedding, self.SHORT_EMBEDDING_DIMENSION
+                    ).tolist()
                     chunk_with_embedding["embedding_model"] = self.MODEL
                     chunk_with_embedding["embedding_dimension"] = self.EMBEDDING_DIMENSION
                     embedded_chunks.append(chunk_with_embedding)
@@ -289,6 +297,7 @@ class EmbeddingPipeline:
                 "chunks": embedded_chunks,
                 "embedding_model": self.generator.MODEL,
                 "embedding_dimension": self.generator.EMBEDDING_DIMENSION,
+                "short_embedding_dimension": self.generator.SHORT_EMBEDDING_DIMENSION,
                 "embedding_date": datetime.utcnow().isoformat(),
                 "source_file": book_name,
                 "processing_time_seconds": elapsed_time
@@ -27,6 +27,7 @@ from tqdm import tqdm
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from db_config import get_database_url
+from app.services.matryoshka import truncate_normalize
 
 # Configure logging
 logging.basicConfig(
@@ -131,14 +132,31 @@ class EmbeddingUploader:
                         'token_count': embedding.get('token_count')
                     }
 
-                    # Insert embedding
+                    # Insert embedding; filter/dedup fields also go to typed columns
                     conn.execute(text("""
-                        INSERT INTO embeddings (content, embedding, metadata)
-                        VALUES (:content, :embedding::vector, :metadata::jsonb)
+                        INSERT INTO embeddings (
+                            content, embedding, embedding_short, metadata,
+                            book_id, chapter_number, page_start, page_end,
+                            primary_domain, secondary_domains
+                        )
+                        VALUES (
+                            :content, CAST(:embedding AS vector), CAST(:embedding_short AS vector), CAST(:metadata AS jsonb),
+                            :book_id, :chapter_number, :page_start, :page_end,
+                            :primary_domain, :secondary_domains
+                        )
                     """), {
                         'content': embedding.get('content'),
                         'embedding': embedding.get('embedding'),
-                        'metadata': json.dumps(metadata)
+                        # Files from before 03 stored prefixes: derive it here
+                        'embedding_short': embedding.get('embedding_short')
+                        or truncate_normalize(embedding['embedding']).tolist(),
+                        'metadata': json.dumps(metadata),
+                        'book_id': metadata['book_id'],
+                        'chapter_number': metadata['chapter_number'],
+                        'page_start': metadata['page_start'],
+                        'page_end': metadata['page_end'],
+                        'primary_domain': metadata['primary_domain'],
+                        'secondary_domains': metadata['secondary_domains'] or []
                     })
 
                 conn.commit()
@@ -165,9 +183,9 @@ class EmbeddingUploader:
                     SELECT
                         content,
                         metadata,
-                        1 - (embedding <=> :query_embedding::vector) as similarity
+                        1 - (embedding <=> CAST(:query_embedding AS vector)) as similarity
                     FROM embeddings
-                    ORDER BY embedding <=> :query_embedding::vector
+                    ORDER BY embedding <=> CAST(:query_embedding AS vector)
                     LIMIT :limit
                 """), {
                     'query_embedding': query_embedding,
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+HNSW Recall Evaluation
+
+Samples stored chunk embeddings as queries and compares the HNSW search
+against an exact sequential scan for a range of hnsw.ef_search values.
+Use the output to pick RETRIEVAL_EF_SEARCH for a given latency budget.
+
+Usage:
+    python scripts/evaluate_recall.py --queries 50 --k 10 --ef-search 20 40 80 160
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+from db_config import get_database_url
+from app.services.retrieval_service import RetrievalService
+
+# Load environment
+load_dotenv()
+
+
+def sample_query_embeddings(service: RetrievalService, count: int):
+    """Sample stored embeddings to use as query vectors.
+
+    Args:
+        service: Retrieval service (its engine is reused)
+        count: Number of vectors to sample
+
+    Returns:
+        List of embedding vectors
+    """
+    with service.engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT embedding::text FROM embeddings ORDER BY random() LIMIT :count"),
+            {'count': count}
+        )
+        # pgvector's text format '[1,2,3]' is valid JSON
+        return [json.loads(row[0]) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure HNSW recall@k against exact search")
+    parser.add_argument('--queries', type=int, default=50, help='Number of sampled query vectors')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours to compare')
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[20, 40, 80, 160],
+                        help='ef_search values to sweep')
+
+    args = parser.parse_args()
+
+    service = RetrievalService(database_url=get_database_url())
+    query_embeddings = sample_query_embeddings(service, args.queries)
+
+    if not query_embeddings:
+        print("No embeddings found. Load content first.")
+        sys.exit(1)
+
+    print(f"Evaluating recall@{args.k} over {len(query_embeddings)} queries")
+    print(f"{'ef_search':>10} {'recall':>8} {'ann_ms':>8} {'exact_ms':>9}")
+
+    for ef_search in args.ef_search:
+        result = service.evaluate_recall(query_embeddings, k=args.k, ef_search=ef_search)
+        print(
+            f"{ef_search:>10} {result['recall']:>8.3f} "
+            f"{result['avg_ann_ms']:>8.1f} {result['avg_exact_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
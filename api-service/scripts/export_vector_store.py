@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Vector Store Export
+
+Exports the embeddings table into the memory-mapped snapshot read by the
+in-process numpy backend (RETRIEVAL_VECTOR_BACKEND=numpy). Re-run after
+every content load, then restart the API so workers map the new files.
+
+Usage:
+    python scripts/export_vector_store.py --path data/vector_store
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+from db_config import get_database_url
+from app.config import settings
+from app.services.retrieval_service import psycopg_url
+from app.services.vector_store import export_vector_store, read_corpus_version
+
+# Load environment
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export embeddings for the in-process vector store")
+    parser.add_argument('--path', default=settings.retrieval_vector_store_path, help='Snapshot directory')
+    parser.add_argument('--float32', action='store_true', help='Store float32 instead of float16 vectors')
+
+    args = parser.parse_args()
+
+    engine = create_engine(psycopg_url(get_database_url()))
+    # Read before the rows: a write in between makes the snapshot look stale, never current
+    corpus_version = read_corpus_version(engine)
+    count = export_vector_store(
+        engine,
+        args.path,
+        corpus_version=corpus_version,
+        dtype='float32' if args.float32 else 'float16'
+    )
+
+    if not count:
+        print("No embeddings found. Load content first.")
+        sys.exit(1)
+
+    print(f"Exported {count} chunks (corpus version {corpus_version}) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI Server
+
+A local stand-in for the OpenAI endpoints the coach calls, for load tests
+that should not spend real API money:
+- POST /v1/embeddings: deterministic unit vectors (float or base64 encoding)
+- POST /v1/chat/completions: function calls (legacy `functions` and `tools`),
+  plain completions and streamed completions
+
+Outputs depend only on the request, so repeated runs see identical answers,
+classifications and embeddings. Latencies are drawn from seeded log-normal
+distributions (median and sigma per endpoint) plus a per-token delay, so the
+service time shape of the real API can be approximated.
+
+Usage:
+    python scripts/fake_openai_server.py --port 8100 --generation-latency 900:0.5 --token-ms 15
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+DEFAULT_DIMENSIONS = 3072
+
+# Context headers as written by ContextPacker._compact_header
+SOURCE_PATTERN = re.compile(
+    r'^Source \d+: (.+)(?: by (.+?)| \(authors as above\))\n'
+    r'Chapter (\S+): (.+?), pp\. (\S+)$',
+    re.MULTILINE
+)
+
+# Citations in the answer, at most
+MAX_CITATIONS = 3
+
+
+class Latency:
+    """Log-normal service time distribution."""
+
+    def __init__(self, median_ms: float, sigma: float = 0.0):
+        """Initialize the distribution.
+
+        Args:
+            median_ms: Median latency in milliseconds
+            sigma: Standard deviation of the underlying normal (0 = constant)
+        """
+        self.median_ms = median_ms
+        self.sigma = sigma
+
+    @classmethod
+    def parse(cls, spec: str) -> 'Latency':
+        """Parse a "median_ms[:sigma]" command-line value."""
+        median, _, sigma = spec.partition(':')
+        return cls(float(median), float(sigma or 0.0))
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(rng.gauss(0.0, self.sigma) if self.sigma else 0.0) / 1000
+
+
+def _seed(*parts: str) -> int:
+    """Stable 64-bit seed for request content."""
+    return int.from_bytes(hashlib.sha256("\x00".join(parts).encode('utf-8')).digest()[:8], 'big')
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def fake_embedding(text: str, model: str, dimensions: int = DEFAULT_DIMENSIONS) -> np.ndarray:
+    """Deterministic unit vector for a text.
+
+    Args:
+        text: Input text
+        model: Embedding model (part of the seed, like a real model change)
+        dimensions: Vector length
+
+    Returns:
+        Unit-normalized float32 vector
+    """
+    vector = np.random.default_rng(_seed(model, text)).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def fake_arguments(schema: Dict, text: str) -> Dict:
+    """Deterministic function-call arguments satisfying a JSON schema.
+
+    Enum values are picked by hashing the text, so the same query is always
+    routed the same way while different queries spread across the values.
+
+    Args:
+        schema: Function `parameters` schema
+        text: Text the choice is derived from
+
+    Returns:
+        Arguments dictionary
+    """
+    rng = random.Random(_seed(text))
+    arguments = {}
+    for name, prop in schema.get('properties', {}).items():
+        kind = prop.get('type')
+        if 'enum' in prop:
+            arguments[name] = rng.choice(prop['enum'])
+        elif kind == 'array':
+            options = [v for v in prop.get('items', {}).get('enum', []) if v not in arguments.values()]
+            arguments[name] = rng.sample(options, min(len(options), rng.randint(0, 2)))
+        elif kind == 'boolean':
+            arguments[name] = False
+        elif kind in ('number', 'integer'):
+            arguments[name] = round(rng.uniform(0.7, 0.99), 2) if kind == 'number' else 1
+        elif name in schema.get('required', []):
+            arguments[name] = ""
+    return arguments
+
+
+def fake_answer(prompt: str) -> str:
+    """Deterministic answer citing the sources found in the prompt.
+
+    Args:
+        prompt: Text of the chat messages
+
+    Returns:
+        Answer in the coach's format, with a "📚 Sources:" section
+    """
+    citations = []
+    authors_by_book = {}
+    for match in SOURCE_PATTERN.finditer(prompt):
+        book, authors, chapter, chapter_title, pages = match.groups()
+        authors = authors or authors_by_book.get(book, "Unknown")
+        authors_by_book.setdefault(book, authors)
+        citation = f"- *{book}* by {authors}, Chapter {chapter}: {chapter_title}, pp. {pages}"
+        if citation not in citations:
+            citations.append(citation)
+
+    rng = random.Random(_seed(prompt))
+    focus = rng.choice(["shared learning targets", "common formative assessments", "collective inquiry",
+                        "team norms", "timely intervention"])
+    answer = (
+        f"Teams that make progress here start from {focus} and revisit them in every meeting. "
+        "Agree on what students must learn, check the evidence together and adjust instruction "
+        "before the unit ends.\n\n"
+        "Key takeaways:\n"
+        "- Keep the work focused on learning, not teaching\n"
+        "- Use evidence from common assessments to decide next steps\n"
+    )
+    if citations:
+        answer += "\n📚 Sources:\n" + "\n".join(citations[:MAX_CITATIONS])
+    return answer
+
+
+def _prompt_text(messages: List[Dict]) -> str:
+    """Concatenate the text content of chat messages."""
+    parts = []
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, list):
+            content = " ".join(part.get('text', '') for part in content if isinstance(part, dict))
+        parts.append(content or "")
+    return "\n".join(parts)
+
+
+def _split_tokens(text: str) -> List[str]:
+    """Split text into stream deltas of roughly one token each."""
+    return re.findall(r'\s*\S+|\s+', text)
+
+
+def create_app(
+    seed: int = 0,
+    embedding_latency: Optional[Latency] = None,
+    classification_latency: Optional[Latency] = None,
+    generation_latency: Optional[Latency] = None,
+    token_ms: float = 0.0
+) -> FastAPI:
+    """Create the fake OpenAI application.
+
+    Args:
+        seed: Seed of the latency draws
+        embedding_latency: Service time of /v1/embeddings
+        classification_latency: Service time of function-call completions
+        generation_latency: Service time of other completions (time to first
+            token when streaming)
+        token_ms: Added delay per generated token (between stream deltas)
+
+    Returns:
+        FastAPI application serving the /v1 routes
+    """
+    app = FastAPI(title="Fake OpenAI")
+    rng = random.Random(seed)
+    embedding_latency = embedding_latency or Latency(0)
+    classification_latency = classification_latency or Latency(0)
+    generation_latency = generation_latency or Latency(0)
+    stats = {'embeddings': 0, 'classifications': 0, 'completions': 0, 'streams': 0}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+        model = body.get('model', 'text-embedding-3-large')
+        dimensions = body.get('dimensions') or DEFAULT_DIMENSIONS
+        stats['embeddings'] += 1
+        await asyncio.sleep(embedding_latency.sample(rng))
+
+        data = []
+        for index, text in enumerate(inputs):
+            vector = fake_embedding(str(text), model, dimensions)
+            if body.get('encoding_format') == 'base64':
+                embedding = base64.b64encode(vector.tobytes()).decode('ascii')
+            else:
+                embedding = vector.tolist()
+            data.append({'object': 'embedding', 'index': index, 'embedding': embedding})
+
+        tokens = sum(_count_tokens(str(text)) for text in inputs)
+        return {
+            'object': 'list',
+            'data': data,
+            'model': model,
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get('model', 'gpt-4o')
+        prompt = _prompt_text(body.get('messages', []))
+        prompt_tokens = _count_tokens(prompt)
+        completion_id = f"chatcmpl-fake{_seed(prompt):016x}"
+        created = int(time.time())
+
+        functions = body.get('functions') or [t['function'] for t in body.get('tools') or []]
+        if functions:
+            stats['classifications'] += 1
+            function = _chosen_function(functions, body)
+            arguments = json.dumps(fake_arguments(function.get('parameters', {}), prompt))
+            if body.get('tools'):
+                message = {'role': 'assistant', 'content': None, 'tool_calls': [{
+                    'id': f"call_{completion_id[-12:]}",
+                    'type': 'function',
+                    'function': {'name': function['name'], 'arguments': arguments}
+                }]}
+                finish_reason = 'tool_calls'
+            else:
+                message = {'role': 'assistant', 'content': None,
+                           'function_call': {'name': function['name'], 'arguments': arguments}}
+                finish_reason = 'function_call'
+            await asyncio.sleep(classification_latency.sample(rng))
+            return _completion(completion_id, created, model, message, finish_reason,
+                               prompt_tokens, _count_tokens(arguments))
+
+        answer = fake_answer(prompt)
+        tokens = _split_tokens(answer)
+        first_token = generation_latency.sample(rng)
+
+        if body.get('stream'):
+            stats['streams'] += 1
+
+            async def stream():
+                await asyncio.sleep(first_token)
+                yield _sse(completion_id, created, model, {'role': 'assistant', 'content': ''})
+                for token in tokens:
+                    if token_ms:
+                        await asyncio.sleep(token_ms / 1000)
+                    yield _sse(completion_id, created, model, {'content': token})
+                yield _sse(completion_id, created, model, {}, finish_reason='stop')
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(stream(), media_type="text/event-stream")
+
+        stats['completions'] += 1
+        await asyncio.sleep(first_token + len(tokens) * token_ms / 1000)
+        return _completion(completion_id, created, model, {'role': 'assistant', 'content': answer},
+                           'stop', prompt_tokens, len(tokens))
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def _chosen_function(functions: List[Dict], body: Dict) -> Dict:
+    """The function named by function_call/tool_choice, else the first one."""
+    choice = body.get('function_call') or body.get('tool_choice')
+    if isinstance(choice, dict):
+        name = choice.get('name') or choice.get('function', {}).get('name')
+        for function in functions:
+            if function['name'] == name:
+                return function
+    return functions[0]
+
+
+def _completion(
+    completion_id: str,
+    created: int,
+    model: str,
+    message: Dict,
+    finish_reason: str,
+    prompt_tokens: int,
+    completion_tokens: int
+) -> Dict:
+    """Build a chat.completion response body."""
+    return {
+        'id': completion_id,
+        'object': 'chat.completion',
+        'created': created,
+        'model': model,
+        'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason}],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    }
+
+
+def _sse(completion_id: str, created: int, model: str, delta: Dict, finish_reason: Optional[str] = None) -> str:
+    """Encode one chat.completion.chunk server-sent event."""
+    chunk = {
+        'id': completion_id,
+        'object': 'chat.completion.chunk',
+        'created': created,
+        'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a deterministic local stand-in for the OpenAI API")
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address')
+    parser.add_argument('--port', type=int, default=8100, help='Port to listen on')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the latency draws')
+    parser.add_argument('--embedding-latency', type=Latency.parse, default=Latency(60, 0.3),
+                        help='Embedding latency as median_ms[:sigma]')
+    parser.add_argument('--classification-latency', type=Latency.parse, default=Latency(450, 0.4),
+                        help='Function-call completion latency as median_ms[:sigma]')
+    parser.add_argument('--generation-latency', type=Latency.parse, default=Latency(600, 0.5),
+                        help='Completion latency (time to first token) as median_ms[:sigma]')
+    parser.add_argument('--token-ms', type=float, default=12.0, help='Delay per generated token')
+
+    args = parser.parse_args()
+
+    app = create_app(
+        seed=args.seed,
+        embedding_latency=args.embedding_latency,
+        classification_latency=args.classification_latency,
+        generation_latency=args.generation_latency,
+        token_ms=args.token_ms
+    )
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
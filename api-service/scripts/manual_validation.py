@@ -27,6 +27,8 @@ import numpy as np
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
+from app.services.matryoshka import truncate_normalize
+
 # Load environment
 load_dotenv()
 
@@ -156,7 +158,7 @@ def setup_sample_data():
         # Clear existing sample data
         result = conn.execute(text("""
             DELETE FROM embeddings
-            WHERE metadata->>'book_id' LIKE 'sample-book-%'
+            WHERE book_id LIKE 'sample-book-%'
         """))
         conn.commit()
         print(f"   Cleared {result.rowcount} existing sample records")
@@ -167,13 +169,29 @@ def setup_sample_data():
             embedding = generate_mock_embedding(chunk['content'])
 
             # Insert into database
+            metadata = chunk['metadata']
             conn.execute(text("""
-                INSERT INTO embeddings (content, embedding, metadata)
-                VALUES (:content, :embedding, :metadata)
+                INSERT INTO embeddings (
+                    content, embedding, embedding_short, metadata,
+                    book_id, chapter_number, page_start, page_end,
+                    primary_domain, secondary_domains
+                )
+                VALUES (
+                    :content, :embedding, :embedding_short, :metadata,
+                    :book_id, :chapter_number, :page_start, :page_end,
+                    :primary_domain, :secondary_domains
+                )
             """), {
                 'content': chunk['content'],
                 'embedding': embedding,
-                'metadata': json.dumps(chunk['metadata'])
+                'embedding_short': truncate_normalize(embedding).tolist(),
+                'metadata': json.dumps(metadata),
+                'book_id': metadata.get('book_id'),
+                'chapter_number': metadata.get('chapter_number'),
+                'page_start': metadata.get('page_start'),
+                'page_end': metadata.get('page_end'),
+                'primary_domain': metadata.get('primary_domain'),
+                'secondary_domains': metadata.get('secondary_domains') or []
             })
 
             print(f"   ✅ Inserted chunk {i}: {chunk['metadata']['book_title'][:50]}...")
@@ -225,28 +243,30 @@ def test_semantic_retrieval():
     database_url = get_database_url()
     retrieval_service = RetrievalService(database_url=database_url)
 
-    test_query = "What are the four critical questions?"
-
-    print(f"\n📝 Query: \"{test_query}\"")
-    print(f"🔍 Searching for top 3 relevant chunks...")
-
-    result = retrieval_service.retrieve(
-        query=test_query,
-        final_k=3
-    )
+    test_queries = [
+        "What are the four critical questions?",
+        "How do we create common formative assessments?",
+        "What are effective team norms?"
+    ]
 
-    chunks = result.get('chunks', [])
-    print(f"\n✅ Found {len(chunks)} results (from {result.get('total_retrieved', 0)} initial):")
-    for i, chunk in enumerate(chunks, 1):
-        metadata = chunk['metadata']
-        print(f"\n   Result {i}:")
-        print(f"   📚 Book: {metadata.get('book_title', 'Unknown')}")
-        print(f"   👥 Authors: {', '.join(metadata.get('authors', ['Unknown']))}")
-        print(f"   📖 Chapter {metadata.get('chapter_number', '?')}: {metadata.get('chapter_title', 'Unknown')}")
-        print(f"   📄 Pages: {metadata.get('page_start', '?')}-{metadata.get('page_end', '?')}")
-        print(f"   🎯 Domain: {metadata.get('primary_domain', 'unknown')}")
-        print(f"   📏 Similarity: {chunk.get('similarity', 0):.4f}")
-        print(f"   📝 Preview: {chunk['content'][:100]}...")
+    print(f"\n🔍 Searching for top 3 relevant chunks for {len(test_queries)} queries (one batch)...")
+
+    results = retrieval_service.retrieve_many(test_queries, final_k=3)
+
+    for test_query, result in zip(test_queries, results):
+        chunks = result.get('chunks', [])
+        print(f"\n📝 Query: \"{test_query}\"")
+        print(f"✅ Found {len(chunks)} results (from {result.get('total_retrieved', 0)} initial):")
+        for i, chunk in enumerate(chunks, 1):
+            metadata = chunk['metadata']
+            print(f"\n   Result {i}:")
+            print(f"   📚 Book: {metadata.get('book_title', 'Unknown')}")
+            print(f"   👥 Authors: {', '.join(metadata.get('authors', ['Unknown']))}")
+            print(f"   📖 Chapter {metadata.get('chapter_number', '?')}: {metadata.get('chapter_title', 'Unknown')}")
+            print(f"   📄 Pages: {metadata.get('page_start', '?')}-{metadata.get('page_end', '?')}")
+            print(f"   🎯 Domain: {metadata.get('primary_domain', 'unknown')}")
+            print(f"   📏 Similarity: {chunk.get('similarity', 0):.4f}")
+            print(f"   📝 Preview: {chunk['content'][:100]}...")
 
     print("\n" + "=" * 70)
 
@@ -359,7 +379,7 @@ def cleanup_sample_data():
     with engine.connect() as conn:
         result = conn.execute(text("""
             DELETE FROM embeddings
-            WHERE metadata->>'book_id' LIKE 'sample-book-%'
+            WHERE book_id LIKE 'sample-book-%'
         """))
         conn.commit()
         print(f"\n✅ Removed {result.rowcount} sample records")
@@ -0,0 +1,66 @@
+"""Tests for the semantic answer cache."""
+import numpy as np
+
+from app.services.answer_cache import SemanticAnswerCache
+
+RESPONSE = {'response': 'Four critical questions...', 'citations': [], 'domains': ['school_culture']}
+
+
+def _vector(*values, dimension=4):
+    vector = np.zeros(dimension, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector
+
+
+def test_lookup_hits_within_threshold():
+    """A near-identical query embedding returns the cached answer."""
+    cache = SemanticAnswerCache(threshold=0.95, max_entries=4, dimension=4)
+    cache.store(_vector(1.0, 0.0), ['school_culture'], corpus_version=1, response=RESPONSE)
+
+    hit = cache.lookup(_vector(1.0, 0.1), corpus_version=1)
+
+    assert hit['response'] == RESPONSE
+    assert hit['domains'] == ['school_culture']
+    assert hit['similarity'] > 0.99
+
+
+def test_lookup_misses_below_threshold():
+    """A dissimilar query is a miss."""
+    cache = SemanticAnswerCache(threshold=0.95, max_entries=4, dimension=4)
+    cache.store(_vector(1.0, 0.0), ['assessment'], corpus_version=1, response=RESPONSE)
+
+    assert cache.lookup(_vector(0.5, 0.5), corpus_version=1) is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_corpus_version_change_invalidates_entries():
+    """Reloading the embeddings table drops every cached answer."""
+    cache = SemanticAnswerCache(threshold=0.95, max_entries=4, dimension=4)
+    cache.store(_vector(1.0), ['assessment'], corpus_version=1, response=RESPONSE)
+
+    assert cache.lookup(_vector(1.0), corpus_version=2) is None
+    stats = cache.stats()
+    assert stats['size'] == 0
+    assert stats['invalidations'] == 1
+    assert stats['corpus_version'] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    """When full, the least recently used slot is replaced."""
+    cache = SemanticAnswerCache(threshold=0.99, max_entries=2, dimension=4)
+    cache.store(_vector(1.0), ['a'], 1, {'response': 'a'})
+    cache.store(_vector(0.0, 1.0), ['b'], 1, {'response': 'b'})
+    cache.lookup(_vector(1.0), 1)
+    cache.store(_vector(0.0, 0.0, 1.0), ['c'], 1, {'response': 'c'})
+
+    assert cache.lookup(_vector(0.0, 1.0), 1) is None
+    assert cache.lookup(_vector(1.0), 1)['response'] == {'response': 'a'}
+
+
+def test_zero_vector_is_ignored():
+    """Degenerate embeddings are neither stored nor matched."""
+    cache = SemanticAnswerCache(max_entries=2, dimension=4)
+    cache.store(_vector(), ['a'], 1, RESPONSE)
+
+    assert cache.lookup(_vector(), 1) is None
+    assert cache.stats()['size'] == 0
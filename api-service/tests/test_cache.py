@@ -0,0 +1,99 @@
+"""Tests for the shared LRU cache component."""
+from unittest.mock import MagicMock, patch
+
+from app.services.cache import CacheBackend, LRUCache, PostgresCacheBackend
+
+
+class DictBackend(CacheBackend):
+    """In-memory stand-in for the shared tier."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl_seconds):
+        self.values[key] = value
+
+
+def test_get_and_set():
+    """Values round-trip through the local tier."""
+    cache = LRUCache()
+    cache.set("key", {"primary_domain": "assessment"})
+
+    assert cache.get("key") == {"primary_domain": "assessment"}
+    assert "key" in cache
+    assert cache.stats()['hits'] == 1
+
+
+def test_max_entries_evicts_least_recently_used():
+    """The cache never grows past max_entries."""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_sweep_removes_expired_entries_without_lookups():
+    """Expired entries are swept even if never looked up again."""
+    cache = LRUCache(ttl_seconds=10, sweep_interval_seconds=1000)
+    with patch('app.services.cache.time.monotonic', return_value=0.0):
+        cache.set("a", 1)
+        cache.set("b", 2)
+    with patch('app.services.cache.time.monotonic', return_value=20.0):
+        removed = cache.sweep()
+
+    assert removed == 2
+    assert len(cache) == 0
+    assert cache.stats()['expirations'] == 2
+
+
+def test_set_sweeps_periodically():
+    """Writes trigger a sweep once the sweep interval has passed."""
+    with patch('app.services.cache.time.monotonic', return_value=0.0):
+        cache = LRUCache(ttl_seconds=10, sweep_interval_seconds=30)
+        cache.set("old", 1)
+    with patch('app.services.cache.time.monotonic', return_value=31.0):
+        cache.set("new", 2)
+
+    assert len(cache) == 1
+
+
+def test_shared_backend_hit_is_promoted_locally():
+    """A value found in the shared tier is served locally afterwards."""
+    backend = DictBackend()
+    backend.values["key"] = "shared-value"
+    cache = LRUCache(backend=backend)
+
+    assert cache.get("key") == "shared-value"
+    assert cache.get("key") == "shared-value"
+
+    stats = cache.stats()
+    assert stats['shared_hits'] == 1
+    assert stats['hits'] == 1
+    assert stats['hit_rate'] == 1.0
+
+
+def test_set_writes_through_to_backend():
+    """Writes reach the shared tier so other workers can use them."""
+    backend = DictBackend()
+    LRUCache(backend=backend).set("key", "value")
+
+    assert backend.values == {"key": "value"}
+
+
+def test_postgres_backend_swallows_errors():
+    """Database failures are treated as misses and dropped writes."""
+    engine = MagicMock()
+    engine.connect.side_effect = RuntimeError("database unavailable")
+    engine.begin.side_effect = RuntimeError("database unavailable")
+    backend = PostgresCacheBackend(engine, namespace="test")
+
+    assert backend.get("key") is None
+    backend.set("key", {"a": 1}, ttl_seconds=60)
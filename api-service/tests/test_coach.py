@@ -0,0 +1,179 @@
+"""Tests for the AI coach query endpoint (Story 2.8)."""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import coach
+from app.services.answer_cache import SemanticAnswerCache
+
+client = TestClient(app)
+
+CHUNK = {
+    'id': 'chunk-1',
+    'content': 'The four critical questions...',
+    'metadata': {'book_title': 'Learning by Doing', 'chapter_number': 1},
+    'similarity': 0.9
+}
+
+
+@pytest.fixture
+def services():
+    """Override the coach dependencies with mocks and a small answer cache."""
+    retrieval = MagicMock()
+    retrieval.aget_corpus_version = AsyncMock(return_value=1)
+    retrieval.aembed_query = AsyncMock(return_value=np.ones(8, dtype=np.float32))
+    retrieval.aclassify = AsyncMock(
+        return_value={'primary_domain': 'school_culture', 'secondary_domains': ['collaboration']}
+    )
+    retrieval.start_query_tasks = lambda query: (
+        asyncio.ensure_future(retrieval.aembed_query(query)),
+        asyncio.ensure_future(retrieval.aclassify(query))
+    )
+    retrieval.aretrieve = AsyncMock(return_value={
+        'classification': {'primary_domain': 'school_culture', 'secondary_domains': ['collaboration']},
+        'chunks': [CHUNK]
+    })
+
+    generation = MagicMock()
+    generation.agenerate = AsyncMock(return_value={
+        'response': 'Focus on the four critical questions.',
+        'citations': [],
+        'token_usage': 1200,
+        'cost_usd': 0.01
+    })
+
+    answer_cache = SemanticAnswerCache(threshold=0.95, max_entries=4, dimension=8)
+
+    app.dependency_overrides[coach.get_retrieval_service] = lambda: retrieval
+    app.dependency_overrides[coach.get_generation_service] = lambda: generation
+    app.dependency_overrides[coach.get_answer_cache] = lambda: answer_cache
+    yield retrieval, generation, answer_cache
+    app.dependency_overrides.clear()
+
+
+def test_query_coach_returns_generated_answer(services):
+    """A cache miss runs retrieval and generation."""
+    retrieval, generation, _ = services
+
+    response = client.post("/api/coach/query", json={"query": "What are the four critical questions?"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['response'] == 'Focus on the four critical questions.'
+    assert data['domains'] == ['school_culture', 'collaboration']
+    assert data['cached'] is False
+    retrieval.aretrieve.assert_awaited_once()
+    generation.agenerate.assert_awaited_once()
+
+
+def test_query_coach_serves_paraphrase_from_answer_cache(services):
+    """A semantically equivalent query skips retrieval and generation."""
+    retrieval, generation, _ = services
+
+    client.post("/api/coach/query", json={"query": "What are the four critical questions?"})
+    response = client.post("/api/coach/query", json={"query": "what are the 4 critical questions"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['cached'] is True
+    assert data['token_usage'] == 0
+    assert data['response'] == 'Focus on the four critical questions.'
+    assert retrieval.aretrieve.await_count == 1
+    assert generation.agenerate.await_count == 1
+
+
+def test_query_coach_hands_in_flight_query_tasks_to_retrieval(services):
+    """On a miss, retrieval reuses the embedding and classification started for the lookup."""
+    retrieval, _, _ = services
+
+    client.post("/api/coach/query", json={"query": "What are the four critical questions?"})
+
+    embedding_task, _ = retrieval.aretrieve.call_args.kwargs['query_tasks']
+    assert embedding_task.done()
+    retrieval.aembed_query.assert_awaited_once()
+    retrieval.aclassify.assert_called_once()
+
+
+def test_query_coach_does_not_cache_ungrounded_answers(services):
+    """Answers generated without sources are not stored."""
+    retrieval, _, answer_cache = services
+    retrieval.aretrieve.return_value = {
+        'classification': {'primary_domain': 'school_culture', 'secondary_domains': []},
+        'chunks': []
+    }
+
+    client.post("/api/coach/query", json={"query": "Unrelated question"})
+
+    assert answer_cache.stats()['size'] == 0
+
+
+def test_query_coach_retrieval_error_returns_500(services):
+    """Retrieval failures surface as a 500."""
+    retrieval, _, _ = services
+    retrieval.aretrieve.return_value = {'error': 'database unavailable'}
+
+    response = client.post("/api/coach/query", json={"query": "What are the four critical questions?"})
+
+    assert response.status_code == 500
+
+
+def _events(body):
+    """Parse a server-sent event stream into (event, data) pairs."""
+    import json
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_query_stream_sends_metadata_tokens_then_citations(services):
+    """The stream starts with retrieval metadata and ends with citations."""
+    _, generation, _ = services
+    citation = {
+        'book_title': 'Learning by Doing', 'authors': 'DuFour', 'chapter': 1,
+        'chapter_title': 'A Guide', 'pages': '1-2', 'is_valid': True
+    }
+
+    async def astream(query, chunks):
+        yield {'type': 'token', 'text': 'Focus on '}
+        yield {'type': 'token', 'text': 'the questions.'}
+        yield {'type': 'citation', 'citation': citation}
+        yield {'type': 'done', 'response': 'Focus on the questions.', 'citations': [citation],
+               'token_usage': 900, 'cost_usd': 0.01}
+
+    generation.astream = astream
+
+    response = client.post("/api/coach/query/stream", json={"query": "What are the four critical questions?"})
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = _events(response.text)
+    assert [e for e, _ in events] == ['metadata', 'token', 'token', 'citation', 'citations']
+    assert events[0][1]['domains'] == ['school_culture', 'collaboration']
+    assert events[0][1]['sources'][0]['book_title'] == 'Learning by Doing'
+    assert events[-1][1]['citations'][0]['pages'] == '1-2'
+    assert events[-1][1]['token_usage'] == 900
+
+
+def test_query_stream_retrieval_error_returns_500(services):
+    """Retrieval failures are reported before the stream starts."""
+    retrieval, _, _ = services
+    retrieval.aretrieve.return_value = {'error': 'database unavailable'}
+
+    response = client.post("/api/coach/query/stream", json={"query": "What are the four critical questions?"})
+
+    assert response.status_code == 500
+
+
+def test_query_coach_returns_server_timing(services):
+    """The response breaks request time down by pipeline stage."""
+    response = client.post("/api/coach/query", json={"query": "How do teams set norms?"})
+
+    assert response.status_code == 200
+    assert "total;dur=" in response.headers["Server-Timing"]
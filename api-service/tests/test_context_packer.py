@@ -0,0 +1,110 @@
+"""Tests for token-budgeted context packing."""
+from unittest.mock import patch
+
+import pytest
+
+from app.services.context_packer import FALLBACK_ENCODING, NO_SOURCES_CONTEXT, ContextPacker
+
+
+class WhitespaceEncoding:
+    """Deterministic stand-in for a tiktoken encoding: one token per word."""
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def _chunk(chunk_id, words=50, similarity=0.9, book="Learning by Doing", chapter=1):
+    return {
+        'id': chunk_id,
+        'content': " ".join(f"{chunk_id}{i}" for i in range(words)),
+        'metadata': {
+            'book_title': book,
+            'authors': ['Richard DuFour', 'Rebecca DuFour'],
+            'chapter_number': chapter,
+            'chapter_title': 'A Guide to Action',
+            'page_start': 10,
+            'page_end': 12
+        },
+        'similarity': similarity
+    }
+
+
+@pytest.fixture
+def packer():
+    return ContextPacker(token_budget=200, min_source_tokens=20, encoding=WhitespaceEncoding())
+
+
+def test_pack_orders_sources_by_similarity(packer):
+    """The most similar chunk is Source 1 regardless of input order."""
+    result = packer.pack([_chunk('low', words=10, similarity=0.5), _chunk('high', words=10, similarity=0.9)])
+
+    assert result['context'].index('high0') < result['context'].index('low0')
+    assert result['context'].startswith('Source 1:')
+
+
+def test_pack_compacts_repeated_book_headers(packer):
+    """Authors are only spelled out the first time a book appears."""
+    result = packer.pack([_chunk('a', words=10), _chunk('b', words=10, chapter=2)])
+
+    assert result['context'].count('Richard DuFour') == 1
+    assert 'Learning by Doing (authors as above)' in result['context']
+
+
+def test_pack_trims_then_drops_the_tail(packer):
+    """Sources past the budget are trimmed, then dropped."""
+    chunks = [
+        _chunk('a', words=120, similarity=0.9),
+        _chunk('b', words=120, similarity=0.8),
+        _chunk('c', words=120, similarity=0.7),
+    ]
+
+    result = packer.pack(chunks)
+
+    assert result['sources_included'] == 2
+    assert result['sources_trimmed'] == 1
+    assert result['sources_dropped'] == 1
+    assert result['included'] == [0, 1]
+    assert 'c0' not in result['context']
+    assert result['tokens'] <= packer.token_budget + 5
+    assert result['tokens_saved'] > 0
+
+
+def test_pack_keeps_best_source_when_budget_is_tiny():
+    """Even a tiny budget keeps a trimmed excerpt of the best source."""
+    packer = ContextPacker(token_budget=5, min_source_tokens=10, encoding=WhitespaceEncoding())
+
+    result = packer.pack([_chunk('a', words=100)])
+
+    assert result['sources_included'] == 1
+    assert result['sources_trimmed'] == 1
+    assert 'a0' in result['context']
+
+
+def test_pack_without_chunks(packer):
+    """No chunks yields the no-sources context."""
+    result = packer.pack([])
+
+    assert result['context'] == NO_SOURCES_CONTEXT
+    assert result['sources_included'] == 0
+
+
+def test_count_tokens_without_tokenizer_approximates():
+    """Without a tokenizer, tokens are approximated from character count."""
+    packer = ContextPacker(encoding=False)
+
+    assert packer.count_tokens("x" * 40) == 10
+
+
+def test_unknown_model_falls_back_to_o200k_encoding():
+    """A tiktoken release that predates the model still counts with real tokens."""
+    packer = ContextPacker(model="gpt-4o")
+    encoding = WhitespaceEncoding()
+
+    with patch('app.services.context_packer.tiktoken.encoding_for_model', side_effect=KeyError("gpt-4o")), \
+            patch('app.services.context_packer.tiktoken.get_encoding', return_value=encoding) as get_encoding:
+        assert packer.count_tokens("four critical questions") == 3
+
+    get_encoding.assert_called_once_with(FALLBACK_ENCODING)
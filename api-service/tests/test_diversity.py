@@ -0,0 +1,48 @@
+"""Tests for page-range deduplication and MMR selection."""
+import numpy as np
+
+from app.services.diversity import PageIntervalIndex, mmr_select
+
+
+def test_interval_index_detects_overlaps_per_book():
+    """Overlap is checked only against ranges from the same book."""
+    index = PageIntervalIndex()
+    index.add('book-1', 10, 12)
+    index.add('book-1', 30, 35)
+
+    assert index.overlaps('book-1', 12, 14)
+    assert index.overlaps('book-1', 1, 40)
+    assert index.overlaps('book-1', 31, 31)
+    assert not index.overlaps('book-1', 13, 29)
+    assert not index.overlaps('book-2', 10, 12)
+
+
+def test_interval_index_ignores_missing_pages():
+    """Chunks without page numbers never overlap."""
+    index = PageIntervalIndex()
+    index.add('book-1', None, None)
+
+    assert not index.overlaps('book-1', None, 3)
+    assert not index.overlaps('book-1', 1, 3)
+
+
+def test_mmr_without_embeddings_orders_by_relevance():
+    """Without embeddings MMR reduces to relevance order."""
+    assert mmr_select(np.array([0.2, 0.9, 0.5]), None, k=2) == [1, 2]
+
+
+def test_mmr_trades_relevance_for_diversity():
+    """A near-duplicate loses to a less relevant but different candidate."""
+    relevance = np.array([0.9, 0.88, 0.8])
+    embeddings = np.array([[1.0, 0.0], [0.99, 0.1], [0.0, 1.0]])
+
+    assert mmr_select(relevance, embeddings, k=2, lambda_=0.5) == [0, 2]
+    assert mmr_select(relevance, embeddings, k=2, lambda_=1.0) == [0, 1]
+
+
+def test_mmr_respects_allowed_and_preselected():
+    """Rejected candidates are skipped and preselected ones are kept."""
+    relevance = np.array([0.9, 0.8, 0.7, 0.6])
+
+    assert mmr_select(relevance, None, k=3, allowed=lambda i: i != 1) == [0, 2, 3]
+    assert mmr_select(relevance, None, k=3, selected=[3]) == [3, 0, 1]
@@ -0,0 +1,81 @@
+"""Tests for the query embedding cache."""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache, normalize_query
+
+MODEL = "text-embedding-3-large"
+
+
+def test_normalize_query_collapses_case_whitespace_and_punctuation():
+    """Trivially different phrasings normalize to the same text."""
+    assert normalize_query("  What are the  four\tcritical questions? ") == \
+        "what are the four critical questions"
+
+
+def test_get_returns_cached_embedding_for_equivalent_query():
+    """A normalized-equal query hits the in-process tier."""
+    cache = EmbeddingCache()
+    cache.set("What are the four critical questions?", MODEL, [0.1, 0.2, 0.3])
+
+    embedding = cache.get("what are the four critical questions", MODEL)
+
+    assert embedding.dtype == np.float32
+    np.testing.assert_allclose(embedding, [0.1, 0.2, 0.3], rtol=1e-6)
+    assert cache.stats()['hits'] == 1
+
+
+def test_cache_key_includes_model():
+    """Different models never share an entry."""
+    cache = EmbeddingCache()
+    cache.set("query", MODEL, [0.1])
+
+    assert cache.get("query", "text-embedding-3-small") is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction_when_full():
+    """The least recently used entry is evicted past max_entries."""
+    cache = EmbeddingCache(max_entries=2)
+    cache.set("a", MODEL, [1.0])
+    cache.set("b", MODEL, [2.0])
+    cache.get("a", MODEL)
+    cache.set("c", MODEL, [3.0])
+
+    assert cache.get("b", MODEL) is None
+    assert cache.get("a", MODEL) is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_expired_entries_are_misses():
+    """Entries past their TTL are dropped on lookup."""
+    cache = EmbeddingCache(ttl_seconds=10)
+    with patch('app.services.cache.time.monotonic', return_value=100.0):
+        cache.set("a", MODEL, [1.0])
+    with patch('app.services.cache.time.monotonic', return_value=111.0):
+        assert cache.get("a", MODEL) is None
+
+    assert cache.stats()['size'] == 0
+
+
+def test_shared_tier_failure_is_a_miss():
+    """Shared tier errors are logged and treated as misses."""
+    engine = MagicMock()
+    engine.connect.side_effect = RuntimeError("database unavailable")
+    cache = EmbeddingCache(engine=engine)
+
+    assert cache.get("a", MODEL) is None
+    assert cache.stats()['misses'] == 1
+
+
+def test_stats_hit_rate():
+    """Hit rate counts hits over all lookups."""
+    cache = EmbeddingCache()
+    cache.set("a", MODEL, [1.0])
+    cache.get("a", MODEL)
+    cache.get("b", MODEL)
+
+    stats = cache.stats()
+    assert stats['hit_rate'] == 0.5
+    assert stats['shared_tier'] is False
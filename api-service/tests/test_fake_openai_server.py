@@ -0,0 +1,103 @@
+"""Tests for the fake OpenAI server used by the load test."""
+import importlib.util
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.generation_service import GenerationService
+from app.services.intent_router import DOMAINS, IntentRouter
+
+spec = importlib.util.spec_from_file_location(
+    "fake_openai_server",
+    Path(__file__).parent.parent / 'scripts' / 'fake_openai_server.py'
+)
+fake_openai_server = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fake_openai_server)
+
+
+@pytest.fixture
+def client():
+    app = fake_openai_server.create_app()
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return AsyncOpenAI(api_key="fake", base_url="http://fake/v1", http_client=http_client)
+
+
+def _chunk(book, chapter):
+    return {
+        'content': "Teams agree on essential outcomes.",
+        'metadata': {
+            'book_title': book, 'authors': ['DuFour', 'Eaker'], 'chapter_number': chapter,
+            'chapter_title': 'Essentials', 'page_start': 10, 'page_end': 12
+        },
+        'similarity': 0.8
+    }
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_deterministic_unit_vectors(client):
+    """The client's base64 encoding round-trips; equal inputs give equal vectors."""
+    response = await client.embeddings.create(input=["a", "b", "a"], model="text-embedding-3-large")
+    vectors = [np.asarray(item.embedding, dtype=np.float32) for item in response.data]
+
+    assert len(vectors[0]) == fake_openai_server.DEFAULT_DIMENSIONS
+    assert np.linalg.norm(vectors[0]) == pytest.approx(1.0, abs=1e-5)
+    assert np.array_equal(vectors[0], vectors[2])
+    assert not np.array_equal(vectors[0], vectors[1])
+
+
+@pytest.mark.asyncio
+async def test_function_call_classifies_into_known_domains(client):
+    """The intent router parses the fake function call like a real one."""
+    router = IntentRouter(api_key="fake")
+    router.async_client = client
+
+    result = await router.aclassify("How do teams write common assessments?")
+
+    assert result['primary_domain'] in DOMAINS
+    assert set(result['secondary_domains']) <= set(DOMAINS) - {result['primary_domain']}
+
+    # A fresh router (empty cache) gets the same classification
+    other = IntentRouter(api_key="fake")
+    other.async_client = client
+    assert await other.aclassify("How do teams write common assessments?") == result
+
+
+@pytest.mark.asyncio
+async def test_generation_cites_prompt_sources(client):
+    """Answers cite the sources in the prompt, so citation parsing is exercised."""
+    service = GenerationService(api_key="fake")
+    service.async_client = client
+    chunks = [_chunk('Learning by Doing', 2), _chunk('Taking Action', 5)]
+
+    result = await service.agenerate("How do we start?", chunks)
+
+    assert 'error' not in result
+    assert [c['book_title'] for c in result['citations']] == ['Learning by Doing', 'Taking Action']
+    assert result['token_usage'] > 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_answer_matches_completion(client):
+    """Streaming yields the same deterministic answer as a plain completion."""
+    messages = [{'role': 'user', 'content': "Source 1: Learning by Doing by DuFour\nChapter 1: Intro, pp. 1-3\n"}]
+    completion = await client.chat.completions.create(model="gpt-4o", messages=messages)
+    stream = await client.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
+    streamed = "".join([chunk.choices[0].delta.content or "" async for chunk in stream])
+
+    assert streamed == completion.choices[0].message.content
+    assert "*Learning by Doing* by DuFour, Chapter 1: Intro, pp. 1-3" in streamed
+
+
+def test_latency_parse_and_sample():
+    """Latency specs are median_ms[:sigma]; sigma 0 is constant."""
+    import random
+
+    constant = fake_openai_server.Latency.parse("250")
+    assert constant.sample(random.Random(0)) == pytest.approx(0.25)
+
+    spread = fake_openai_server.Latency.parse("100:0.5")
+    samples = [spread.sample(random.Random(i)) for i in range(200)]
+    assert min(samples) < 0.1 < max(samples)
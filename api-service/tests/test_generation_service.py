@@ -0,0 +1,179 @@
+"""Tests for response generation with citations (Story 2.7)."""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.context_packer import ContextPacker
+from app.services.generation_service import GenerationService
+
+CHUNK = {
+    'id': 'chunk-1',
+    'content': 'The four critical questions...',
+    'metadata': {
+        'book_title': 'Learning by Doing',
+        'authors': ['DuFour'],
+        'chapter_number': 1,
+        'chapter_title': 'A Guide to Action',
+        'page_start': 10,
+        'page_end': 12
+    },
+    'similarity': 0.9
+}
+
+
+class WhitespaceEncoding:
+    """Deterministic stand-in for a tiktoken encoding: one token per word."""
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+class FakeStream:
+    """Async iterator over chat completion chunks."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+
+@pytest.fixture
+def service():
+    """Generation service with a whitespace tokenizer (no tokenizer download)."""
+    service = GenerationService(api_key="test-key")
+    service.context_packer = ContextPacker(encoding=WhitespaceEncoding())
+    return service
+
+
+@pytest.mark.asyncio
+async def test_astream_yields_tokens_and_incremental_citations(service):
+    """Citations are emitted once their line completes, then a final done event."""
+    deltas = [
+        "Use the four questions.\n\n📚 Sources:\n",
+        "- *Learning by Doing* by DuFour, Chapter 1: ",
+        "A Guide to Action, pp. 10-12\n",
+        "- *Unknown Book* by Nobody, Chapter 9: Nope, pp. 1-2\n",
+    ]
+
+    with patch.object(service.async_client.chat.completions, 'create',
+                      new=AsyncMock(return_value=FakeStream(deltas))) as create:
+        events = [event async for event in service.astream("query", [CHUNK])]
+
+    assert create.call_args.kwargs['stream'] is True
+    types = [e['type'] for e in events]
+    assert types == ['token', 'token', 'token', 'citation', 'token', 'done']
+    assert events[3]['citation']['book_title'] == 'Learning by Doing'
+    assert events[-1]['response'] == "".join(deltas)
+    assert len(events[-1]['citations']) == 1
+    assert events[-1]['token_usage'] > 0
+
+
+@pytest.mark.asyncio
+async def test_astream_emits_citation_on_unterminated_last_line(service):
+    """A citation on the final line is emitted even without a trailing newline."""
+    deltas = [
+        "Use the four questions.\n\n📚 Sources:\n",
+        "- *Learning by Doing* by DuFour, Chapter 1: ",
+        "A Guide to Action, pp. 10-12",
+    ]
+
+    with patch.object(service.async_client.chat.completions, 'create',
+                      new=AsyncMock(return_value=FakeStream(deltas))):
+        events = [event async for event in service.astream("query", [CHUNK])]
+
+    assert [e['type'] for e in events] == ['token', 'token', 'token', 'citation', 'done']
+    assert events[3]['citation']['pages'] == '10-12'
+    assert len(events[-1]['citations']) == 1
+
+
+@pytest.mark.asyncio
+async def test_astream_final_citations_match_streamed_events(service):
+    """Mixed citation formats end up in the final list exactly as streamed."""
+    second = {**CHUNK, 'metadata': {**CHUNK['metadata'], 'book_title': 'Taking Action', 'chapter_number': 4}}
+    deltas = [
+        "📚 Sources:\n",
+        "- *Learning by Doing* by DuFour, Chapter 1: A Guide to Action, pp. 10-12\n",
+        "- Taking Action by DuFour, Chapter 4: Teams, pp. 40-44",
+    ]
+
+    with patch.object(service.async_client.chat.completions, 'create',
+                      new=AsyncMock(return_value=FakeStream(deltas))):
+        events = [event async for event in service.astream("query", [CHUNK, second])]
+
+    streamed = [e['citation'] for e in events if e['type'] == 'citation']
+    assert [c['book_title'] for c in streamed] == ['Learning by Doing', 'Taking Action']
+    assert events[-1]['citations'] == streamed
+
+
+@pytest.mark.asyncio
+async def test_astream_without_sources_returns_fallback(service):
+    """No retrieved chunks yields the fallback answer without calling GPT-4o."""
+    events = [event async for event in service.astream("query", [])]
+
+    assert [e['type'] for e in events] == ['token', 'done']
+    assert events[-1]['citations'] == []
+
+
+@pytest.mark.asyncio
+async def test_astream_reports_errors(service):
+    """Failures surface as an error event."""
+    with patch.object(service.async_client.chat.completions, 'create',
+                      new=AsyncMock(side_effect=RuntimeError("rate limited"))):
+        events = [event async for event in service.astream("query", [CHUNK])]
+
+    assert events == [{'type': 'error', 'error': 'rate limited'}]
+
+
+def test_generate_reports_context_tokens_saved(service):
+    """Non-streaming results include the context packing report."""
+    from unittest.mock import MagicMock
+
+    response = MagicMock()
+    response.choices[0].message.content = "Answer"
+    response.usage.total_tokens = 100
+    response.usage.prompt_tokens = 80
+    response.usage.completion_tokens = 20
+
+    with patch.object(service.client.chat.completions, 'create', return_value=response):
+        result = service.generate("query", [CHUNK, {**CHUNK, 'id': 'chunk-2'}])
+
+    assert result['context_tokens'] > 0
+    assert result['context_tokens_saved'] > 0
+    assert result['num_sources_used'] == 2
+
+
+def test_generate_rejects_citations_of_dropped_sources(service):
+    """A citation only counts if its source made it into the packed prompt."""
+    from unittest.mock import MagicMock
+
+    service.context_packer = ContextPacker(token_budget=30, min_source_tokens=20, encoding=WhitespaceEncoding())
+    dropped = {
+        **CHUNK,
+        'id': 'chunk-2',
+        'content': " ".join(["filler"] * 40),
+        'metadata': {**CHUNK['metadata'], 'book_title': 'Taking Action', 'chapter_number': 4},
+        'similarity': 0.5
+    }
+    response = MagicMock()
+    response.choices[0].message.content = (
+        "- *Learning by Doing* by DuFour, Chapter 1: A Guide to Action, pp. 10-12\n"
+        "- *Taking Action* by DuFour, Chapter 4: Teams, pp. 40-44\n"
+    )
+    response.usage.total_tokens = 100
+    response.usage.prompt_tokens = 80
+    response.usage.completion_tokens = 20
+
+    with patch.object(service.client.chat.completions, 'create', return_value=response):
+        result = service.generate("query", [CHUNK, dropped])
+
+    assert result['num_sources_used'] == 1
+    assert [c['book_title'] for c in result['citations']] == ['Learning by Doing']
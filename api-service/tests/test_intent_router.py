@@ -0,0 +1,158 @@
+"""Tests for intent classification (Story 2.5) and the local centroid classifier."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.centroid_classifier import CentroidClassifier
+from app.services.intent_router import IntentRouter
+
+LLM_RESULT = {
+    'primary_domain': 'assessment',
+    'secondary_domains': [],
+    'needs_clarification': False,
+    'confidence': 0.9
+}
+
+
+@pytest.fixture
+def classifier():
+    """Centroid classifier with three orthogonal domain centroids."""
+    classifier = CentroidClassifier()
+    classifier.fit({
+        'assessment': [1.0, 0.0, 0.0],
+        'collaboration': [0.0, 1.0, 0.0],
+        'leadership': [0.0, 0.0, 1.0],
+    })
+    return classifier
+
+
+def test_centroid_classifier_picks_nearest_domain(classifier):
+    """The primary domain is the closest centroid by cosine similarity."""
+    result = classifier.predict([0.9, 0.1, 0.0])
+
+    assert result['primary_domain'] == 'assessment'
+    assert result['source'] == 'centroid'
+    assert result['confidence'] > 0.99
+
+
+def test_centroid_classifier_reports_close_secondary_domains(classifier):
+    """Domains within the margin of the top score become secondary domains."""
+    result = classifier.predict([1.0, 0.98, 0.0])
+
+    assert result['primary_domain'] == 'assessment'
+    assert result['secondary_domains'] == ['collaboration']
+    assert result['confidence'] < 0.8
+
+
+def test_centroid_classifier_without_centroids_returns_none():
+    """No engine and no centroids means no local prediction."""
+    assert CentroidClassifier().predict([1.0, 0.0]) is None
+
+
+def _centroid_engine(versions, rows):
+    """Engine mock answering the corpus version and centroid queries."""
+    from unittest.mock import MagicMock
+
+    conn = MagicMock()
+    conn.execute.return_value.scalar.side_effect = versions
+    conn.execute.return_value.fetchall.return_value = rows
+    engine = MagicMock()
+    engine.connect.return_value.__enter__.return_value = conn
+    return engine
+
+
+def test_centroid_classifier_backs_off_after_failed_refresh():
+    """A failing database is not queried again on every prediction."""
+    from unittest.mock import MagicMock
+
+    engine = MagicMock()
+    engine.connect.side_effect = RuntimeError("database unavailable")
+    classifier = CentroidClassifier(engine, retry_seconds=60)
+
+    assert classifier.predict([1.0, 0.0]) is None
+    assert classifier.predict([1.0, 0.0]) is None
+    engine.connect.assert_called_once()
+
+
+def test_centroid_classifier_rebuilds_when_corpus_version_changes():
+    """Centroids are keyed on the corpus version and rebuilt after a reload."""
+    engine = _centroid_engine(
+        versions=[1, 2, 2],
+        rows=[('assessment', '[1, 0]'), ('collaboration', '[0, 1]')]
+    )
+    classifier = CentroidClassifier(engine, version_check_seconds=0)
+
+    assert classifier.predict([1.0, 0.0])['primary_domain'] == 'assessment'
+    assert classifier.corpus_version == 1
+
+    engine.connect.return_value.__enter__.return_value.execute.return_value.fetchall.return_value = [
+        ('assessment', '[0, 1]'), ('collaboration', '[1, 0]')
+    ]
+    assert classifier.predict([1.0, 0.0])['primary_domain'] == 'collaboration'
+    assert classifier.corpus_version == 2
+
+
+def test_classify_uses_confident_local_prediction(classifier):
+    """A confident centroid prediction skips the GPT-4o call."""
+    router = IntentRouter(api_key="test-key", centroid_classifier=classifier)
+
+    with patch.object(router, '_classify_with_llm') as llm:
+        result = router.classify("How do we score common assessments?", query_embedding=[0.0, 0.0, 1.0])
+
+    llm.assert_not_called()
+    assert result['primary_domain'] == 'leadership'
+    assert router.get_classifier_stats()['local'] == 1
+
+
+def test_classify_falls_back_to_llm_and_records_agreement(classifier):
+    """Low local confidence falls back to GPT-4o and tracks agreement."""
+    router = IntentRouter(
+        api_key="test-key",
+        centroid_classifier=classifier,
+        local_confidence_threshold=0.99
+    )
+
+    with patch.object(router, '_classify_with_llm', return_value=LLM_RESULT) as llm:
+        result = router.classify("query", query_embedding=np.array([1.0, 0.98, 0.0]))
+
+    llm.assert_called_once_with("query")
+    assert result == LLM_RESULT
+    stats = router.get_classifier_stats()
+    assert stats['llm_fallback'] == 1
+    assert stats['compared'] == 1
+    assert stats['agreement_rate'] == 1.0
+
+
+def test_classify_without_embedding_uses_llm(classifier):
+    """Without a query embedding the router behaves as before."""
+    router = IntentRouter(api_key="test-key", centroid_classifier=classifier)
+
+    with patch.object(router, '_classify_with_llm', return_value=LLM_RESULT) as llm:
+        assert router.classify("query") == LLM_RESULT
+
+    llm.assert_called_once()
+    assert router.get_classifier_stats()['agreement_rate'] is None
+
+
+@pytest.mark.asyncio
+async def test_aclassify_parses_and_caches_llm_result():
+    """The async GPT-4o path parses the function call and caches the result."""
+    from unittest.mock import AsyncMock, MagicMock
+
+    router = IntentRouter(api_key="test-key")
+    response = MagicMock()
+    response.choices[0].message.function_call.arguments = (
+        '{"primary_domain": "assessment", "secondary_domains": ["assessment", "curriculum"], '
+        '"needs_clarification": false, "confidence": 0.9}'
+    )
+
+    with patch.object(router.async_client.chat.completions, 'create',
+                      new=AsyncMock(return_value=response)) as create:
+        first = await router.aclassify("How do we write common assessments?")
+        second = await router.aclassify("How do we write common assessments?")
+
+    create.assert_awaited_once()
+    assert first['primary_domain'] == 'assessment'
+    assert first['secondary_domains'] == ['curriculum']
+    assert second == first
@@ -0,0 +1,61 @@
+"""Tests for per-stage pipeline metrics and the /metrics endpoint."""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import metrics
+
+
+def test_timed_stages_accumulate_in_request_breakdown():
+    """Sync and async stages add up per request; nothing is kept outside one."""
+    @metrics.timed("dedup")
+    def dedup():
+        return "sync"
+
+    @metrics.timed("embedding")
+    async def embed():
+        return "async"
+
+    timings, token = metrics.start_request_timings()
+    try:
+        assert dedup() == "sync"
+        assert dedup() == "sync"
+        assert asyncio.run(embed()) == "async"
+    finally:
+        metrics.reset_request_timings(token)
+
+    assert set(timings) == {"dedup", "embedding"}
+    dedup()
+    assert set(timings) == {"dedup", "embedding"}
+
+
+def test_stage_reraises_errors():
+    """A failing stage is still timed and the error propagates."""
+    timings, token = metrics.start_request_timings()
+    try:
+        with pytest.raises(ValueError):
+            with metrics.stage("generation"):
+                raise ValueError("boom")
+    finally:
+        metrics.reset_request_timings(token)
+
+    assert "generation" in timings
+
+
+def test_server_timing_header_format():
+    """Durations are reported in milliseconds, total last."""
+    header = metrics.server_timing({"embedding": 0.0412, "generation": 1.5}, total=1.6)
+    assert header == "embedding;dur=41.2, generation;dur=1500.0, total;dur=1600.0"
+
+
+def test_metrics_endpoint():
+    """/metrics serves the Prometheus exposition (503 without prometheus_client)."""
+    response = TestClient(app).get("/metrics")
+
+    if metrics.PROMETHEUS_AVAILABLE:
+        assert response.status_code == 200
+        assert "plccoach_stage_duration_seconds" in response.text
+    else:
+        assert response.status_code == 503
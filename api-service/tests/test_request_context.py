@@ -0,0 +1,93 @@
+"""Tests for the request ID / access log ASGI middleware."""
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import request_context
+from app.middleware.request_context import RequestContextMiddleware
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+@pytest.fixture
+def access_log():
+    """Capture access records; yields a function returning them after a flush."""
+    request_context.stop_access_log()
+    handler = ListHandler()
+    request_context.start_access_log(handler)
+    level = request_context.logger.level
+    request_context.logger.setLevel(logging.INFO)
+
+    def records():
+        request_context.stop_access_log()
+        return [json.loads(line) for line in handler.lines]
+
+    yield records
+    request_context.stop_access_log()
+    request_context.logger.setLevel(level)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/echo")
+    async def echo(request: Request):
+        return {"request_id": request.state.request_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_propagates_incoming_request_id(client, access_log):
+    response = client.get("/echo?x=1", headers={"X-Request-ID": "req-42"})
+
+    assert response.headers["X-Request-ID"] == "req-42"
+    assert response.json() == {"request_id": "req-42"}
+
+
+def test_assigns_request_id(client, access_log):
+    response = client.get("/echo")
+
+    request_id = response.headers["X-Request-ID"]
+    assert len(request_id) == 36
+    assert response.json() == {"request_id": request_id}
+
+
+def test_logs_one_record_per_request(client, access_log):
+    client.get("/echo?x=1", headers={"X-Request-ID": "req-42"})
+
+    [record] = access_log()
+    assert record["event"] == "request"
+    assert record["request_id"] == "req-42"
+    assert record["method"] == "GET"
+    assert record["path"] == "/echo"
+    assert record["query_params"] == "x=1"
+    assert record["status_code"] == 200
+    assert record["duration_ms"] >= 0
+
+
+def test_streaming_response_passes_through(client, access_log):
+    response = client.get("/stream")
+
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert "X-Request-ID" in response.headers
+    assert access_log()[0]["status_code"] == 200
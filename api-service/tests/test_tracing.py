@@ -0,0 +1,73 @@
+"""Tests for OpenTelemetry tracing and the pluggable span exporters."""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.main import app
+from app.services import metrics, tracing
+
+
+@pytest.fixture
+def spans_file(tmp_path):
+    """Enable tracing with the JSON lines exporter; yields a reader of the spans."""
+    pytest.importorskip("opentelemetry.sdk")
+    path = tmp_path / "spans.jsonl"
+    assert tracing.setup_tracing("json", str(path), "plccoach-test")
+
+    def read():
+        tracing.shutdown_tracing()  # flushes the batch processor
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    yield read
+    tracing.shutdown_tracing()
+
+
+def test_unknown_exporter_raises():
+    with pytest.raises(ValueError, match="Unknown tracing exporter"):
+        tracing.setup_tracing("zipkin", "spans.jsonl", "plccoach-test")
+
+
+def test_spans_are_noops_when_disabled():
+    """Without an exporter, spans and attributes cost nothing and never fail."""
+    assert not tracing.tracing_enabled()
+    with tracing.span("rag.retrieve") as current:
+        current.set_attribute("rag.chunks_selected", 7)
+        tracing.set_attributes(**{"rag.cache_hit": True})
+
+
+def test_request_spans_carry_request_id(spans_file):
+    """The middleware's request span and its children share the X-Request-ID."""
+    response = TestClient(app).get("/api/health", headers={"X-Request-ID": "req-123"})
+    assert response.headers["X-Request-ID"] == "req-123"
+
+    spans = spans_file()
+    request_span = next(s for s in spans if s['name'] == "GET /api/health")
+    assert request_span['kind'] == "SpanKind.SERVER"
+    assert request_span['attributes']['http.request_id'] == "req-123"
+    assert request_span['attributes']['http.status_code'] == 200
+
+
+def test_stages_and_statements_nest_in_one_trace(spans_file):
+    """Pipeline stages and SQL statements are children of the enclosing span."""
+    engine = create_engine("sqlite://")
+    tracing.instrument_engine(engine, "test")
+
+    @tracing.traced("rag.retrieve")
+    def retrieve():
+        with metrics.stage("vector_query"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1")).fetchall()
+        tracing.set_attributes(**{"rag.chunks_selected": 7})
+
+    retrieve()
+
+    spans = {s['name']: s for s in spans_file()}
+    root, stage, statement = spans["rag.retrieve"], spans["rag.vector_query"], spans["SELECT"]
+    assert root['attributes']['rag.chunks_selected'] == 7
+    assert stage['parent_id'] == root['context']['span_id']
+    assert statement['parent_id'] == stage['context']['span_id']
+    assert statement['attributes']['db.statement'] == "SELECT 1"
+    assert statement['attributes']['db.engine'] == "test"
+    assert len({s['context']['trace_id'] for s in spans.values()}) == 1
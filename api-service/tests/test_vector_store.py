@@ -0,0 +1,73 @@
+"""Tests for the in-process numpy vector store."""
+import numpy as np
+import pytest
+
+from app.services.vector_store import NumpyVectorStore, open_vector_store, write_vector_store
+
+
+def _row(chunk_id, vector, primary, secondary=(), book_id='book-1', pages=(1, 2)):
+    return (
+        chunk_id, f"content {chunk_id}", np.asarray(vector, dtype=np.float32), book_id,
+        'Learning by Doing', ['DuFour'], 3, 'Chapter', pages[0], pages[1],
+        primary, list(secondary)
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    rows = [
+        _row('a', [1.0, 0.0, 0.0], 'assessment'),
+        _row('b', [0.8, 0.6, 0.0], 'collaboration', ['assessment'], book_id='book-2', pages=(None, None)),
+        _row('c', [0.0, 1.0, 0.0], 'collaboration'),
+        _row('d', [0.0, 0.0, 2.0], None),
+    ]
+    write_vector_store(rows, str(tmp_path), corpus_version=7)
+    return NumpyVectorStore(str(tmp_path))
+
+
+def test_snapshot_is_memory_mapped_float16(store):
+    """Vectors are stored as unit-length float16 and opened read-only via mmap."""
+    assert isinstance(store.embeddings, np.memmap)
+    assert store.embeddings.dtype == np.float16
+    assert np.linalg.norm(store.embeddings[3].astype(np.float32)) == pytest.approx(1.0, abs=1e-3)
+    assert store.corpus_version == 7
+    assert len(store) == 4
+
+
+def test_search_ranks_by_cosine(store):
+    """Unfiltered search returns the nearest chunks, best first."""
+    chunks = store.search([2.0, 0.0, 0.0], limit=2)
+
+    assert [c['id'] for c in chunks] == ['a', 'b']
+    assert chunks[0]['similarity'] == pytest.approx(1.0, abs=1e-3)
+    assert chunks[1]['similarity'] == pytest.approx(0.8, abs=1e-3)
+
+
+def test_search_filters_by_domain_masks(store):
+    """Secondary domains match unless only the primary (partition) domain counts."""
+    filtered = store.search([0.0, 1.0, 0.0], domains=['assessment'], limit=10)
+    primary_only = store.search([0.0, 1.0, 0.0], domains=['assessment'], limit=10, primary_only=True)
+
+    assert [c['id'] for c in filtered] == ['b', 'a']
+    assert [c['id'] for c in primary_only] == ['a']
+    assert store.search([0.0, 1.0, 0.0], domains=['leadership'], limit=10) == []
+
+
+def test_search_rebuilds_chunk_metadata(store):
+    """Chunks have the pgvector backend's shape, including unknown pages."""
+    chunk = store.search([0.8, 0.6, 0.0], limit=1)[0]
+
+    assert chunk['content'] == 'content b'
+    assert chunk['metadata']['book_id'] == 'book-2'
+    assert chunk['metadata']['authors'] == ['DuFour']
+    assert chunk['metadata']['page_start'] is None
+    assert chunk['metadata']['primary_domain'] == 'collaboration'
+    assert chunk['metadata']['secondary_domains'] == ['assessment']
+    assert chunk['embedding'].dtype == np.float32
+
+
+def test_open_vector_store_defaults_to_pgvector(tmp_path):
+    """The pgvector backend needs no in-process store; unknown backends fail."""
+    assert open_vector_store('pgvector', str(tmp_path)) is None
+    with pytest.raises(ValueError):
+        open_vector_store('faiss', str(tmp_path))